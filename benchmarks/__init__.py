@@ -0,0 +1 @@
+"""Exif Maker Notes benchmarks."""
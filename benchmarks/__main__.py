@@ -0,0 +1,112 @@
+"""Benchmark runner.
+
+Generates a synthetic corpus and runs each benchmark in a fresh process, so
+that peak memory usage is measured per benchmark. Results are written as
+JSON, e.g.::
+
+    python -m benchmarks --photos 10000 --output results.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import sys
+import tempfile
+import time
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+from benchmarks.corpus import (
+    DEFAULT_SIZE,
+    FORMATS,
+    generate_corpus,
+    write_exposure_config,
+)
+from benchmarks.suite import BENCHMARKS, Corpus, exiftool_version, run_benchmarks
+from exif_maker_notes import __version__
+
+
+def parse_arguments(arguments: list[str] | None = None) -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    parser.add_argument("--photos", type=int, default=1000, help="corpus size")
+    parser.add_argument("--format", choices=FORMATS, default="jpeg")
+    parser.add_argument(
+        "--size",
+        type=int,
+        default=DEFAULT_SIZE,
+        help="approximate photo size in bytes",
+    )
+    parser.add_argument("--jobs", type=int, default=1)
+    parser.add_argument(
+        "--benchmark",
+        action="append",
+        choices=BENCHMARKS,
+        help="benchmark to run, can be repeated; defaults to all",
+    )
+    parser.add_argument("--directory", type=Path, help="keep the corpus here")
+    parser.add_argument("--output", type=Path, help="JSON output, defaults to stdout")
+    return parser.parse_args(arguments)
+
+
+def run(arguments: argparse.Namespace, directory: Path) -> dict[str, Any]:
+    """Generate the corpus and run the selected benchmarks."""
+    start = time.perf_counter()
+    photos = generate_corpus(
+        directory / "photos",
+        arguments.photos,
+        file_format=arguments.format,
+        size=arguments.size,
+    )
+    corpus = Corpus(
+        directory / "photos",
+        directory / "exposure.csv",
+        directory / "journal.sqlite",
+    )
+    write_exposure_config(corpus.exposure_config, photos)
+    generated = time.perf_counter() - start
+
+    results = run_benchmarks(
+        corpus,
+        arguments.benchmark or BENCHMARKS,
+        arguments.jobs,
+    )
+
+    return {
+        "timestamp": datetime.now(tz=UTC).isoformat(),
+        "version": __version__,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "exiftool": exiftool_version(),
+        "corpus": {
+            "photos": arguments.photos,
+            "format": arguments.format,
+            "size": arguments.size,
+            "seconds": generated,
+        },
+        "benchmarks": results,
+    }
+
+
+def main() -> None:
+    """Run the benchmarks."""
+    arguments = parse_arguments()
+    if arguments.directory is not None:
+        arguments.directory.mkdir(parents=True, exist_ok=True)
+        report = run(arguments, arguments.directory)
+    else:
+        with tempfile.TemporaryDirectory() as directory:
+            report = run(arguments, Path(directory))
+
+    output = json.dumps(report, indent=2) + "\n"
+    if arguments.output is None:
+        sys.stdout.write(output)
+    else:
+        arguments.output.write_text(output, encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,274 @@
+"""Synthetic photo corpus generator.
+
+Photos consist of a minimal image with EXIF metadata and Nikon type 3 maker
+notes, built from a set of camera specifications. The image data is padded
+to the requested file size, so that I/O costs can be simulated.
+"""
+
+from __future__ import annotations
+
+import struct
+from typing import TYPE_CHECKING, NamedTuple
+
+if TYPE_CHECKING:
+    from collections.abc import Sequence
+    from pathlib import Path
+
+# TIFF field types
+BYTE = 1
+ASCII = 2
+SHORT = 3
+LONG = 4
+RATIONAL = 5
+UNDEFINED = 7
+SRATIONAL = 10
+
+FORMATS = {
+    "jpeg": ".jpg",
+    "tiff": ".tif",
+}
+
+DEFAULT_SIZE = 64 * 1024
+FILES_PER_DIRECTORY = 1000
+
+# 1x1 grayscale baseline JPEG, whose scan data is padded to the file size
+JPEG_IMAGE = (
+    # quantization table
+    b"\xff\xdb\x00\x43\x00"
+    + b"\x01" * 64
+    # frame header
+    + b"\xff\xc0\x00\x0b\x08\x00\x01\x00\x01\x01\x01\x11\x00"
+    # single code Huffman tables for DC and AC coefficients
+    + b"\xff\xc4\x00\x14\x00\x01"
+    + b"\x00" * 16
+    + b"\xff\xc4\x00\x14\x10\x01"
+    + b"\x00" * 16
+    # scan header and a single block
+    + b"\xff\xda\x00\x08\x01\x01\x00\x00\x3f\x00\x3f"
+)
+
+TiffEntry = tuple[int, int, int, bytes]
+
+
+class CameraSpec(NamedTuple):
+    """Camera body, lens and settings of synthetic photos."""
+
+    make: str
+    model: str
+    lens_type: int
+    lens: tuple[int, int, int, int]  # tenths of mm and f-number
+    focal_lengths: tuple[int, ...]  # tenths of mm
+    focal_length_35mm: bool = True
+    offset_time: str | None = None
+    time_zone: int = 60
+    daylight_savings: bool = False
+    exposure_compensation: tuple[int, int] = (0, 6)
+
+
+DEFAULT_SPECS = (
+    CameraSpec(
+        "NIKON CORPORATION",
+        "NIKON D5200",
+        0x0E,
+        (180, 1050, 35, 56),
+        (180, 320, 500, 1050),
+        daylight_savings=True,
+    ),
+    CameraSpec(
+        "NIKON CORPORATION",
+        "NIKON D750",
+        0x4E,
+        (240, 1200, 40, 40),
+        (240, 700, 1200),
+        focal_length_35mm=False,
+        exposure_compensation=(-2, 6),
+    ),
+    CameraSpec(
+        "NIKON CORPORATION",
+        "NIKON Z 6",
+        0x86,
+        (240, 700, 40, 40),
+        (240, 500),
+        offset_time="+02:00",
+        time_zone=120,
+    ),
+)
+
+
+def ascii_entry(tag: int, value: str) -> TiffEntry:
+    """Create a null-terminated ASCII entry."""
+    encoded = value.encode() + b"\x00"
+    return tag, ASCII, len(encoded), encoded
+
+
+def numeric_entry(tag: int, field_type: int, fmt: str, *values: int) -> TiffEntry:
+    """Create a numeric entry; rationals take two values each."""
+    count = len(values) // 2 if field_type in {RATIONAL, SRATIONAL} else len(values)
+    return tag, field_type, count, struct.pack(f"<{fmt * len(values)}", *values)
+
+
+def ifd_size(entries: Sequence[TiffEntry]) -> int:
+    """Byte size of an IFD including the values stored after it."""
+    values = sum(len(value) + len(value) % 2 for *_, value in entries if len(value) > 4)  # ruff: ignore[magic-value-comparison]
+    return 2 + 12 * len(entries) + 4 + values
+
+
+def pack_ifd(entries: Sequence[TiffEntry], offset: int) -> bytes:
+    """Pack a little-endian IFD located at ``offset``."""
+    entries = sorted(entries)
+    data_offset = offset + 2 + 12 * len(entries) + 4
+    directory = [struct.pack("<H", len(entries))]
+    data: list[bytes] = []
+    for tag, field_type, count, value in entries:
+        if len(value) > 4:  # ruff: ignore[magic-value-comparison]
+            directory.append(struct.pack("<HHII", tag, field_type, count, data_offset))
+            padded = value + b"\x00" * (len(value) % 2)
+            data.append(padded)
+            data_offset += len(padded)
+        else:
+            directory.append(
+                struct.pack("<HHI", tag, field_type, count) + value.ljust(4, b"\x00"),
+            )
+    directory.append(struct.pack("<I", 0))
+    return b"".join(directory + data)
+
+
+def maker_notes(spec: CameraSpec) -> bytes:
+    """Build Nikon type 3 maker notes."""
+    entries = [
+        (
+            0x0024,
+            UNDEFINED,
+            4,
+            struct.pack("<hBB", spec.time_zone, spec.daylight_savings, 0),
+        ),
+        numeric_entry(0x0083, BYTE, "B", spec.lens_type),
+        numeric_entry(0x0084, RATIONAL, "I", *(x for v in spec.lens for x in (v, 10))),
+    ]
+    return b"Nikon\x00\x02\x11\x00\x00II*\x00\x08\x00\x00\x00" + pack_ifd(entries, 8)
+
+
+def exif_entries(spec: CameraSpec, focal_length: int) -> list[TiffEntry]:
+    """Build the EXIF IFD entries."""
+    entries = [
+        numeric_entry(0x9204, SRATIONAL, "i", *spec.exposure_compensation),
+        numeric_entry(0x920A, RATIONAL, "I", focal_length, 10),
+        (0x927C, UNDEFINED, len(notes := maker_notes(spec)), notes),
+    ]
+    if spec.focal_length_35mm:
+        entries.append(numeric_entry(0xA405, SHORT, "H", focal_length // 10))
+    if spec.offset_time is not None:
+        entries.append(ascii_entry(0x9010, spec.offset_time))
+    return entries
+
+
+def build_tiff(
+    spec: CameraSpec,
+    focal_length: int,
+    image_size: int | None = None,
+) -> bytes:
+    """Build a TIFF structure, with an uncompressed image of about ``image_size``.
+
+    Without ``image_size`` only metadata is included, as embedded in JPEG.
+    """
+    width = 256
+    height = max(1, (image_size or 0) // width)
+    exif = exif_entries(spec, focal_length)
+
+    def ifd0(exif_offset: int, strip_offset: int) -> list[TiffEntry]:
+        entries = [
+            ascii_entry(0x010F, spec.make),
+            ascii_entry(0x0110, spec.model),
+            numeric_entry(0x8769, LONG, "I", exif_offset),
+        ]
+        if image_size is not None:
+            entries += [
+                numeric_entry(0x0100, LONG, "I", width),
+                numeric_entry(0x0101, LONG, "I", height),
+                numeric_entry(0x0102, SHORT, "H", 8),
+                numeric_entry(0x0103, SHORT, "H", 1),
+                numeric_entry(0x0106, SHORT, "H", 1),
+                numeric_entry(0x0111, LONG, "I", strip_offset),
+                numeric_entry(0x0115, SHORT, "H", 1),
+                numeric_entry(0x0116, LONG, "I", height),
+                numeric_entry(0x0117, LONG, "I", width * height),
+            ]
+        return entries
+
+    exif_offset = 8 + ifd_size(ifd0(0, 0))
+    strip_offset = exif_offset + ifd_size(exif)
+    tiff = (
+        b"II*\x00\x08\x00\x00\x00"
+        + pack_ifd(ifd0(exif_offset, strip_offset), 8)
+        + pack_ifd(exif, exif_offset)
+    )
+    if image_size is not None:
+        tiff += b"\x00" * (width * height)
+    return tiff
+
+
+def build_jpeg(spec: CameraSpec, focal_length: int, size: int) -> bytes:
+    """Build a JPEG with EXIF metadata, padded to about ``size`` bytes."""
+    exif = b"Exif\x00\x00" + build_tiff(spec, focal_length)
+    photo = b"\xff\xd8\xff\xe1" + struct.pack(">H", len(exif) + 2) + exif + JPEG_IMAGE
+    padding = max(0, size - len(photo) - 2)
+    return photo + b"\x00" * padding + b"\xff\xd9"
+
+
+def build_photo(
+    spec: CameraSpec,
+    focal_length: int,
+    *,
+    file_format: str = "jpeg",
+    size: int = DEFAULT_SIZE,
+) -> bytes:
+    """Build a synthetic photo."""
+    if file_format == "tiff":
+        return build_tiff(spec, focal_length, size)
+    return build_jpeg(spec, focal_length, size)
+
+
+def generate_corpus(
+    directory: Path,
+    count: int,
+    *,
+    file_format: str = "jpeg",
+    size: int = DEFAULT_SIZE,
+    specs: Sequence[CameraSpec] = DEFAULT_SPECS,
+) -> list[Path]:
+    """Generate synthetic photos, cycling through camera specs and focal lengths.
+
+    Photos are spread over subdirectories of ``FILES_PER_DIRECTORY`` photos.
+    """
+    if file_format not in FORMATS:
+        error = f"Unsupported format: {file_format}"
+        raise ValueError(error)
+
+    templates: dict[tuple[int, int], bytes] = {}
+    photos: list[Path] = []
+    for index in range(count):
+        spec_index = index % len(specs)
+        spec = specs[spec_index]
+        focal_length = spec.focal_lengths[index // len(specs) % len(spec.focal_lengths)]
+        key = (spec_index, focal_length)
+        if key not in templates:
+            templates[key] = build_photo(
+                spec,
+                focal_length,
+                file_format=file_format,
+                size=size,
+            )
+
+        subdirectory = directory / f"{index // FILES_PER_DIRECTORY:04d}"
+        subdirectory.mkdir(parents=True, exist_ok=True)
+        photo = subdirectory / f"DSC_{index:06d}{FORMATS[file_format]}"
+        photo.write_bytes(templates[key])
+        photos.append(photo)
+    return photos
+
+
+def write_exposure_config(path: Path, photos: Sequence[Path], every: int = 10) -> None:
+    """Write an exposure compensation configuration for every n-th photo."""
+    lines = ["File name,Exposure compensation"]
+    lines += [f"{photo.name},0.7" for photo in photos[::every]]
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
@@ -0,0 +1,228 @@
+"""Benchmarks of the metadata pipeline, end to end and per stage."""
+
+from __future__ import annotations
+
+import resource
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from logging import WARNING, Logger, getLogger
+from multiprocessing import get_context
+from typing import TYPE_CHECKING, Any, NamedTuple
+
+from exif_maker_notes.files import PhotoDiscovery
+from exif_maker_notes.fixes import create_fixes, required_tags
+from exif_maker_notes.fixes.pipeline import apply_fixes
+from exif_maker_notes.native import NATIVE_TAGS
+from exif_maker_notes.parallel import iter_parallel_metadata
+from exif_maker_notes.tool import (
+    ExifToolSession,
+    chunked,
+    iter_metadata,
+    restore_photos,
+)
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable
+    from pathlib import Path
+
+
+class Corpus(NamedTuple):
+    """Location of a generated corpus."""
+
+    directory: Path
+    exposure_config: Path
+    journal: Path
+
+
+class Measurement(NamedTuple):
+    """Raw benchmark measurement."""
+
+    photos: int
+    seconds: float
+    spawned: int | None
+
+
+def run_discover(corpus: Corpus, _jobs: int) -> Measurement:
+    """Discover the photos of the corpus."""
+    start = time.perf_counter()
+    photos = list(PhotoDiscovery([corpus.directory]))
+    return Measurement(len(photos), time.perf_counter() - start, 0)
+
+
+def read_tags(corpus: Corpus, tags: list[str], *, native: bool) -> Measurement:
+    """Read a projection of tags."""
+    photos = list(PhotoDiscovery([corpus.directory]))
+    start = time.perf_counter()
+    with ExifToolSession() as session:
+        read = sum(
+            1
+            for _ in iter_metadata(
+                photos,
+                tags=tags,
+                session=session,
+                native=native,
+            )
+        )
+    return Measurement(read, time.perf_counter() - start, session.spawned)
+
+
+def run_read(corpus: Corpus, _jobs: int) -> Measurement:
+    """Read all natively decoded tags, without exiftool."""
+    return read_tags(corpus, sorted(NATIVE_TAGS), native=True)
+
+
+def run_read_exiftool(corpus: Corpus, _jobs: int) -> Measurement:
+    """Read the same tags with exiftool only."""
+    return read_tags(corpus, sorted(NATIVE_TAGS), native=False)
+
+
+def run_evaluate(corpus: Corpus, _jobs: int) -> Measurement:
+    """Evaluate the fixes on metadata read beforehand."""
+    fixes = create_fixes(None, exposure_config=corpus.exposure_config)
+    tags = required_tags(fixes)
+    photos = list(PhotoDiscovery([corpus.directory]))
+    with ExifToolSession() as session:
+        metadata = list(iter_metadata(photos, tags=tags, session=session))
+
+    start = time.perf_counter()
+    for chunk in chunked(metadata, 500):
+        chunk_photos = [photo for photo, _ in chunk]
+        records = [photo_metadata for _, photo_metadata in chunk]
+        for fix in fixes:
+            fix.apply_batch(chunk_photos, records)
+    return Measurement(len(metadata), time.perf_counter() - start, 0)
+
+
+def run_list(corpus: Corpus, jobs: int) -> Measurement:
+    """List all metadata, as the list command does."""
+    photos = list(PhotoDiscovery([corpus.directory]))
+    start = time.perf_counter()
+    if jobs > 1:
+        for _ in iter_parallel_metadata(photos, quiet_logger(), jobs=jobs):
+            pass
+        return Measurement(len(photos), time.perf_counter() - start, None)
+
+    with ExifToolSession() as session:
+        for _ in iter_metadata(photos, session=session):
+            pass
+    return Measurement(len(photos), time.perf_counter() - start, session.spawned)
+
+
+def fix_corpus(
+    corpus: Corpus,
+    jobs: int,
+    *,
+    dry_run: bool = False,
+    in_place: bool = False,
+) -> Measurement:
+    """Apply fixes to the corpus, as the fix command does."""
+    photos = list(PhotoDiscovery([corpus.directory]))
+    start = time.perf_counter()
+    with ExifToolSession() as session:
+        apply_fixes(
+            photos,
+            quiet_logger(),
+            dry_run=dry_run,
+            exposure_config=corpus.exposure_config,
+            jobs=jobs,
+            journal_path=corpus.journal,
+            in_place=in_place,
+            session=session,
+        )
+    spawned = session.spawned if jobs == 1 else None
+    return Measurement(len(photos), time.perf_counter() - start, spawned)
+
+
+def run_fix_dry_run(corpus: Corpus, jobs: int) -> Measurement:
+    """Apply fixes without writing."""
+    return fix_corpus(corpus, jobs, dry_run=True)
+
+
+def run_fix(corpus: Corpus, jobs: int) -> Measurement:
+    """Apply fixes with exiftool, keeping backups."""
+    return fix_corpus(corpus, jobs)
+
+
+def run_fix_in_place(corpus: Corpus, jobs: int) -> Measurement:
+    """Apply fixes, patching tags in place where possible."""
+    return fix_corpus(corpus, jobs, in_place=True)
+
+
+def run_restore(corpus: Corpus, jobs: int) -> Measurement:
+    """Restore photos from their backups."""
+    photos = list(PhotoDiscovery([corpus.directory]).backed_up())
+    start = time.perf_counter()
+    with ExifToolSession() as session:
+        restore_photos(photos, quiet_logger(), session=session, jobs=jobs)
+    return Measurement(len(photos), time.perf_counter() - start, session.spawned)
+
+
+# benchmarks in the order they run; writes come last as they change the corpus
+BENCHMARKS: dict[str, Callable[[Corpus, int], Measurement]] = {
+    "discover": run_discover,
+    "read": run_read,
+    "read-exiftool": run_read_exiftool,
+    "evaluate": run_evaluate,
+    "list": run_list,
+    "fix-dry-run": run_fix_dry_run,
+    "fix": run_fix,
+    "restore": run_restore,
+    "fix-in-place": run_fix_in_place,
+}
+
+
+def quiet_logger() -> Logger:
+    """Logger that only reports problems."""
+    logger = getLogger("benchmarks")
+    logger.setLevel(WARNING)
+    return logger
+
+
+def peak_rss(who: int) -> int:
+    """Peak resident set size in bytes."""
+    # Linux reports kilobytes, macOS bytes
+    scale = 1 if sys.platform == "darwin" else 1024
+    return resource.getrusage(who).ru_maxrss * scale
+
+
+def measure(name: str, corpus: Corpus, jobs: int) -> dict[str, Any]:
+    """Run a benchmark and collect its statistics, in a fresh process."""
+    measurement = BENCHMARKS[name](corpus, jobs)
+    return {
+        "name": name,
+        "jobs": jobs,
+        "photos": measurement.photos,
+        "seconds": measurement.seconds,
+        "photos_per_second": (
+            measurement.photos / measurement.seconds if measurement.seconds else None
+        ),
+        "peak_rss_bytes": peak_rss(resource.RUSAGE_SELF),
+        "children_peak_rss_bytes": peak_rss(resource.RUSAGE_CHILDREN),
+        "exiftool_spawned": measurement.spawned,
+    }
+
+
+def exiftool_version() -> str | None:
+    """Version of the installed exiftool, if any."""
+    try:
+        with ExifToolSession() as session:
+            return str(session.helper.version)
+    except FileNotFoundError:
+        return None
+
+
+def run_benchmarks(
+    corpus: Corpus,
+    names: Iterable[str],
+    jobs: int = 1,
+) -> list[dict[str, Any]]:
+    """Run benchmarks in order, each in a fresh process."""
+    names = set(names)
+    results = []
+    for name in BENCHMARKS:
+        if name not in names:
+            continue
+        with ProcessPoolExecutor(1, mp_context=get_context("spawn")) as executor:
+            results.append(executor.submit(measure, name, corpus, jobs).result())
+    return results
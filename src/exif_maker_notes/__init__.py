@@ -1,5 +1,12 @@
 """Exif Maker Notes package."""
 
-import importlib.metadata
 
-__version__ = importlib.metadata.version("exif-maker-notes")
+def __getattr__(name: str) -> str:
+    """Resolve the package version on first use, as reading metadata is slow."""
+    if name == "__version__":
+        import importlib.metadata  # ruff: ignore[import-outside-top-level]
+
+        return importlib.metadata.version("exif-maker-notes")
+
+    error = f"module {__name__!r} has no attribute {name!r}"
+    raise AttributeError(error)
@@ -0,0 +1,320 @@
+"""Exif Maker Notes asynchronous exiftool integration."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+from contextlib import asynccontextmanager
+from itertools import count
+from typing import TYPE_CHECKING, Self
+
+from exiftool.constants import DEFAULT_EXECUTABLE
+from exiftool.exceptions import ExifToolExecuteError
+
+from exif_maker_notes.logs import DETAIL, TagLines
+from exif_maker_notes.metadata import Metadata
+from exif_maker_notes.tool import (
+    DEFAULT_CHUNK_SIZE,
+    READ_PARAMS,
+    WRITE_PARAMS,
+    chunked,
+    log_metadata,
+)
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncGenerator, Iterable, Sequence
+    from pathlib import Path
+    from types import TracebackType
+
+    from exif_maker_notes.cli.logger import Logger
+
+DEFAULT_POOL_SIZE = 4
+
+READ_BLOCK_SIZE = 64 * 1024
+
+# trailing whitespace allowed after the end marker of an output
+MARKER_SLACK = 16
+
+
+class ExifToolProcessError(ConnectionError):
+    """The exiftool process exited unexpectedly."""
+
+
+class AsyncExifTool:
+    """Single exiftool process in ``-stay_open`` mode driven over async pipes."""
+
+    def __init__(
+        self,
+        common_args: list[str] | None = None,
+        executable: str = DEFAULT_EXECUTABLE,
+    ) -> None:
+        """Initialize the process wrapper."""
+        self.common_args = ["-G"] if common_args is None else common_args
+        self.executable = executable
+        self._process: asyncio.subprocess.Process | None = None
+        self._sequence = count()
+
+    @property
+    def running(self) -> bool:
+        """Whether the exiftool process is running."""
+        return self._process is not None and self._process.returncode is None
+
+    async def start(self) -> None:
+        """Start the exiftool process."""
+        self._process = await asyncio.create_subprocess_exec(
+            self.executable,
+            "-stay_open",
+            "True",
+            "-@",
+            "-",
+            "-common_args",
+            *self.common_args,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+
+    async def close(self) -> None:
+        """Stop the exiftool process."""
+        if self._process is None:
+            return
+        if self.running and self._process.stdin is not None:
+            try:
+                self._process.stdin.write(b"-stay_open\nFalse\n")
+                await self._process.stdin.drain()
+            except ConnectionError:
+                self._process.kill()
+        await self._process.wait()
+        self._process = None
+
+    def kill(self) -> None:
+        """Kill the exiftool process, e.g. after an interrupted command."""
+        if self.running and self._process is not None:
+            self._process.kill()
+        self._process = None
+
+    async def execute(self, *params: str | Path) -> str:
+        """Execute a command and return its standard output.
+
+        Raises ``ExifToolExecuteError`` if exiftool reports a non-zero status
+        and ``ExifToolProcessError`` if the process died.
+        """
+        process = self._process
+        if (
+            process is None
+            or process.stdin is None
+            or process.stdout is None
+            or process.stderr is None
+        ):
+            error = "exiftool process is not running"
+            raise ExifToolProcessError(error)
+
+        sequence = next(self._sequence)
+        ready = f"{{ready{sequence}}}"
+        post = f"post{sequence}"
+        command = [
+            *(str(param) for param in params),
+            "-echo4",
+            f"=${{status}}={post}",
+            f"-execute{sequence}",
+            "",
+        ]
+        process.stdin.write("\n".join(command).encode())
+        await process.stdin.drain()
+
+        # both streams are drained at once, so that exiftool never blocks on
+        # a full pipe while the other one is read
+        reads = [
+            asyncio.ensure_future(self._read_until(process.stdout, ready)),
+            asyncio.ensure_future(self._read_until(process.stderr, post)),
+        ]
+        try:
+            stdout, stderr = await asyncio.gather(*reads)
+        except BaseException:
+            for read in reads:
+                read.cancel()
+            raise
+
+        # standard error ends with "=<status>=" once the marker is removed
+        stderr = stderr[: -len("=")]
+        delimiter = stderr.rfind("=")
+        status = int(stderr[delimiter + 1 :])
+        if status:
+            raise ExifToolExecuteError(
+                status,
+                stdout,
+                stderr[:delimiter],
+                [str(param) for param in params],
+            )
+        return stdout
+
+    @staticmethod
+    async def _read_until(stream: asyncio.StreamReader, marker: str) -> str:
+        """Read a stream until the output ends with a marker.
+
+        Only the tail of the output is checked for the marker, so that large
+        outputs are read in linear time.
+        """
+        encoded_marker = marker.encode()
+        tail_size = len(encoded_marker) + MARKER_SLACK
+        output = bytearray()
+        while not output[-tail_size:].rstrip().endswith(encoded_marker):
+            data = await stream.read(READ_BLOCK_SIZE)
+            if not data:
+                error = "exiftool process exited unexpectedly"
+                raise ExifToolProcessError(error)
+            output += data
+        return output.rstrip()[: -len(encoded_marker)].strip().decode()
+
+
+class AsyncExifToolPool:
+    """Pool of exiftool processes shared between coroutines.
+
+    At most ``size`` commands run concurrently, each on its own process.
+    Processes are started on demand and replaced if they die.
+    """
+
+    def __init__(
+        self,
+        size: int = DEFAULT_POOL_SIZE,
+        common_args: list[str] | None = None,
+    ) -> None:
+        """Initialize the pool."""
+        self.size = max(size, 1)
+        self.common_args = common_args
+        self.spawned: int = 0
+        self.restarts: int = 0
+        self.executions: int = 0
+        self._idle: asyncio.LifoQueue[AsyncExifTool] = asyncio.LifoQueue()
+        self._processes: list[AsyncExifTool] = []
+        self._semaphore = asyncio.Semaphore(self.size)
+
+    async def __aenter__(self) -> Self:
+        """Enter the pool context."""
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        """Exit the pool context."""
+        await self.close()
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncGenerator[AsyncExifTool]:
+        """Acquire a running exiftool process."""
+        async with self._semaphore:
+            et = self._idle.get_nowait() if not self._idle.empty() else None
+            if et is None:
+                et = AsyncExifTool(self.common_args)
+                self._processes.append(et)
+            if not et.running:
+                await et.start()
+                self.spawned += 1
+            try:
+                yield et
+            except (ExifToolExecuteError, ExifToolProcessError):
+                raise
+            except BaseException:
+                # the pipes are out of sync after an interrupted command
+                et.kill()
+                raise
+            finally:
+                self._idle.put_nowait(et)
+
+    async def execute(self, *params: str | Path) -> str:
+        """Execute a command, restarting the process once if it died."""
+        self.executions += 1
+        async with self.acquire() as et:
+            try:
+                return await et.execute(*params)
+            except ExifToolProcessError:
+                await et.close()
+                await et.start()
+                self.spawned += 1
+                self.restarts += 1
+                return await et.execute(*params)
+
+    async def close(self) -> None:
+        """Stop all exiftool processes."""
+        await asyncio.gather(*(et.close() for et in self._processes))
+        self._processes.clear()
+        self._idle = asyncio.LifoQueue()
+
+
+async def read_chunk(
+    pool: AsyncExifToolPool,
+    photos: list[Path],
+    logger: Logger | None = None,
+    tags: Sequence[str] | None = None,
+) -> list[tuple[Path, Metadata]]:
+    """Read metadata of a chunk of photos with a single exiftool call."""
+    params = [*READ_PARAMS, *(f"-{tag}" for tag in tags)] if tags else []
+    metadata = json.loads(await pool.execute("-j", *params, *photos))
+
+    output: list[tuple[Path, Metadata]] = []
+    for photo, data in zip(photos, metadata, strict=True):
+        photo_metadata = Metadata.from_dict(
+            {key: value for key, value in data.items() if key != "SourceFile"},
+        )
+        if logger:
+            log_metadata(logger, photo, photo_metadata)
+        output.append((photo, photo_metadata))
+    return output
+
+
+async def list_metadata(
+    photos: Iterable[Path],
+    logger: Logger | None = None,
+    *,
+    pool: AsyncExifToolPool,
+    tags: Sequence[str] | None = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> dict[Path, Metadata]:
+    """List EXIF metadata for a list of photos.
+
+    Chunks of photos are read concurrently on the processes of the pool.
+    If ``tags`` are given, only those are read, otherwise all tags are listed.
+    """
+    chunks = await asyncio.gather(
+        *(
+            read_chunk(pool, chunk, logger, tags)
+            for chunk in chunked(photos, chunk_size)
+        ),
+    )
+    return {photo: metadata for chunk in chunks for photo, metadata in chunk}
+
+
+async def set_metadata(
+    photo: Path,
+    tags: dict[str, str],
+    logger: Logger | None = None,
+    *,
+    pool: AsyncExifToolPool,
+    dry_run: bool = False,
+) -> None:
+    """Set EXIF metadata for a photo."""
+    if logger:
+        logger.log(DETAIL, "Setting metadata for %s:\n%s", photo, TagLines(tags))
+
+    if not dry_run:
+        await pool.execute(
+            *WRITE_PARAMS,
+            *(f"-{key}={value}" for key, value in tags.items()),
+            photo,
+        )
+
+
+async def restore(
+    photo: Path,
+    logger: Logger | None = None,
+    *,
+    pool: AsyncExifToolPool,
+) -> None:
+    """Restore EXIF metadata from a backup photo."""
+    if logger:
+        logger.log(DETAIL, "Restoring metadata for %s", photo)
+
+    await pool.execute("-P", "-restore_original", photo)
@@ -0,0 +1,117 @@
+"""Backups of photos taken before their metadata is written."""
+
+from __future__ import annotations
+
+import json
+import shutil
+import sys
+from enum import StrEnum
+from typing import TYPE_CHECKING
+
+from exif_maker_notes.files import backup_path, metadata_backup_path
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Mapping
+    from pathlib import Path
+
+# Linux ioctl cloning a file, see ioctl_ficlone(2)
+FICLONE = 0x40049409
+
+
+class BackupMode(StrEnum):
+    """How photos are backed up before their metadata is written."""
+
+    # full copy of the photo kept by exiftool
+    ORIGINAL = "original"
+    # original values of the written tags, in a JSON sidecar
+    METADATA = "metadata"
+    # copy-on-write clone of the photo, or a full copy if not supported
+    REFLINK = "reflink"
+
+
+def reflink(source: Path, target: Path) -> bool:
+    """Clone a file sharing its data blocks, if the file system supports it.
+
+    The target must not exist. Returns False if the file could not be cloned,
+    in which case no target is left behind.
+    """
+    if sys.platform != "linux":
+        return False
+
+    import fcntl  # ruff: ignore[import-outside-top-level]
+
+    with source.open("rb") as src, target.open("xb") as dst:
+        try:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+        except OSError:
+            cloned = False
+        else:
+            cloned = True
+    if not cloned:
+        target.unlink()
+        return False
+
+    shutil.copystat(source, target)
+    return True
+
+
+def write_metadata_backup(
+    photo: Path,
+    tags: Iterable[str],
+    original: Mapping[str, str],
+) -> bool:
+    """Record the original values of the tags about to be written.
+
+    Missing tags are recorded as null, so that restoring deletes them. An
+    existing backup is kept, as it holds the values before the first write.
+    Returns whether the backup was created.
+    """
+    path = metadata_backup_path(photo)
+    if path.exists():
+        return False
+
+    values = {tag: original.get(tag) for tag in tags}
+    temporary = path.with_name(f".{path.name}.tmp")
+    temporary.write_text(json.dumps({"tags": values}) + "\n", encoding="utf-8")
+    temporary.replace(path)
+    return True
+
+
+def read_metadata_backup(photo: Path) -> dict[str, str]:
+    """Read the original values of a photo, missing tags as empty strings."""
+    data = json.loads(metadata_backup_path(photo).read_text(encoding="utf-8"))
+    return {
+        tag: "" if value is None else str(value) for tag, value in data["tags"].items()
+    }
+
+
+def take_backup(
+    photo: Path,
+    tags: Iterable[str],
+    original: Mapping[str, str],
+    mode: BackupMode,
+) -> bool:
+    """Back up a photo before writing tags, returning whether it was created.
+
+    Existing backups are kept. Photos that cannot be cloned are copied, as
+    in-place patches would otherwise leave no backup. With the original
+    mode, exiftool is left to keep its own ``_original`` copy.
+    """
+    if mode is BackupMode.METADATA:
+        return write_metadata_backup(photo, tags, original)
+    if mode is BackupMode.REFLINK:
+        backup = backup_path(photo)
+        if backup.exists():
+            return False
+        if not reflink(photo, backup):
+            shutil.copy2(photo, backup)
+        return True
+    return False
+
+
+def discard_backup(photo: Path, mode: BackupMode) -> None:
+    """Remove a backup created for a write that failed."""
+    if mode is BackupMode.METADATA:
+        metadata_backup_path(photo).unlink(missing_ok=True)
+    elif mode is BackupMode.REFLINK:
+        backup_path(photo).unlink(missing_ok=True)
@@ -0,0 +1,190 @@
+"""Persistent metadata cache."""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Self
+
+from platformdirs import user_cache_dir
+
+from exif_maker_notes.files import Fingerprint, fingerprint
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Sequence
+    from types import TracebackType
+
+DEFAULT_MAX_ENTRIES = 200_000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS metadata (
+    path TEXT NOT NULL,
+    projection TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    inode INTEGER NOT NULL,
+    tags TEXT NOT NULL,
+    accessed INTEGER NOT NULL,
+    PRIMARY KEY (path, projection)
+);
+CREATE INDEX IF NOT EXISTS metadata_accessed ON metadata (accessed);
+"""
+
+
+def default_cache_path() -> Path:
+    """Default metadata cache location."""
+    return Path(user_cache_dir("exifmn")) / "metadata.sqlite"
+
+
+def projection_key(tags: Sequence[str] | None) -> str:
+    """Cache key of the set of requested tags, empty for all tags."""
+    return "\n".join(sorted(tags)) if tags else ""
+
+
+class MetadataCache:
+    """Metadata cache stored in SQLite.
+
+    Entries are keyed on the photo path and the set of requested tags, and
+    are only served while the size, modification time and inode of the photo
+    are unchanged. The least recently used entries are evicted once the cache
+    holds more than ``max_entries`` entries.
+    """
+
+    def __init__(
+        self,
+        location: Path | None = None,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+    ) -> None:
+        """Initialize the metadata cache."""
+        self.location = default_cache_path() if location is None else location
+        self.max_entries = max_entries
+        self.hits: int = 0
+        self.misses: int = 0
+        self._connection: sqlite3.Connection | None = None
+
+    def __enter__(self) -> Self:
+        """Enter the cache context."""
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        """Exit the cache context."""
+        self.close()
+
+    def __reduce__(self) -> tuple[type[Self], tuple[Path, int]]:
+        """Pickle the cache without its connection, e.g. for workers."""
+        return type(self), (self.location, self.max_entries)
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        """Database connection, opened on demand."""
+        if self._connection is None:
+            self.location.parent.mkdir(parents=True, exist_ok=True)
+            # the cache may be shared by parallel workers
+            self._connection = sqlite3.connect(self.location, timeout=30)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.executescript(SCHEMA)
+        return self._connection
+
+    def get_many(
+        self,
+        photos: Iterable[Path],
+        tags: Sequence[str] | None = None,
+    ) -> dict[Path, dict[str, str]]:
+        """Get cached metadata of photos that did not change."""
+        projection = projection_key(tags)
+        output: dict[Path, dict[str, str]] = {}
+        for photo in photos:
+            row = self.connection.execute(
+                "SELECT size, mtime_ns, inode, tags FROM metadata"
+                " WHERE path = ? AND projection = ?",
+                (str(photo.absolute()), projection),
+            ).fetchone()
+            if row is not None and Fingerprint(*row[:3]) == fingerprint(photo):
+                output[photo] = json.loads(row[3])
+                self.hits += 1
+            else:
+                self.misses += 1
+
+        if output:
+            with self.connection:
+                self.connection.executemany(
+                    "UPDATE metadata SET accessed = ?"
+                    " WHERE path = ? AND projection = ?",
+                    (
+                        (time.time_ns(), str(photo.absolute()), projection)
+                        for photo in output
+                    ),
+                )
+        return output
+
+    def put_many(
+        self,
+        entries: Iterable[tuple[Path, Fingerprint, dict[str, str]]],
+        tags: Sequence[str] | None = None,
+    ) -> None:
+        """Store metadata of photos together with their fingerprints."""
+        projection = projection_key(tags)
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO metadata VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    (
+                        str(photo.absolute()),
+                        projection,
+                        *photo_fingerprint,
+                        json.dumps(metadata),
+                        time.time_ns(),
+                    )
+                    for photo, photo_fingerprint, metadata in entries
+                ),
+            )
+
+    def invalidate(self, photos: Iterable[Path] | None = None) -> int:
+        """Remove cached metadata of the given photos, or of all photos."""
+        with self.connection:
+            if photos is None:
+                cursor = self.connection.execute("DELETE FROM metadata")
+            else:
+                cursor = self.connection.executemany(
+                    "DELETE FROM metadata WHERE path = ?",
+                    ((str(photo.absolute()),) for photo in photos),
+                )
+        return cursor.rowcount
+
+    def evict(self) -> int:
+        """Evict the least recently used entries above the size limit."""
+        excess = self.size() - self.max_entries
+        if excess <= 0:
+            return 0
+
+        with self.connection:
+            self.connection.execute(
+                "DELETE FROM metadata WHERE rowid IN"
+                " (SELECT rowid FROM metadata ORDER BY accessed LIMIT ?)",
+                (excess,),
+            )
+        return excess
+
+    def size(self) -> int:
+        """Count cached entries."""
+        (entries,) = self.connection.execute(
+            "SELECT COUNT(*) FROM metadata",
+        ).fetchone()
+        return int(entries)
+
+    def close(self) -> None:
+        """Evict excess entries and close the database.
+
+        Eviction also runs when only copies of the cache were used, e.g. by
+        worker processes, which never close them.
+        """
+        self.evict()
+        self.connection.close()
+        self._connection = None
@@ -1,27 +1,60 @@
 """Exif Maker Notes CLI."""
 
+import sys
+from contextlib import nullcontext
 from pathlib import Path
 from typing import Annotated
 
 import typer
 
-from exif_maker_notes import __version__
-from exif_maker_notes.cli.config import TyperState
-from exif_maker_notes.cli.logger import setup_logger
+from exif_maker_notes.backup import BackupMode
+from exif_maker_notes.cli.state import TyperState
+from exif_maker_notes.export import ExportFormat
+from exif_maker_notes.sidecar import WriteTarget
 
 application = typer.Typer(no_args_is_help=True)
+cache_application = typer.Typer(
+    no_args_is_help=True,
+    help="Manage the persistent metadata cache.",
+)
+application.add_typer(cache_application, name="cache")
+exposure_application = typer.Typer(
+    no_args_is_help=True,
+    help="Manage exposure compensation configurations.",
+)
+application.add_typer(exposure_application, name="exposure")
 state = TyperState()
 
 
 def version_callback(value: bool) -> None:
     """Version callback."""
     if value:
+        from exif_maker_notes import __version__
+
         typer.echo(f"Exif Maker Notes, version {__version__}")
         raise typer.Exit
 
 
+def report_profile(output: Path | None) -> None:
+    """Print the profile summary and optionally write it as JSON."""
+    import json
+
+    from exif_maker_notes import profiling
+    from exif_maker_notes.cli.logger import info_panel, profile_table
+
+    profiler = profiling.active()
+    if profiler is None:
+        return
+
+    report = profiler.report()
+    info_panel(profile_table(report), title="Profile")
+    if output is not None:
+        output.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+
+
 @application.callback()
 def main(
+    ctx: typer.Context,
     debug: Annotated[
         bool,
         typer.Option(
@@ -38,9 +71,48 @@ def main(
             is_eager=True,
         ),
     ] = False,
+    quiet: Annotated[
+        bool,
+        typer.Option(
+            "-q",
+            "--quiet",
+            help="Only log warnings and errors.",
+        ),
+    ] = False,
+    summary: Annotated[
+        bool,
+        typer.Option(
+            "--summary",
+            help="Log summaries instead of the details of every photo.",
+        ),
+    ] = False,
+    profile: Annotated[
+        bool,
+        typer.Option(
+            "--profile",
+            help="Time the stages of the run and print a summary at exit.",
+        ),
+    ] = False,
+    profile_output: Annotated[
+        Path | None,
+        typer.Option(
+            "--profile-output",
+            help="Also write the profile as JSON to this file.",
+        ),
+    ] = None,
 ) -> None:
     """Exif Maker Notes CLI app."""
     state.debug = debug
+    state.quiet = quiet
+    state.summary = summary
+
+    if profile or profile_output is not None:
+        from exif_maker_notes import profiling
+
+        profiling.enable()
+        ctx.call_on_close(lambda: report_profile(profile_output))
+    # callbacks run in reverse order, so logs are flushed before the profile
+    ctx.call_on_close(state.close)
 
 
 @application.command()
@@ -80,26 +152,151 @@ def list_exif(
     photos: Annotated[
         list[Path],
         typer.Argument(
-            help="List of photo paths.",
+            help="List of photo or directory paths.",
         ),
     ],
+    pattern: Annotated[
+        list[str] | None,
+        typer.Option(
+            "-p",
+            "--pattern",
+            help="File name pattern of photos in directories, can be repeated.",
+        ),
+    ] = None,
+    recursive: Annotated[
+        bool,
+        typer.Option(
+            "--recursive/--no-recursive",
+            help="Search directories recursively.",
+        ),
+    ] = True,
+    jobs: Annotated[
+        int,
+        typer.Option(
+            "-j",
+            "--jobs",
+            min=1,
+            help="Number of parallel worker processes.",
+        ),
+    ] = 1,
+    use_cache: Annotated[
+        bool,
+        typer.Option(
+            "--cache/--no-cache",
+            help="Use the persistent metadata cache.",
+        ),
+    ] = True,
+    export_format: Annotated[
+        ExportFormat | None,
+        typer.Option(
+            "-f",
+            "--format",
+            help="Write one record per photo in this format instead of logging.",
+        ),
+    ] = None,
+    tags: Annotated[
+        list[str] | None,
+        typer.Option(
+            "-t",
+            "--tags",
+            help="Tags to read, e.g. EXIF:Make, comma separated or repeated.",
+        ),
+    ] = None,
+    output: Annotated[
+        Path | None,
+        typer.Option(
+            "-o",
+            "--output",
+            dir_okay=False,
+            help="Write records to this file instead of the standard output.",
+        ),
+    ] = None,
 ) -> None:
-    """List EXIF data for a list of photos."""
-    logger = setup_logger(state, "list")
+    """List EXIF data for a list of photos.
 
-    from exif_maker_notes.tool import list_metadata
+    With a format, records are streamed as soon as each chunk of photos is
+    read, so that large trees can be piped into other tools.
+    """
+    tags = [tag for value in tags or () for tag in value.split(",") if tag] or None
+    if export_format is ExportFormat.CSV and not tags:
+        error = "The CSV format requires tags."
+        raise typer.BadParameter(error, param_hint="--tags")
+    if export_format is None and output is not None:
+        error = "An output requires a format."
+        raise typer.BadParameter(error, param_hint="--output")
 
-    list_metadata(photos, logger)
+    from exif_maker_notes.cli.logger import setup_logger
+
+    # keep the standard output for records
+    exporting = export_format is not None and output is None
+    logger = setup_logger(state, "list", stderr=exporting)
+
+    from exif_maker_notes.cache import MetadataCache
+    from exif_maker_notes.export import export_metadata
+    from exif_maker_notes.files import DEFAULT_PATTERNS, PhotoDiscovery
+    from exif_maker_notes.tool import DEFAULT_CHUNK_SIZE, iter_metadata, log_metadata
+    from exif_maker_notes.utils import Counted
+
+    discovery = Counted(
+        PhotoDiscovery(photos, pattern or DEFAULT_PATTERNS, recursive=recursive),
+    )
+    with (
+        MetadataCache() if use_cache else nullcontext() as cache,
+        output.open("w", encoding="utf-8", newline="")
+        if output is not None
+        else nullcontext(sys.stdout) as stream,
+    ):
+        if jobs > 1:
+            from exif_maker_notes.parallel import iter_parallel_metadata
+
+            records = iter_parallel_metadata(
+                discovery,
+                logger,
+                cache,
+                tags=tags,
+                jobs=jobs,
+            )
+        else:
+            records = iter_metadata(discovery, tags=tags, cache=cache)
+
+        if export_format is None:
+            for photo, metadata in records:
+                log_metadata(logger, photo, metadata)
+        else:
+            export_metadata(
+                records,
+                stream,
+                export_format,
+                tags,
+                chunk_size=DEFAULT_CHUNK_SIZE,
+            )
+
+    logger.info("Listed %d photo(s)", discovery.count)
 
 
 @application.command()
-def fix(
+def fix(  # ruff: ignore[too-many-arguments, too-many-positional-arguments]
     photos: Annotated[
         list[Path],
         typer.Argument(
-            help="List of photo paths.",
+            help="List of photo or directory paths.",
         ),
     ],
+    pattern: Annotated[
+        list[str] | None,
+        typer.Option(
+            "-p",
+            "--pattern",
+            help="File name pattern of photos in directories, can be repeated.",
+        ),
+    ] = None,
+    recursive: Annotated[
+        bool,
+        typer.Option(
+            "--recursive/--no-recursive",
+            help="Search directories recursively.",
+        ),
+    ] = True,
     dry_run: Annotated[
         bool,
         typer.Option(
@@ -111,29 +308,451 @@ def fix(
         Path,
         typer.Option(
             "--exposure",
-            help="Path to exposure correction configuration file.",
+            help=(
+                "Path to exposure correction configuration file,"
+                " CSV or an index built with 'exposure index'."
+            ),
         ),
     ] = Path(),
     strict: Annotated[
         bool,
         typer.Option(
             "--strict",
-            help="Strict mode: CSV files need to match photos exactly.",
+            help=(
+                "Strict mode: CSV files need to match photos exactly,"
+                " checked before any photo is written."
+            ),
         ),
     ] = False,
+    batch_size: Annotated[
+        int,
+        typer.Option(
+            "--batch-size",
+            min=1,
+            help="Number of photos to write with a single exiftool call.",
+        ),
+    ] = 100,
+    jobs: Annotated[
+        int,
+        typer.Option(
+            "-j",
+            "--jobs",
+            min=1,
+            help="Number of parallel worker processes.",
+        ),
+    ] = 1,
+    use_cache: Annotated[
+        bool,
+        typer.Option(
+            "--cache/--no-cache",
+            help="Use the persistent metadata cache.",
+        ),
+    ] = True,
+    resume: Annotated[
+        bool,
+        typer.Option(
+            "--resume",
+            help="Skip photos completed in a previous run and unchanged since.",
+        ),
+    ] = False,
+    journal: Annotated[
+        Path | None,
+        typer.Option(
+            "--journal",
+            help="Journal location, defaults to the user state directory.",
+        ),
+    ] = None,
+    in_place: Annotated[
+        bool,
+        typer.Option(
+            "--in-place",
+            help=(
+                "Patch existing fixed-size tags in place, without a backup"
+                " unless another backup mode is used."
+            ),
+        ),
+    ] = False,
+    backup: Annotated[
+        BackupMode,
+        typer.Option(
+            "--backup",
+            help=(
+                "Backup kept by exiftool, original tag values in a JSON"
+                " sidecar, or a copy-on-write clone (a copy where unsupported)."
+            ),
+        ),
+    ] = BackupMode.ORIGINAL,
+    target: Annotated[
+        WriteTarget,
+        typer.Option(
+            "--target",
+            help=(
+                "Write fixed tags to the photos, or to XMP sidecars leaving"
+                " the photos untouched."
+            ),
+        ),
+    ] = WriteTarget.PHOTO,
+    plan: Annotated[
+        Path | None,
+        typer.Option(
+            "--plan",
+            dir_okay=False,
+            help="Record the changes to this plan file, run later with 'apply'.",
+        ),
+    ] = None,
 ) -> None:
-    """Apply fixes to EXIF data for a list of photos."""
+    """Apply fixes to EXIF data for a list of photos.
+
+    With a plan, photos are read and fixes evaluated, but the changes are
+    recorded instead of written, to be reviewed and applied in bulk later.
+    """
+    if plan is not None and jobs > 1:
+        error = "A plan is recorded by a single process."
+        raise typer.BadParameter(error, param_hint="--jobs")
+
+    from exif_maker_notes.cli.logger import setup_logger
+
     logger = setup_logger(state, "fix")
 
-    from exif_maker_notes.fixes import apply_fixes
+    from exif_maker_notes.cache import MetadataCache
+    from exif_maker_notes.files import DEFAULT_PATTERNS, PhotoDiscovery
+    from exif_maker_notes.fixes.exposure_store import ExposureConfigurationError
+    from exif_maker_notes.fixes.pipeline import apply_fixes
+
+    discovery = PhotoDiscovery(photos, pattern or DEFAULT_PATTERNS, recursive=recursive)
+    with MetadataCache() if use_cache else nullcontext() as cache:
+        try:
+            failed = apply_fixes(
+                discovery,
+                logger,
+                dry_run=dry_run,
+                exposure_config=exposure,
+                strict=strict,
+                batch_size=batch_size,
+                jobs=jobs,
+                cache=cache,
+                journal_path=journal,
+                resume=resume,
+                in_place=in_place,
+                backup=backup,
+                target=target,
+                plan_path=plan,
+            )
+        except ExposureConfigurationError as e:
+            logger.error("%s", e)  # ruff: ignore[error-instead-of-exception]
+            raise typer.Exit(code=1) from e
+    if failed:
+        raise typer.Exit(code=1)
+
+
+@application.command("apply")
+def apply_plan(
+    plan: Annotated[
+        Path,
+        typer.Argument(
+            exists=True,
+            dir_okay=False,
+            help="Plan recorded with 'fix --plan'.",
+        ),
+    ],
+    dry_run: Annotated[
+        bool,
+        typer.Option(
+            "--dry-run",
+            help="Check the plan without making any changes.",
+        ),
+    ] = False,
+    batch_size: Annotated[
+        int,
+        typer.Option(
+            "--batch-size",
+            min=1,
+            help="Number of photos to write with a single exiftool call.",
+        ),
+    ] = 100,
+    jobs: Annotated[
+        int,
+        typer.Option(
+            "-j",
+            "--jobs",
+            min=1,
+            help="Number of parallel worker processes.",
+        ),
+    ] = 1,
+    in_place: Annotated[
+        bool,
+        typer.Option(
+            "--in-place",
+            help=(
+                "Patch existing fixed-size tags in place, without a backup"
+                " unless another backup mode is used."
+            ),
+        ),
+    ] = False,
+    backup: Annotated[
+        BackupMode,
+        typer.Option(
+            "--backup",
+            help=(
+                "Backup kept by exiftool, original tag values in a JSON"
+                " sidecar, or a copy-on-write clone (a copy where unsupported)."
+            ),
+        ),
+    ] = BackupMode.ORIGINAL,
+) -> None:
+    """Write the changes of a plan, skipping photos changed since."""
+    from exif_maker_notes.cli.logger import setup_logger
+
+    logger = setup_logger(state, "apply")
+
+    from exif_maker_notes.cache import MetadataCache
+    from exif_maker_notes.plan import PlanError, PlanReader
+    from exif_maker_notes.plan import apply_plan as apply_changes
+
+    try:
+        reader = PlanReader(plan)
+    except PlanError as e:
+        logger.error("%s", e)  # ruff: ignore[error-instead-of-exception]
+        raise typer.Exit(code=1) from e
+
+    # photos patched in place are removed from the cache
+    with MetadataCache() if in_place and not dry_run else nullcontext() as cache:
+        failed = apply_changes(
+            reader,
+            logger,
+            dry_run=dry_run,
+            batch_size=batch_size,
+            jobs=jobs,
+            in_place=in_place,
+            backup=backup,
+            cache=cache,
+        )
+    if failed:
+        raise typer.Exit(code=1)
+
+
+@application.command()
+def watch(
+    directory: Annotated[
+        Path,
+        typer.Argument(
+            exists=True,
+            file_okay=False,
+            help="Directory receiving new photos.",
+        ),
+    ],
+    pattern: Annotated[
+        list[str] | None,
+        typer.Option(
+            "-p",
+            "--pattern",
+            help="File name pattern of photos, can be repeated.",
+        ),
+    ] = None,
+    recursive: Annotated[
+        bool,
+        typer.Option(
+            "--recursive/--no-recursive",
+            help="Watch subdirectories too.",
+        ),
+    ] = True,
+    dry_run: Annotated[
+        bool,
+        typer.Option(
+            "--dry-run",
+            help="Run the fixes without making any changes.",
+        ),
+    ] = False,
+    exposure: Annotated[
+        Path,
+        typer.Option(
+            "--exposure",
+            help=(
+                "Path to exposure correction configuration file,"
+                " CSV or an index built with 'exposure index'."
+            ),
+        ),
+    ] = Path(),
+    batch_size: Annotated[
+        int,
+        typer.Option(
+            "--batch-size",
+            min=1,
+            help="Number of photos to write with a single exiftool call.",
+        ),
+    ] = 100,
+    in_place: Annotated[
+        bool,
+        typer.Option(
+            "--in-place",
+            help=(
+                "Patch existing fixed-size tags in place, requires a backup"
+                " mode other than the original."
+            ),
+        ),
+    ] = False,
+    backup: Annotated[
+        BackupMode,
+        typer.Option(
+            "--backup",
+            help=(
+                "Backup kept by exiftool, original tag values in a JSON"
+                " sidecar, or a copy-on-write clone (a copy where unsupported)."
+            ),
+        ),
+    ] = BackupMode.ORIGINAL,
+    poll: Annotated[
+        bool,
+        typer.Option(
+            "--poll",
+            help="Poll the directory instead of using inotify.",
+        ),
+    ] = False,
+    debounce: Annotated[
+        float,
+        typer.Option(
+            "--debounce",
+            min=0,
+            help="Seconds without events before a new photo is fixed.",
+        ),
+    ] = 0.5,
+    scan: Annotated[
+        bool,
+        typer.Option(
+            "--scan/--no-scan",
+            help="Fix photos already in the directory before watching.",
+        ),
+    ] = True,
+) -> None:
+    """Fix photos as they land in a directory, until interrupted."""
+    if in_place and backup is BackupMode.ORIGINAL:
+        error = "Photos patched in place need another backup mode to be skipped."
+        raise typer.BadParameter(error, param_hint="--backup")
+
+    from exif_maker_notes.cli.logger import setup_logger
 
-    apply_fixes(
-        photos,
+    logger = setup_logger(state, "watch")
+
+    from exif_maker_notes.files import DEFAULT_PATTERNS
+    from exif_maker_notes.fixes import create_fixes
+    from exif_maker_notes.fixes.pipeline import FixPipeline, watch_fixes
+
+    pipeline = FixPipeline(
+        create_fixes(logger, exposure_config=exposure),
         logger,
         dry_run=dry_run,
-        exposure_config=exposure,
-        strict=strict,
+        batch_size=batch_size,
+        in_place=in_place,
+        backup=backup,
     )
+    try:
+        failed = watch_fixes(
+            pipeline,
+            directory,
+            patterns=pattern or DEFAULT_PATTERNS,
+            recursive=recursive,
+            poll=poll,
+            debounce=debounce,
+            scan=scan,
+        )
+    except KeyboardInterrupt:
+        logger.info("Stopped watching %s", directory)
+        return
+    if failed:
+        raise typer.Exit(code=1)
+
+
+@application.command()
+def serve(
+    socket_path: Annotated[
+        Path | None,
+        typer.Option(
+            "--socket",
+            dir_okay=False,
+            help="Socket location, defaults to the user runtime directory.",
+        ),
+    ] = None,
+    exposure: Annotated[
+        Path,
+        typer.Option(
+            "--exposure",
+            help=(
+                "Path to exposure correction configuration file,"
+                " CSV or an index built with 'exposure index'."
+            ),
+        ),
+    ] = Path(),
+    workers: Annotated[
+        int,
+        typer.Option(
+            "-w",
+            "--workers",
+            min=1,
+            help="Number of warm exiftool processes serving requests.",
+        ),
+    ] = 2,
+    batch_size: Annotated[
+        int,
+        typer.Option(
+            "--batch-size",
+            min=1,
+            help="Number of photos to write with a single exiftool call.",
+        ),
+    ] = 100,
+    in_place: Annotated[
+        bool,
+        typer.Option(
+            "--in-place",
+            help=(
+                "Patch existing fixed-size tags in place, without a backup"
+                " unless another backup mode is used."
+            ),
+        ),
+    ] = False,
+    backup: Annotated[
+        BackupMode,
+        typer.Option(
+            "--backup",
+            help=(
+                "Backup kept by exiftool, original tag values in a JSON"
+                " sidecar, or a copy-on-write clone (a copy where unsupported)."
+            ),
+        ),
+    ] = BackupMode.ORIGINAL,
+) -> None:
+    """Serve list, fix and restore requests over a Unix socket.
+
+    Fixes are loaded once and exiftool processes are kept running, so tools
+    calling the service only pay for the metadata I/O of their photos.
+    """
+    from exif_maker_notes.cli.logger import setup_logger
+
+    logger = setup_logger(state, "serve")
+
+    from exif_maker_notes.client import default_socket_path
+    from exif_maker_notes.fixes import create_fixes
+    from exif_maker_notes.service import ExifService, ServiceServer
+
+    path = socket_path or default_socket_path()
+    service = ExifService(
+        create_fixes(logger, exposure_config=exposure),
+        logger,
+        workers=workers,
+        batch_size=batch_size,
+        in_place=in_place,
+        backup=backup,
+    )
+    try:
+        with ServiceServer(path, service) as server:
+            logger.info("Serving on %s", path)
+            server.serve_forever()
+    except FileExistsError as e:
+        logger.error("%s", e)  # ruff: ignore[error-instead-of-exception]
+        raise typer.Exit(code=1) from e
+    except KeyboardInterrupt:
+        logger.info("Stopped serving on %s", path)
+    finally:
+        service.close()
 
 
 @application.command()
@@ -141,16 +760,132 @@ def restore(
     photos: Annotated[
         list[Path],
         typer.Argument(
-            help="List of photo paths.",
+            help="List of photo or directory paths.",
         ),
     ],
+    pattern: Annotated[
+        list[str] | None,
+        typer.Option(
+            "-p",
+            "--pattern",
+            help="File name pattern of photos in directories, can be repeated.",
+        ),
+    ] = None,
+    recursive: Annotated[
+        bool,
+        typer.Option(
+            "--recursive/--no-recursive",
+            help="Search directories recursively.",
+        ),
+    ] = True,
+    jobs: Annotated[
+        int,
+        typer.Option(
+            "-j",
+            "--jobs",
+            min=1,
+            help="Number of threads moving backups back in place.",
+        ),
+    ] = 1,
+    native: Annotated[
+        bool,
+        typer.Option(
+            "--native/--exiftool",
+            help="Move backups natively, or restore every photo with exiftool.",
+        ),
+    ] = True,
 ) -> None:
     """Restore original photos."""
+    from exif_maker_notes.cli.logger import setup_logger
+
     logger = setup_logger(state, "restore")
 
-    from exif_maker_notes.tool import restore
+    from exif_maker_notes.files import DEFAULT_PATTERNS, PhotoDiscovery
+    from exif_maker_notes.tool import ExifToolSession, restore_photos
+    from exif_maker_notes.utils import Counted
+
+    discovery = PhotoDiscovery(photos, pattern or DEFAULT_PATTERNS, recursive=recursive)
+    backed_up = Counted(discovery.backed_up())
+    with ExifToolSession() as session:
+        failed = restore_photos(
+            backed_up,
+            logger,
+            session=session,
+            native=native,
+            jobs=jobs,
+        )
+
+    logger.debug("Spawned %d exiftool process(es)", session.spawned)
+
+    logger.info("Restored %d photo(s), %d failed", backed_up.count - failed, failed)
+
+    if failed:
+        raise typer.Exit(code=1)
+
+
+@cache_application.command("info")
+def cache_info() -> None:
+    """Show metadata cache information."""
+    from exif_maker_notes.cache import MetadataCache
+    from exif_maker_notes.cli.logger import config_table, info_panel
+
+    with MetadataCache() as cache:
+        table = config_table()
+        table.add_row("Cache location", str(cache.location))
+        table.add_row("Cached entries", str(cache.size()))
+        table.add_row("Maximum entries", str(cache.max_entries))
+        info_panel(table, title="Metadata Cache")
+
+
+@cache_application.command("invalidate")
+def cache_invalidate(
+    photos: Annotated[
+        list[Path] | None,
+        typer.Argument(
+            help="List of photo paths, all photos if not given.",
+        ),
+    ] = None,
+) -> None:
+    """Remove photos from the metadata cache."""
+    from exif_maker_notes.cache import MetadataCache
+
+    with MetadataCache() as cache:
+        removed = cache.invalidate(photos or None)
+    typer.echo(f"Removed {removed} cached entries")
+
+
+@exposure_application.command("index")
+def exposure_index(
+    source: Annotated[
+        Path,
+        typer.Argument(
+            exists=True,
+            dir_okay=False,
+            help="Exposure compensation CSV file.",
+        ),
+    ],
+    output: Annotated[
+        Path | None,
+        typer.Option(
+            "-o",
+            "--output",
+            help="Index location, defaults to the CSV file with a .sqlite suffix.",
+        ),
+    ] = None,
+) -> None:
+    """Build an index of an exposure compensation CSV file.
+
+    Fixes using the index only load the values of the photos being fixed.
+    """
+    from exif_maker_notes.fixes.exposure_store import (
+        ExposureConfigurationError,
+        build_exposure_index,
+    )
 
-    for photo in photos:
-        if photo.name.endswith("_original"):
-            continue
-        restore(photo, logger)
+    target = output or source.with_suffix(".sqlite")
+    try:
+        rows = build_exposure_index(source, target)
+    except ExposureConfigurationError as e:
+        typer.echo(str(e), err=True)
+        raise typer.Exit(code=1) from e
+    typer.echo(f"Indexed {rows} rows into {target}")
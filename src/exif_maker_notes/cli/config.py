@@ -10,31 +10,7 @@ import tomli_w
 from platformdirs import user_config_dir
 
 from exif_maker_notes.cli.logger import Table, config_table, info_panel
-
-
-def strtobool(val: str) -> bool:
-    """Convert a string representation of truth to True or False.
-
-    True values are 'y', 'yes', 't', 'true', 'on', and '1'; false values
-    are 'n', 'no', 'f', 'false', 'off', and '0'.  Raises ValueError if
-    'val' is anything else.
-    """
-    val = val.lower()
-    if val in {"y", "yes", "t", "true", "on", "1"}:
-        return True
-    if val in {"n", "no", "f", "false", "off", "0"}:
-        return False
-    error = f"invalid truth value {val!r}"
-    raise ValueError(error)
-
-
-class TyperState:
-    """Execution configuration state."""
-
-    def __init__(self) -> None:
-        """Initialize configuration state."""
-        self.debug: bool = False
-        self.log_path: Path | None = None
+from exif_maker_notes.utils import strtobool
 
 
 class Configuration:
@@ -2,24 +2,64 @@
 
 from __future__ import annotations
 
-from logging import DEBUG, INFO, Formatter, Logger, getLogger
-from logging.handlers import RotatingFileHandler
-from typing import TYPE_CHECKING
+from logging import DEBUG, INFO, WARNING, Formatter, Logger, getLogger
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from queue import SimpleQueue
+from typing import TYPE_CHECKING, Any
 
 from rich import print as rprint
 from rich.color import Color
+from rich.console import Console
 from rich.logging import RichHandler
 from rich.panel import Panel
 from rich.style import Style
 from rich.table import Table
 
+from exif_maker_notes.logs import DETAIL
+
 if TYPE_CHECKING:
-    from exif_maker_notes.cli.config import TyperState
+    from logging import Handler, LogRecord
+
+    from exif_maker_notes.cli.state import TyperState
+
+
+class DeferredQueueHandler(QueueHandler):
+    """Queue handler leaving all formatting to the listener thread.
+
+    Records stay in the process, so unlike the base class their message and
+    arguments do not need to be merged before queueing.
+    """
+
+    def prepare(self, record: LogRecord) -> LogRecord:  # ruff: ignore[no-self-use]
+        """Queue the record as is."""
+        return record
+
 
+def log_level(state: TyperState) -> int:
+    """Get the logging level of the requested verbosity."""
+    if state.debug:
+        return DEBUG
+    if state.quiet:
+        return WARNING
+    if state.summary:
+        return INFO
+    return DETAIL
 
-def setup_logger(state: TyperState, name: str | None = None) -> Logger:
-    """Prepare logger and write the log file."""
-    file_handler = None
+
+def setup_logger(
+    state: TyperState,
+    name: str | None = None,
+    *,
+    stderr: bool = False,
+) -> Logger:
+    """Prepare logger and write the log file.
+
+    Records are queued, then formatted, rendered and written by a listener
+    thread, which is drained and stopped by closing the state. Arguments of
+    records must therefore not be modified once logged. With ``stderr``,
+    the standard output is left to the command's own output.
+    """
+    handlers: list[Handler] = []
     if name and state.log_path is not None:
         file_formatter = Formatter(
             "%(asctime)s %(levelname)-8s %(message)s",
@@ -33,20 +73,28 @@ def setup_logger(state: TyperState, name: str | None = None) -> Logger:
             backupCount=3,
         )
         file_handler.setFormatter(file_formatter)
+        handlers.append(file_handler)
 
-    stream_handler = RichHandler(
-        show_path=state.debug,
-        log_time_format="%Y-%m-%d %H:%M:%S",
+    handlers.append(
+        RichHandler(
+            console=Console(stderr=stderr),
+            show_path=state.debug,
+            log_time_format="%Y-%m-%d %H:%M:%S",
+        ),
     )
 
+    state.close()
+    queue: SimpleQueue[LogRecord] = SimpleQueue()
+    state.listener = QueueListener(queue, *handlers, respect_handler_level=True)
+    state.listener.start()
+
     logger = getLogger()
-    if file_handler:
-        logger.addHandler(file_handler)
-    logger.addHandler(stream_handler)
-    if state.debug:  # pragma: no cover
-        logger.setLevel(DEBUG)
-    else:
-        logger.setLevel(INFO)
+    # replace the handler of a previous command, e.g. when invoked in tests
+    for handler in logger.handlers[:]:
+        if isinstance(handler, DeferredQueueHandler):
+            logger.removeHandler(handler)
+    logger.addHandler(DeferredQueueHandler(queue))
+    logger.setLevel(log_level(state))
 
     return logger
 
@@ -67,4 +115,19 @@ def config_table() -> Table:
     return Table.grid("Key", "Label", "Value", padding=(0, 3))
 
 
+def profile_table(report: dict[str, Any]) -> Table:
+    """Summarize a profile report in a table."""
+    table = Table.grid("Name", "Calls", "Seconds", padding=(0, 3))
+    table.add_row("[bold]Stage", "[bold]Calls", "[bold]Seconds")
+    for name, stage in report["stages"].items():
+        table.add_row(name, str(stage["calls"]), f"{stage['seconds']:.3f}")
+    table.add_row("Total", "", f"{report['seconds']:.3f}")
+    if report["counters"]:
+        table.add_row()
+        table.add_row("[bold]Counter", "[bold]Value", "")
+    for name, value in report["counters"].items():
+        table.add_row(name, str(value), "")
+    return table
+
+
 __all__ = ["Logger", "Table"]
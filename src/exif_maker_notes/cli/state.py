@@ -0,0 +1,27 @@
+"""CLI execution state."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from logging.handlers import QueueListener
+    from pathlib import Path
+
+
+class TyperState:
+    """Execution configuration state."""
+
+    def __init__(self) -> None:
+        """Initialize configuration state."""
+        self.debug: bool = False
+        self.quiet: bool = False
+        self.summary: bool = False
+        self.log_path: Path | None = None
+        self.listener: QueueListener | None = None
+
+    def close(self) -> None:
+        """Flush and stop the log listener of the command, if any."""
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
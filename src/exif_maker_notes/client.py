@@ -0,0 +1,127 @@
+"""Client of the local exifmn service.
+
+Requests and responses are single JSON lines exchanged over a Unix domain
+socket, so that tools can list, fix and restore photos without starting
+Python and exiftool for every file.
+"""
+
+from __future__ import annotations
+
+import json
+import socket
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from platformdirs import user_runtime_dir
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+    from io import BufferedReader
+    from types import TracebackType
+    from typing import Self
+
+
+def default_socket_path() -> Path:
+    """Default service socket location."""
+    return Path(user_runtime_dir("exifmn")) / "service.sock"
+
+
+def encode_message(message: dict[str, Any]) -> bytes:
+    """Encode a message as a JSON line."""
+    return json.dumps(message).encode() + b"\n"
+
+
+class ServiceError(RuntimeError):
+    """Request rejected or failed by the service."""
+
+
+class ServiceClient:
+    """Connection to a running service, reused between requests."""
+
+    def __init__(
+        self,
+        path: Path | None = None,
+        *,
+        timeout: float | None = None,
+    ) -> None:
+        """Initialize the client, connecting on the first request."""
+        self.path = default_socket_path() if path is None else path
+        self.timeout = timeout
+        self._socket: socket.socket | None = None
+        self._reader: BufferedReader | None = None
+
+    def __enter__(self) -> Self:
+        """Enter the client context."""
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        """Exit the client context."""
+        self.close()
+
+    @property
+    def connection(self) -> socket.socket:
+        """Socket connected to the service, opened on demand."""
+        if self._socket is None:
+            self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._socket.settimeout(self.timeout)
+            self._socket.connect(str(self.path))
+        return self._socket
+
+    def close(self) -> None:
+        """Close the connection."""
+        if self._reader is not None:
+            self._reader.close()
+            self._reader = None
+        if self._socket is not None:
+            self._socket.close()
+            self._socket = None
+
+    def request(self, command: str, **arguments: Any) -> dict[str, Any]:  # ruff: ignore[any-type]
+        """Send a request and wait for its response."""
+        self.connection.sendall(encode_message({"command": command, **arguments}))
+        if self._reader is None:
+            self._reader = self.connection.makefile("rb")
+        line = self._reader.readline()
+        if not line:
+            self.close()
+            error = "Connection closed by the service"
+            raise ServiceError(error)
+
+        response: dict[str, Any] = json.loads(line)
+        if not response.pop("ok"):
+            raise ServiceError(response["error"])
+        return response
+
+    def list_metadata(
+        self,
+        photos: Iterable[Path],
+        tags: Iterable[str] | None = None,
+    ) -> list[dict[str, str]]:
+        """List metadata of photos, one record per photo."""
+        response = self.request(
+            "list",
+            photos=[str(photo.absolute()) for photo in photos],
+            tags=None if tags is None else list(tags),
+        )
+        records: list[dict[str, str]] = response["records"]
+        return records
+
+    def fix(self, photos: Iterable[Path], *, dry_run: bool = False) -> dict[str, int]:
+        """Apply fixes to photos, returning the processed and failed counts."""
+        return self.request(
+            "fix",
+            photos=[str(photo.absolute()) for photo in photos],
+            dry_run=dry_run,
+        )
+
+    def restore(self, photos: Iterable[Path]) -> dict[str, int]:
+        """Restore photos, returning the restored and failed counts."""
+        return self.request(
+            "restore",
+            photos=[str(photo.absolute()) for photo in photos],
+        )
@@ -0,0 +1,72 @@
+"""Machine-readable metadata export."""
+
+from __future__ import annotations
+
+import csv
+import json
+from enum import StrEnum
+from typing import TYPE_CHECKING
+
+from exif_maker_notes.utils import chunked
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Mapping, Sequence
+    from pathlib import Path
+    from typing import TextIO
+
+# name of the photo path field, as in exiftool's JSON output
+SOURCE_FILE = "SourceFile"
+
+
+class ExportFormat(StrEnum):
+    """Output format of listed metadata."""
+
+    JSONL = "jsonl"
+    CSV = "csv"
+
+
+def json_record(
+    photo: Path,
+    metadata: Mapping[str, str],
+    tags: Sequence[str] | None = None,
+) -> dict[str, str]:
+    """Build the JSON record of a photo, with only ``tags`` if given."""
+    if tags:
+        metadata = {tag: metadata[tag] for tag in tags if tag in metadata}
+    return {SOURCE_FILE: str(photo), **metadata}
+
+
+def export_metadata(
+    records: Iterable[tuple[Path, Mapping[str, str]]],
+    stream: TextIO,
+    export_format: ExportFormat,
+    tags: Sequence[str] | None = None,
+    *,
+    chunk_size: int,
+) -> int:
+    """Write one record per photo, flushing the stream after every chunk.
+
+    Records are consumed ``chunk_size`` at a time, matching the chunks read
+    by exiftool, so that output follows reading without buffering the run.
+
+    JSON lines hold all tags read, or only ``tags`` if given. CSV columns are
+    the photo path followed by ``tags``, which are required. Returns the
+    number of records written.
+    """
+    if export_format is ExportFormat.CSV:
+        if not tags:
+            error = "Tags are required for the CSV format"
+            raise ValueError(error)
+        writer = csv.writer(stream)
+        writer.writerow([SOURCE_FILE, *tags])
+
+    written = 0
+    for chunk in chunked(records, chunk_size):
+        for photo, metadata in chunk:
+            if export_format is ExportFormat.CSV:
+                writer.writerow([photo, *(metadata.get(tag, "") for tag in tags or ())])
+            else:
+                stream.write(json.dumps(json_record(photo, metadata, tags)) + "\n")
+        stream.flush()
+        written += len(chunk)
+    return written
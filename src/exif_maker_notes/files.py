@@ -0,0 +1,149 @@
+"""File system utilities."""
+
+from __future__ import annotations
+
+import os
+from fnmatch import fnmatchcase
+from typing import TYPE_CHECKING, NamedTuple
+
+from exif_maker_notes import profiling
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator, Sequence
+    from pathlib import Path
+
+BACKUP_SUFFIX = "_original"
+METADATA_BACKUP_SUFFIX = "_original.json"
+SIDECAR_SUFFIX = ".xmp"
+
+DEFAULT_PATTERNS = (
+    "*.jpg",
+    "*.jpeg",
+    "*.nef",
+    "*.nrw",
+    "*.tif",
+    "*.tiff",
+    "*.dng",
+)
+
+
+class Fingerprint(NamedTuple):
+    """File identity used to detect changes without reading the file."""
+
+    size: int
+    mtime_ns: int
+    inode: int
+
+    @classmethod
+    def from_stat(cls, stat: os.stat_result) -> Fingerprint:
+        """Create a fingerprint from a stat result."""
+        return cls(stat.st_size, stat.st_mtime_ns, stat.st_ino)
+
+
+def fingerprint(path: Path) -> Fingerprint | None:
+    """Fingerprint a file, or return None if it does not exist."""
+    try:
+        return Fingerprint.from_stat(path.stat())
+    except FileNotFoundError:
+        return None
+
+
+def backup_path(photo: Path) -> Path:
+    """Path of the exiftool backup of a photo."""
+    return photo.parent / f"{photo.name}{BACKUP_SUFFIX}"
+
+
+def metadata_backup_path(photo: Path) -> Path:
+    """Path of the metadata-only backup of a photo."""
+    return photo.parent / f"{photo.name}{METADATA_BACKUP_SUFFIX}"
+
+
+def sidecar_path(photo: Path) -> Path:
+    """Path of the XMP sidecar of a photo, named after its full name.
+
+    Photos sharing a stem, e.g. RAW and JPEG pairs, get their own sidecars,
+    named as darktable does.
+    """
+    return photo.parent / f"{photo.name}{SIDECAR_SUFFIX}"
+
+
+class PhotoDiscovery:
+    """Discover photos from a list of files and directories.
+
+    Directories are walked with ``os.scandir`` and their entries filtered by
+    case-insensitive glob patterns. Backups are paired with their photos from
+    the same directory listing, so no additional ``stat`` calls are needed.
+    Photos are yielded as soon as their directory has been listed.
+    """
+
+    def __init__(
+        self,
+        paths: Iterable[Path],
+        patterns: Sequence[str] = DEFAULT_PATTERNS,
+        *,
+        recursive: bool = True,
+    ) -> None:
+        """Initialize photo discovery."""
+        self.paths = paths
+        self.patterns = [pattern.lower() for pattern in patterns]
+        self.recursive = recursive
+        self._listed: set[Path] = set()
+        self._backups: set[Path] = set()
+
+    def __iter__(self) -> Iterator[Path]:
+        """Iterate over discovered photos, excluding backups."""
+        for path in self.paths:
+            if path.is_dir():
+                yield from self._walk(path)
+            elif not path.name.endswith(BACKUP_SUFFIX):
+                yield path
+
+    def matches(self, name: str) -> bool:
+        """Check whether a file name matches the patterns."""
+        name = name.lower()
+        return any(fnmatchcase(name, pattern) for pattern in self.patterns)
+
+    def has_backup(self, photo: Path) -> bool:
+        """Check whether a photo has an exiftool or metadata-only backup."""
+        if photo.parent in self._listed:
+            return photo in self._backups
+        return backup_path(photo).exists() or metadata_backup_path(photo).exists()
+
+    def pending(self) -> Iterator[Path]:
+        """Iterate over photos that have not been processed yet."""
+        for photo in self:
+            if not self.has_backup(photo):
+                yield photo
+
+    def backed_up(self) -> Iterator[Path]:
+        """Iterate over photos that have a backup."""
+        for photo in self:
+            if self.has_backup(photo):
+                yield photo
+
+    def _walk(self, root: Path) -> Iterator[Path]:
+        """Walk a directory tree."""
+        directories = [root]
+        while directories:
+            directory = directories.pop()
+            photos: list[Path] = []
+            subdirectories: list[Path] = []
+            with profiling.stage("discover"), os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirectories.append(directory / entry.name)
+                    elif entry.name.endswith(BACKUP_SUFFIX):
+                        self._backups.add(
+                            directory / entry.name.removesuffix(BACKUP_SUFFIX),
+                        )
+                    elif entry.name.endswith(METADATA_BACKUP_SUFFIX):
+                        self._backups.add(
+                            directory / entry.name.removesuffix(METADATA_BACKUP_SUFFIX),
+                        )
+                    elif self.matches(entry.name):
+                        photos.append(directory / entry.name)
+            self._listed.add(directory)
+
+            yield from sorted(photos)
+            if self.recursive:
+                directories.extend(sorted(subdirectories, reverse=True))
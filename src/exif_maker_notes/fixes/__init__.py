@@ -12,23 +12,20 @@ from exif_maker_notes.fixes.hardware import (
     LensModelFix,
 )
 from exif_maker_notes.fixes.timezone import TimezoneFix
-from exif_maker_notes.tool import list_metadata, set_metadata
 
 if TYPE_CHECKING:
     from exif_maker_notes.cli.logger import Logger
     from exif_maker_notes.fixes.fix import Fix
 
 
-def apply_fixes(
-    photos: list[Path],
-    logger: Logger,
+def create_fixes(
+    logger: Logger | None,
     *,
-    dry_run: bool = False,
     exposure_config: Path = Path(),
     strict: bool = False,
-) -> None:
-    """Apply fixes to the given photos."""
-    fixes: list[Fix] = [
+) -> list[Fix]:
+    """Create the fixes to apply."""
+    return [
         TimezoneFix(logger),
         BodyNormalizeNameFix(logger),
         LensModelFix(logger),
@@ -36,24 +33,12 @@ def apply_fixes(
         ExposureCompensationFix(logger, exposure_config, strict=strict),
     ]
 
-    metadata_list = list_metadata(photos)
-    for photo in photos:
-        if photo.name.endswith("_original"):
-            continue
 
-        if (photo.parent / f"{photo.name}_original").exists():
-            continue
+def required_tags(fixes: list[Fix]) -> list[str]:
+    """Union of the tags read by the given fixes."""
+    return list(dict.fromkeys(tag for fix in fixes for tag in fix.tags))
 
-        metadata = metadata_list.get(photo, {})
 
-        fixes_to_apply: dict[str, str] = {}
-        for fix in fixes:
-            fixes_to_apply.update(fix.apply(photo, metadata))
-
-        if fixes_to_apply:
-            set_metadata(
-                photo,
-                fixes_to_apply,
-                logger,
-                dry_run=dry_run,
-            )
+def context_key(fixes: list[Fix]) -> str:
+    """Describe the configuration of all fixes, used to key the journal."""
+    return ";".join(fix.configuration for fix in fixes)
@@ -2,19 +2,38 @@
 
 from __future__ import annotations
 
-import csv
 from typing import TYPE_CHECKING
 
+from exif_maker_notes.files import fingerprint
+from exif_maker_notes.fixes.exposure_store import (
+    ExposureConfigurationError,
+    open_exposure_store,
+)
 from exif_maker_notes.fixes.fix import Fix
+from exif_maker_notes.logs import DETAIL
 
 if TYPE_CHECKING:
+    from collections.abc import Iterable, Sequence
     from pathlib import Path
 
     from exif_maker_notes.cli.logger import Logger
+    from exif_maker_notes.metadata import Metadata
+
+# number of missing photos listed by strict validation
+MISSING_LISTED = 10
 
 
 class ExposureCompensationFix(Fix):
-    """Exposure compensation fix."""
+    """Exposure compensation fix.
+
+    Values are configured per photo name or stem, in a CSV file or a SQLite
+    index built from one. Only the values of the photos being fixed are
+    looked up, one chunk at a time.
+    """
+
+    tags = ("EXIF:ExposureCompensation",)
+    # results depend on the photo name
+    memoize = False
 
     def __init__(
         self,
@@ -31,47 +50,87 @@ class ExposureCompensationFix(Fix):
         super().__init__(logger)
         self.config_path = config_path
         self.strict = strict
-
-        with config_path.open(encoding="utf-8") as f:
-            reader = csv.reader(f)
-            header = next(reader)
-            if not header[1].lower().startswith("exposure"):
-                error = (
-                    f"Invalid exposure compensation configuration file: {config_path}"
-                )
-                raise ValueError(error)
-            self.exposure_compensation_map = {row[0]: float(row[1]) for row in reader}
+        self.store = open_exposure_store(config_path)
+        self._values: dict[str, float] | None = None
 
     @property
     def fix_description(self) -> str:
         """Fix description."""
         return "Set exposure compensation based on postprocessing done."
 
-    def apply(self, photo: Path, metadata: dict[str, str]) -> dict[str, str]:
+    @property
+    def configuration(self) -> str:
+        """Fix configuration that affects its results."""
+        return (
+            f"{super().configuration}:{self.config_path.absolute()}"
+            f":{fingerprint(self.config_path)}:{self.strict}"
+        )
+
+    def lookup(self, photos: Iterable[Path]) -> dict[str, float]:
+        """Get the configured values of photos, keyed on their name or stem."""
+        return self.store.lookup(
+            key for photo in photos for key in (photo.name, photo.stem)
+        )
+
+    def validate(self, photos: Sequence[Path]) -> None:
+        """Check that every photo is configured when strict."""
+        if not self.strict:
+            return
+
+        configured = self.lookup(photos).keys()
+        missing = [
+            photo.name
+            for photo in photos
+            if photo.name not in configured and photo.stem not in configured
+        ]
+        if missing:
+            listed = ", ".join(missing[:MISSING_LISTED])
+            if len(missing) > MISSING_LISTED:
+                listed += f" and {len(missing) - MISSING_LISTED} more"
+            error = (
+                f"{len(missing)} photo(s) not found"
+                f" in exposure compensation configuration: {listed}"
+            )
+            raise ExposureConfigurationError(error)
+
+    def apply_batch(
+        self,
+        photos: Sequence[Path],
+        records: Sequence[Metadata],
+    ) -> list[dict[str, str]]:
+        """Apply the fix to a batch of photos, looking up their values at once."""
+        self._values = self.lookup(photos)
+        try:
+            return super().apply_batch(photos, records)
+        finally:
+            self._values = None
+
+    def compensation(self, photo: Path) -> float | None:
+        """Get the configured exposure compensation of a photo, by name or stem."""
+        values = self.lookup([photo]) if self._values is None else self._values
+        if photo.name in values:
+            return values[photo.name]
+        return values.get(photo.stem)
+
+    def apply(self, photo: Path, metadata: Metadata) -> dict[str, str]:
         """Apply the exposure compensation fix."""
-        if (
-            photo.name not in self.exposure_compensation_map
-            and photo.stem not in self.exposure_compensation_map
-        ):
+        updated_exposure_compensation = self.compensation(photo)
+        if updated_exposure_compensation is None:
             if self.strict:
                 error = (
                     f"Photo {photo.name} not found"
                     " in exposure compensation configuration."
                 )
-                raise ValueError(error)
+                raise ExposureConfigurationError(error)
             return {}
 
-        exif_exposure_compensation = float(metadata.get("EXIF:ExposureCompensation", 0))
-        updated_exposure_compensation = (
-            self.exposure_compensation_map[photo.name]
-            if photo.name in self.exposure_compensation_map
-            else self.exposure_compensation_map[photo.stem]
-        )
+        exif_exposure_compensation = metadata.number("EXIF:ExposureCompensation") or 0.0
         if abs(updated_exposure_compensation - exif_exposure_compensation) < 1e-3:  # ruff: ignore[magic-value-comparison]
             return {}
 
         if self.logger:
-            self.logger.info(
+            self.logger.log(
+                DETAIL,
                 "Setting exposure compensation for %s to %s",
                 photo,
                 updated_exposure_compensation,
@@ -0,0 +1,171 @@
+"""Exposure compensation configuration stores."""
+
+from __future__ import annotations
+
+import csv
+import threading
+from abc import ABC, abstractmethod
+from itertools import islice
+from typing import TYPE_CHECKING, Self
+
+if TYPE_CHECKING:
+    import sqlite3
+    from collections.abc import Iterable, Iterator
+    from pathlib import Path
+
+SQLITE_HEADER = b"SQLite format 3\x00"
+
+# number of keys looked up with a single query
+LOOKUP_CHUNK_SIZE = 500
+
+# number of rows inserted at once when building an index
+INSERT_CHUNK_SIZE = 10_000
+
+SCHEMA = """
+CREATE TABLE exposure (
+    name TEXT PRIMARY KEY,
+    value REAL NOT NULL
+) WITHOUT ROWID;
+"""
+
+
+class ExposureConfigurationError(ValueError):
+    """Invalid exposure compensation configuration."""
+
+
+def read_rows(path: Path) -> Iterator[tuple[str, float]]:
+    """Stream the rows of an exposure compensation CSV file, skipping blank lines."""
+    with path.open(encoding="utf-8", newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        if len(header) < 2 or not header[1].lower().startswith("exposure"):  # ruff: ignore[magic-value-comparison]
+            error = f"Invalid exposure compensation configuration file: {path}"
+            raise ExposureConfigurationError(error)
+        for row in reader:
+            if not row:
+                continue
+            try:
+                name, value = row[0], float(row[1])
+            except (IndexError, ValueError) as e:
+                error = (
+                    "Invalid exposure compensation row"
+                    f" at {path}:{reader.line_num}: {','.join(row)}"
+                )
+                raise ExposureConfigurationError(error) from e
+            yield name, value
+
+
+class ExposureStore(ABC):
+    """Exposure compensation values keyed on photo names."""
+
+    @abstractmethod
+    def lookup(self, keys: Iterable[str]) -> dict[str, float]:
+        """Get the values of the given keys that are configured."""
+
+
+class CsvExposureStore(ExposureStore):
+    """Exposure compensation values loaded from a CSV file into memory."""
+
+    def __init__(self, path: Path) -> None:
+        """Load the values."""
+        self.values = dict(read_rows(path))
+
+    def lookup(self, keys: Iterable[str]) -> dict[str, float]:
+        """Get the values of the given keys that are configured."""
+        return {key: self.values[key] for key in keys if key in self.values}
+
+
+class SqliteExposureStore(ExposureStore):
+    """Exposure compensation values in an indexed SQLite file.
+
+    Only the requested keys are read, so the index can hold millions of rows.
+    """
+
+    def __init__(self, path: Path) -> None:
+        """Initialize the store."""
+        import sqlite3  # ruff: ignore[import-outside-top-level]
+
+        self.path = path
+        self._connection: sqlite3.Connection | None = None
+        # the connection is shared by the threads of a service
+        self._lock = threading.Lock()
+        try:
+            self.connection.execute("SELECT name, value FROM exposure LIMIT 1")
+        except sqlite3.DatabaseError as e:
+            error = f"Invalid exposure compensation index: {path}"
+            raise ExposureConfigurationError(error) from e
+
+    def __reduce__(self) -> tuple[type[Self], tuple[Path]]:
+        """Pickle the store without its connection, e.g. for workers."""
+        return type(self), (self.path,)
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        """Read-only database connection, opened on demand."""
+        if self._connection is None:
+            import sqlite3  # ruff: ignore[import-outside-top-level]
+
+            # read-only and used under the lock by the threads of a service
+            self._connection = sqlite3.connect(
+                f"{self.path.absolute().as_uri()}?mode=ro",
+                uri=True,
+                check_same_thread=False,
+            )
+        return self._connection
+
+    def lookup(self, keys: Iterable[str]) -> dict[str, float]:
+        """Get the values of the given keys that are configured."""
+        values: dict[str, float] = {}
+        iterator = iter(dict.fromkeys(keys))
+        while chunk := list(islice(iterator, LOOKUP_CHUNK_SIZE)):
+            placeholders = ", ".join("?" * len(chunk))
+            query = f"SELECT name, value FROM exposure WHERE name IN ({placeholders})"  # ruff: ignore[hardcoded-sql-expression]
+            with self._lock:
+                values.update(self.connection.execute(query, chunk))
+        return values
+
+
+def open_exposure_store(path: Path) -> ExposureStore:
+    """Open a CSV file or a SQLite index built from one."""
+    with path.open("rb") as f:
+        header = f.read(len(SQLITE_HEADER))
+    if header == SQLITE_HEADER:
+        return SqliteExposureStore(path)
+    return CsvExposureStore(path)
+
+
+def populate_index(connection: sqlite3.Connection, source: Path) -> int:
+    """Insert the rows of a CSV file into an empty index."""
+    rows = 0
+    connection.executescript(SCHEMA)
+    iterator = read_rows(source)
+    while chunk := list(islice(iterator, INSERT_CHUNK_SIZE)):
+        connection.executemany("INSERT OR REPLACE INTO exposure VALUES (?, ?)", chunk)
+        rows += len(chunk)
+    connection.commit()
+    return rows
+
+
+def build_exposure_index(source: Path, target: Path) -> int:
+    """Build a SQLite index from a CSV file, returning the number of rows.
+
+    Later rows override earlier ones with the same name, as when loading the
+    CSV file directly. The index is replaced atomically.
+    """
+    import sqlite3  # ruff: ignore[import-outside-top-level]
+
+    temporary = target.with_name(f".{target.name}.tmp")
+    temporary.unlink(missing_ok=True)
+    connection = sqlite3.connect(temporary)
+    connection.execute("PRAGMA journal_mode=OFF")
+    connection.execute("PRAGMA synchronous=OFF")
+    try:
+        rows = populate_index(connection, source)
+    except BaseException:
+        connection.close()
+        temporary.unlink(missing_ok=True)
+        raise
+
+    connection.close()
+    temporary.replace(target)
+    return rows
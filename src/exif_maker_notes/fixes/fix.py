@@ -3,26 +3,82 @@
 from __future__ import annotations
 
 from abc import ABC, abstractmethod
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, ClassVar, Self
+
+from exif_maker_notes import profiling
 
 if TYPE_CHECKING:
+    from collections.abc import Sequence
     from pathlib import Path
 
     from exif_maker_notes.cli.logger import Logger
+    from exif_maker_notes.metadata import Metadata
+
+# maximum number of memoised results kept per fix
+MEMO_SIZE = 4096
 
 
 class Fix(ABC):
     """Fix abstract base class."""
 
+    # metadata tags read by the fix
+    tags: ClassVar[tuple[str, ...]] = ()
+    # whether results only depend on the values of the tags read
+    memoize: ClassVar[bool] = True
+
     def __init__(self, logger: Logger | None) -> None:
         """Initialize the fix."""
         self.logger = logger
+        self._results: dict[tuple[str | None, ...], dict[str, str]] = {}
+
+    def __copy__(self) -> Self:
+        """Copy the fix, sharing its configuration but not its memoised results."""
+        fix = type(self).__new__(type(self))
+        fix.__dict__.update(self.__dict__, _results={})
+        return fix
 
     @property
     @abstractmethod
     def fix_description(self) -> str:
         """Fix description."""
 
+    @property
+    def configuration(self) -> str:
+        """Fix configuration that affects its results."""
+        return type(self).__name__
+
+    def validate(self, photos: Sequence[Path]) -> None:  # ruff: ignore[empty-method-without-abstract-decorator]
+        """Check the photos before any of them is fixed."""
+
     @abstractmethod
-    def apply(self, photo: Path, metadata: dict[str, str]) -> dict[str, str]:
+    def apply(self, photo: Path, metadata: Metadata) -> dict[str, str]:
         """Apply the fix."""
+
+    def apply_batch(
+        self,
+        photos: Sequence[Path],
+        records: Sequence[Metadata],
+    ) -> list[dict[str, str]]:
+        """Apply the fix to a batch of photos.
+
+        ``records`` holds the metadata of every photo, of which the fix only
+        reads its tags. Results are memoised on the values of these tags, so
+        photos with the same values as a previous photo reuse its result
+        without applying the fix again.
+        """
+        stage = f"fix.{type(self).__name__}"
+        results: list[dict[str, str]] = []
+        for photo, record in zip(photos, records, strict=True):
+            key = tuple(record.get(tag) for tag in self.tags)
+            result = self._results.get(key) if self.memoize else None
+            if result is not None:
+                profiling.count("fix.memo_hits")
+            else:
+                with profiling.stage(stage):
+                    result = self.apply(photo, record)
+                if self.memoize:
+                    if len(self._results) >= MEMO_SIZE:
+                        self._results.clear()
+                    self._results[key] = result
+            results.append(result)
+        return results
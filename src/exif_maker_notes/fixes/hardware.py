@@ -6,20 +6,28 @@ from math import ceil
 from typing import TYPE_CHECKING
 
 from exif_maker_notes.fixes.fix import Fix
+from exif_maker_notes.logs import DETAIL
 
 if TYPE_CHECKING:
     from pathlib import Path
 
+    from exif_maker_notes.metadata import Metadata
+
 
 class BodyNormalizeNameFix(Fix):
     """Body normalize name fix."""
 
+    tags = (
+        "EXIF:Make",
+        "EXIF:Model",
+    )
+
     @property
     def fix_description(self) -> str:
         """Fix description."""
         return "Normalize camera body name."
 
-    def apply(self, photo: Path, metadata: dict[str, str]) -> dict[str, str]:
+    def apply(self, photo: Path, metadata: Metadata) -> dict[str, str]:
         """Apply the body normalize name fix."""
         exif_make = updated_exif_make = metadata.get("EXIF:Make", "")
         exif_model = updated_exif_model = metadata.get("EXIF:Model", "")
@@ -33,7 +41,8 @@ class BodyNormalizeNameFix(Fix):
         if updated_exif_make != exif_make:
             fixes["EXIF:Make"] = updated_exif_make
             if self.logger:
-                self.logger.info(
+                self.logger.log(
+                    DETAIL,
                     "Normalizing body make for %s from %s to %s",
                     photo,
                     exif_make,
@@ -42,7 +51,8 @@ class BodyNormalizeNameFix(Fix):
         if updated_exif_model != exif_model:
             fixes["EXIF:Model"] = updated_exif_model
             if self.logger:
-                self.logger.info(
+                self.logger.log(
+                    DETAIL,
                     "Normalizing body model for %s from %s to %s",
                     photo,
                     exif_model,
@@ -55,12 +65,20 @@ class BodyNormalizeNameFix(Fix):
 class LensModelFix(Fix):
     """Lens model fix."""
 
+    tags = (
+        "EXIF:LensMake",
+        "EXIF:LensModel",
+        "MakerNotes:Lens",
+        "MakerNotes:LensType",
+        "Composite:LensID",
+    )
+
     @property
     def fix_description(self) -> str:
         """Fix description."""
         return "Copy lens model information from Maker notes to the main EXIF."
 
-    def apply(self, photo: Path, metadata: dict[str, str]) -> dict[str, str]:
+    def apply(self, photo: Path, metadata: Metadata) -> dict[str, str]:
         """Apply the lens model fix."""
         exif_lens_make = metadata.get("EXIF:LensMake")
         exif_lens_model = metadata.get("EXIF:LensModel")
@@ -83,7 +101,8 @@ class LensModelFix(Fix):
             lens_make = ""
 
         if self.logger:
-            self.logger.info(
+            self.logger.log(
+                DETAIL,
                 "Setting lens for %s to %s (%s)",
                 photo,
                 lens_full,
@@ -96,37 +115,44 @@ class LensModelFix(Fix):
 class Lens35mmEquivalentFix(Fix):
     """Lens 35mm equivalent fix."""
 
+    tags = (
+        "Composite:LensID",
+        "EXIF:FocalLengthIn35mmFormat",
+        "EXIF:FocalLength",
+    )
+
     @property
     def fix_description(self) -> str:
         """Fix description."""
         return "Fix lens 35mm equivalent."
 
-    def apply(self, photo: Path, metadata: dict[str, str]) -> dict[str, str]:
+    def apply(self, photo: Path, metadata: Metadata) -> dict[str, str]:
         """Apply the lens 35mm equivalent fix."""
         lens_id = metadata.get("Composite:LensID", "")
         if "DX" not in lens_id:
             return {}
 
-        current_35mm_equivalent = metadata.get("EXIF:FocalLengthIn35mmFormat")
-        focal_length = metadata.get("EXIF:FocalLength")
-        if not focal_length:
+        focal_length_raw = metadata.number("EXIF:FocalLength")
+        if not focal_length_raw:
             return {}
 
-        focal_length_raw = float(focal_length.split(" ")[0])
-        if current_35mm_equivalent:
-            current_35mm_equivalent_raw = float(current_35mm_equivalent.split(" ")[0])
-            if abs(current_35mm_equivalent_raw - focal_length_raw) > 1e-3:  # ruff: ignore[magic-value-comparison]
-                return {}
+        current_35mm_equivalent_raw = metadata.number("EXIF:FocalLengthIn35mmFormat")
+        if (
+            current_35mm_equivalent_raw is not None
+            and abs(current_35mm_equivalent_raw - focal_length_raw) > 1e-3  # ruff: ignore[magic-value-comparison]
+        ):
+            return {}
 
         updated_35mm_equivalent_raw = ceil(focal_length_raw * 1.5)
         updated_35mm_equivalent = f"{updated_35mm_equivalent_raw} mm"
 
         if self.logger:
-            self.logger.info(
+            self.logger.log(
+                DETAIL,
                 "Setting lens 35mm equivalent for %s to %s (%s)",
                 photo,
                 updated_35mm_equivalent,
-                focal_length,
+                metadata.get("EXIF:FocalLength"),
             )
 
         return {"EXIF:FocalLengthIn35mmFormat": str(updated_35mm_equivalent_raw)}
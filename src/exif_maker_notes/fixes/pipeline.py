@@ -0,0 +1,322 @@
+"""Fix pipeline reading, evaluating and writing metadata."""
+
+from __future__ import annotations
+
+from contextlib import nullcontext
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from exif_maker_notes.backup import BackupMode
+from exif_maker_notes.files import DEFAULT_PATTERNS, PhotoDiscovery
+from exif_maker_notes.fixes import context_key, create_fixes, required_tags
+from exif_maker_notes.journal import Journal, Outcome
+from exif_maker_notes.plan import PlanWriter
+from exif_maker_notes.sidecar import SIDECAR_TAGS, WriteTarget
+from exif_maker_notes.tool import (
+    DEFAULT_BATCH_SIZE,
+    DEFAULT_CHUNK_SIZE,
+    ExifToolSession,
+    MetadataWriter,
+    chunked,
+    iter_metadata,
+    use_session,
+)
+from exif_maker_notes.utils import Counted
+from exif_maker_notes.watch import DEFAULT_DEBOUNCE, create_watcher, watch_batches
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Sequence
+    from threading import Event
+
+    from exif_maker_notes.cache import MetadataCache
+    from exif_maker_notes.cli.logger import Logger
+    from exif_maker_notes.fixes.fix import Fix
+    from exif_maker_notes.parallel import Worker
+    from exif_maker_notes.tool import WriteResult
+
+
+class FixPipeline:
+    """Read metadata, evaluate fixes and write the results."""
+
+    def __init__(
+        self,
+        fixes: list[Fix],
+        logger: Logger,
+        *,
+        dry_run: bool = False,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        cache: MetadataCache | None = None,
+        journal: Journal | None = None,
+        in_place: bool = False,
+        backup: BackupMode = BackupMode.ORIGINAL,
+        target: WriteTarget = WriteTarget.PHOTO,
+        plan: PlanWriter | None = None,
+    ) -> None:
+        """Initialize the pipeline."""
+        self.fixes = fixes
+        self.logger = logger
+        self.dry_run = dry_run
+        self.batch_size = batch_size
+        self.chunk_size = chunk_size
+        self.cache = cache
+        self.journal = journal
+        self.in_place = in_place
+        self.backup = backup
+        self.target = target
+        self.plan = plan
+        self.tags = required_tags(fixes)
+        if target is WriteTarget.SIDECAR:
+            self.tags = list(dict.fromkeys([*self.tags, *SIDECAR_TAGS]))
+
+    def use_logger(self, logger: Logger) -> None:
+        """Log through a different logger."""
+        self.logger = logger
+        for fix in self.fixes:
+            fix.logger = logger
+
+    def run(self, photos: Iterable[Path], session: ExifToolSession) -> int:
+        """Apply fixes to the given photos.
+
+        Returns the number of photos that could not be written.
+        """
+        failed = 0
+        writer: MetadataWriter | PlanWriter = self.plan or MetadataWriter(
+            session,
+            self.logger,
+            batch_size=self.batch_size,
+            dry_run=self.dry_run,
+            in_place=self.in_place,
+            backup=self.backup,
+            target=self.target,
+        )
+        metadata = iter_metadata(
+            photos,
+            tags=self.tags,
+            chunk_size=self.chunk_size,
+            session=session,
+            cache=self.cache,
+        )
+        for chunk in chunked(metadata, self.chunk_size):
+            chunk_photos = [photo for photo, _ in chunk]
+            records = [photo_metadata for _, photo_metadata in chunk]
+            results = [fix.apply_batch(chunk_photos, records) for fix in self.fixes]
+            for index, (photo, photo_metadata) in enumerate(chunk):
+                fixes_to_apply: dict[str, str] = {}
+                for fix_results in results:
+                    fixes_to_apply.update(fix_results[index])
+
+                if fixes_to_apply:
+                    failed += self.report(
+                        writer.add(photo, fixes_to_apply, photo_metadata),
+                    )
+                elif self.journal is not None:
+                    self.journal.record(photo, Outcome.NOOP)
+
+        failed += self.report(writer.flush())
+        if self.journal is not None:
+            self.journal.flush()
+        return failed
+
+    def report(self, results: list[WriteResult]) -> int:
+        """Log and journal write results, returning the number of failures."""
+        if self.in_place and self.cache is not None and not self.dry_run:
+            # in-place writes keep the size, inode and modification time
+            self.cache.invalidate(
+                result.photo for result in results if result.error is None
+            )
+
+        failed = 0
+        for result in results:
+            if result.error is not None:
+                self.logger.error(
+                    "Failed to set metadata for %s: %s",
+                    result.photo,
+                    result.error,
+                )
+                failed += 1
+            if self.journal is not None:
+                self.journal.record(
+                    result.photo,
+                    Outcome.APPLIED if result.error is None else Outcome.ERROR,
+                )
+        return failed
+
+
+def apply_fixes(  # ruff: ignore[too-many-arguments]
+    photos: Iterable[Path],
+    logger: Logger,
+    *,
+    dry_run: bool = False,
+    exposure_config: Path = Path(),
+    strict: bool = False,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    jobs: int = 1,
+    cache: MetadataCache | None = None,
+    journal_path: Path | None = None,
+    resume: bool = False,
+    in_place: bool = False,
+    backup: BackupMode = BackupMode.ORIGINAL,
+    target: WriteTarget = WriteTarget.PHOTO,
+    plan_path: Path | None = None,
+    session: ExifToolSession | None = None,
+) -> int:
+    """Apply fixes to the given photos.
+
+    Photos that already have a backup are skipped. With ``in_place``, tags
+    that already exist and whose new values fit are patched in place, without
+    a backup. With a ``backup`` mode other than ``ORIGINAL``, photos are
+    backed up by a metadata-only sidecar or a reflink instead of exiftool's
+    full copy, also when patched in place. With the ``SIDECAR`` target, fixed
+    tags are written to XMP sidecars and photos are never written, so
+    ``in_place`` and ``backup`` do not apply. Outcomes are recorded in a
+    journal, unless running in dry-run mode. When resuming, photos that were
+    completed with the same fix configuration and did not change since are
+    skipped before reading their metadata. As photos fixed in sidecars have
+    no backup, they are skipped that way even when not resuming. With
+    ``strict``, all photos are validated before any of them is read or
+    written, so invalid configurations fail without a partial run. With a
+    ``plan_path``, the tag changes are recorded to a plan instead of being
+    written, in a single process and without journaling.
+
+    With more than one job, photos are split into chunks which are processed
+    by a pool of worker processes. Returns the number of photos that could
+    not be written.
+    """
+    fixes = create_fixes(logger, exposure_config=exposure_config, strict=strict)
+    if plan_path is not None and jobs > 1:
+        error = "Plans are recorded by a single process"
+        raise ValueError(error)
+
+    context = context_key(fixes)
+    if target is WriteTarget.SIDECAR:
+        context += f";{target}"
+    with (
+        Journal(journal_path, context) as journal,
+        PlanWriter(plan_path, target)
+        if plan_path is not None
+        else nullcontext() as plan,
+    ):
+        pipeline = FixPipeline(
+            fixes,
+            logger,
+            dry_run=dry_run,
+            batch_size=batch_size,
+            chunk_size=chunk_size,
+            cache=cache,
+            journal=None if dry_run or plan is not None else journal,
+            in_place=in_place,
+            backup=backup,
+            target=target,
+            plan=plan,
+        )
+
+        discovery = (
+            photos if isinstance(photos, PhotoDiscovery) else PhotoDiscovery(photos)
+        )
+        photos = discovery.pending()
+        # photos fixed in sidecars have no backup marking them as processed
+        if resume or target is WriteTarget.SIDECAR:
+            photos = journal.incomplete(photos)
+        if strict:
+            photos = list(photos)
+            for fix in fixes:
+                fix.validate(photos)
+
+        counted = Counted(photos)
+        failed = run_pipeline(pipeline, counted, jobs=jobs, session=session)
+
+    logger.info("Processed %d photo(s), %d failed", counted.count, failed)
+    if plan is not None:
+        logger.info("Planned changes of %d photo(s) in %s", plan.count, plan_path)
+    return failed
+
+
+def run_pipeline(
+    pipeline: FixPipeline,
+    photos: Iterable[Path],
+    *,
+    jobs: int = 1,
+    session: ExifToolSession | None = None,
+) -> int:
+    """Run a fix pipeline, in parallel with more than one job."""
+    logger = pipeline.logger
+
+    if jobs > 1:
+        # worker processes are only needed with more than one job
+        from exif_maker_notes.parallel import (  # ruff: ignore[import-outside-top-level]
+            JOB_CHUNK_SIZE,
+            run_parallel,
+        )
+
+        return run_parallel(
+            fix_chunk,
+            photos,
+            logger,
+            pipeline,
+            jobs=jobs,
+            chunk_size=min(pipeline.chunk_size, JOB_CHUNK_SIZE),
+        )
+
+    with use_session(session) as et:
+        failed = pipeline.run(photos, et)
+
+    logger.debug("Spawned %d exiftool process(es)", et.spawned)
+    return failed
+
+
+def fix_chunk(worker: Worker[FixPipeline], photos: list[Path]) -> int:
+    """Apply fixes to a chunk of photos in a worker process."""
+    worker.context.use_logger(worker.logger)
+    return worker.context.run(photos, worker.session)
+
+
+def watch_fixes(
+    pipeline: FixPipeline,
+    directory: Path,
+    *,
+    patterns: Sequence[str] = DEFAULT_PATTERNS,
+    recursive: bool = True,
+    poll: bool = False,
+    debounce: float = DEFAULT_DEBOUNCE,
+    scan: bool = True,
+    stop: Event | None = None,
+    session: ExifToolSession | None = None,
+) -> int:
+    """Fix photos as they land in a directory, until stopped.
+
+    The fixes of the pipeline are created once and every batch goes through
+    the same exiftool session, so a new photo only costs its metadata I/O.
+    Photos that already have a backup, e.g. after being fixed, are skipped.
+    With ``scan``, photos already in the directory are fixed first. Returns
+    the number of photos that could not be written.
+
+    Patching in place requires a backup mode other than ``ORIGINAL``, as
+    patched photos would have no backup marking them as fixed, and would be
+    fixed again whenever their patch is seen as a new photo.
+    """
+    if pipeline.in_place and pipeline.backup is BackupMode.ORIGINAL:
+        error = "Watched photos patched in place require a backup"
+        raise ValueError(error)
+
+    logger = pipeline.logger
+    discovery = PhotoDiscovery([directory], patterns, recursive=recursive)
+    failed = 0
+    with (
+        use_session(session) as et,
+        create_watcher(
+            directory,
+            discovery.matches,
+            recursive=recursive,
+            poll=poll,
+        ) as watcher,
+    ):
+        # the watcher is started first, so photos landing meanwhile are seen
+        if scan:
+            failed += pipeline.run(discovery.pending(), et)
+
+        logger.info("Watching %s for new photos", directory)
+        for batch in watch_batches(watcher, debounce=debounce, stop=stop):
+            failed += pipeline.run(PhotoDiscovery(batch).pending(), et)
+    return failed
@@ -4,22 +4,31 @@ from __future__ import annotations
 
 from typing import TYPE_CHECKING
 
-from exif_maker_notes.cli.config import strtobool
 from exif_maker_notes.fixes.fix import Fix
+from exif_maker_notes.logs import DETAIL
+from exif_maker_notes.utils import strtobool
 
 if TYPE_CHECKING:
     from pathlib import Path
 
+    from exif_maker_notes.metadata import Metadata
+
 
 class TimezoneFix(Fix):
     """Timezone fix."""
 
+    tags = (
+        "EXIF:OffsetTime",
+        "MakerNotes:TimeZone",
+        "MakerNotes:DaylightSavings",
+    )
+
     @property
     def fix_description(self) -> str:
         """Fix description."""
         return "Copy timezone information from Maker notes to the main EXIF."
 
-    def apply(self, photo: Path, metadata: dict[str, str]) -> dict[str, str]:
+    def apply(self, photo: Path, metadata: Metadata) -> dict[str, str]:
         """Apply the timezone fix."""
         exif_timezone = metadata.get("EXIF:OffsetTime")
         if exif_timezone:
@@ -41,7 +50,8 @@ class TimezoneFix(Fix):
                 maker_note_timezone = f"-{hours:02d}{maker_note_timezone[3:]}"
 
         if self.logger:
-            self.logger.info(
+            self.logger.log(
+                DETAIL,
                 "Setting timezone for %s to %s",
                 photo,
                 maker_note_timezone,
@@ -0,0 +1,134 @@
+"""Fix run journal."""
+
+from __future__ import annotations
+
+import sqlite3
+from enum import StrEnum
+from pathlib import Path
+from typing import TYPE_CHECKING, Self
+
+from platformdirs import user_state_dir
+
+from exif_maker_notes.files import Fingerprint, fingerprint
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator
+    from types import TracebackType
+
+# number of recorded outcomes kept in memory before they are committed
+COMMIT_INTERVAL = 100
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS journal (
+    path TEXT PRIMARY KEY,
+    context TEXT NOT NULL,
+    outcome TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    inode INTEGER NOT NULL
+);
+"""
+
+
+class Outcome(StrEnum):
+    """Outcome of fixing a photo."""
+
+    APPLIED = "applied"
+    NOOP = "no-op"
+    ERROR = "error"
+
+
+def default_journal_path() -> Path:
+    """Default journal location."""
+    return Path(user_state_dir("exifmn")) / "journal.sqlite"
+
+
+class Journal:
+    """Journal of fix outcomes stored in SQLite.
+
+    Each photo's last outcome is recorded together with the fingerprint of
+    the file after the fix and a ``context`` describing the fix configuration.
+    Photos that completed in the same context and did not change since can
+    be skipped when resuming a run.
+    """
+
+    def __init__(self, location: Path | None = None, context: str = "") -> None:
+        """Initialize the journal."""
+        self.location = default_journal_path() if location is None else location
+        self.context = context
+        self._pending: list[tuple[str, str, str, int, int, int]] = []
+        self._connection: sqlite3.Connection | None = None
+
+    def __enter__(self) -> Self:
+        """Enter the journal context."""
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        """Exit the journal context."""
+        self.close()
+
+    def __reduce__(self) -> tuple[type[Self], tuple[Path, str]]:
+        """Pickle the journal without its connection, e.g. for workers."""
+        return type(self), (self.location, self.context)
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        """Database connection, opened on demand."""
+        if self._connection is None:
+            self.location.parent.mkdir(parents=True, exist_ok=True)
+            # the journal may be shared by parallel workers
+            self._connection = sqlite3.connect(self.location, timeout=30)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.executescript(SCHEMA)
+        return self._connection
+
+    def record(self, photo: Path, outcome: Outcome) -> None:
+        """Record the outcome of fixing a photo."""
+        photo_fingerprint = fingerprint(photo)
+        if photo_fingerprint is None:
+            return
+
+        self._pending.append(
+            (str(photo.absolute()), self.context, outcome, *photo_fingerprint),
+        )
+        if len(self._pending) >= COMMIT_INTERVAL:
+            self.flush()
+
+    def flush(self) -> None:
+        """Commit the recorded outcomes."""
+        if not self._pending:
+            return
+
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO journal VALUES (?, ?, ?, ?, ?, ?)",
+                self._pending,
+            )
+        self._pending.clear()
+
+    def completed(self, photo: Path) -> bool:
+        """Check whether a photo was completed and did not change since."""
+        row = self.connection.execute(
+            "SELECT size, mtime_ns, inode FROM journal"
+            " WHERE path = ? AND context = ? AND outcome != ?",
+            (str(photo.absolute()), self.context, Outcome.ERROR),
+        ).fetchone()
+        return row is not None and Fingerprint(*row) == fingerprint(photo)
+
+    def incomplete(self, photos: Iterable[Path]) -> Iterator[Path]:
+        """Skip photos that were completed and did not change since."""
+        for photo in photos:
+            if not self.completed(photo):
+                yield photo
+
+    def close(self) -> None:
+        """Commit the recorded outcomes and close the database."""
+        self.flush()
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
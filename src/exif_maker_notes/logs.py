@@ -0,0 +1,31 @@
+"""Logging helpers shared by commands and workers."""
+
+from __future__ import annotations
+
+from logging import INFO, addLevelName
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Mapping
+
+# per-photo output, between debug and info so that summaries can be kept alone
+DETAIL = INFO - 5
+addLevelName(DETAIL, "DETAIL")
+
+
+class TagLines:
+    """Tags and values of a photo, formatted one per line when logged.
+
+    Formatting is deferred until a handler emits the record, so that records
+    filtered out by level or not emitted at all cost nothing per tag.
+    """
+
+    __slots__ = ("tags",)
+
+    def __init__(self, tags: Mapping[str, object]) -> None:
+        """Initialize the lines."""
+        self.tags = tags
+
+    def __str__(self) -> str:
+        """Format the tags."""
+        return "\n".join(f"  {key}: {value}" for key, value in self.tags.items())
@@ -0,0 +1,145 @@
+"""Compact metadata records."""
+
+from __future__ import annotations
+
+import sys
+from collections.abc import Iterator, Mapping
+from typing import Self, TypeVar, overload
+
+T = TypeVar("T")
+
+# maximum number of distinct tag sets whose layout is kept
+LAYOUT_CACHE_SIZE = 1024
+
+# tags whose printed value is parsed once, when a record is built
+NUMERIC_TAGS = frozenset(
+    [
+        "EXIF:ExposureCompensation",
+        "EXIF:FocalLength",
+        "EXIF:FocalLengthIn35mmFormat",
+    ],
+)
+
+
+class TagLayout:
+    """Positions of the values of a distinct set of tags."""
+
+    __slots__ = ("numeric", "positions")
+
+    def __init__(self, tags: tuple[str, ...]) -> None:
+        """Initialize the layout, interning the tag names."""
+        self.positions = {sys.intern(tag): index for index, tag in enumerate(tags)}
+        # positions of the parsed numbers of numeric tags, by tag
+        self.numeric = {
+            tag: index
+            for index, tag in enumerate(tag for tag in tags if tag in NUMERIC_TAGS)
+        }
+
+
+# layouts of the distinct sets of tags, keyed on the tag names
+_layouts: dict[tuple[str, ...], TagLayout] = {}
+
+
+def tag_layout(tags: tuple[str, ...]) -> TagLayout:
+    """Get the shared layout of a set of tags."""
+    layout = _layouts.get(tags)
+    if layout is None:
+        if len(_layouts) >= LAYOUT_CACHE_SIZE:
+            _layouts.clear()
+        layout = TagLayout(tags)
+        _layouts[tags] = layout
+    return layout
+
+
+class Metadata(Mapping[str, str]):
+    """Read-only tags of a photo, as printed by exiftool.
+
+    Tag names are stored once per distinct set of tags and shared by all
+    records with the same tags, so that a record only holds its values.
+    Values of numeric tags are also parsed once, see :meth:`number`.
+    """
+
+    __slots__ = ("_layout", "_numbers", "_values")
+
+    def __init__(self, tags: tuple[str, ...], values: tuple[str, ...]) -> None:
+        """Initialize the record, parsing the values of numeric tags."""
+        self._layout = tag_layout(tags)
+        self._values = values
+        positions = self._layout.positions
+        self._numbers = tuple(
+            parse_number(values[positions[tag]]) for tag in self._layout.numeric
+        )
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, str]) -> Self:
+        """Create a record from a mapping of tags to values."""
+        return cls(tuple(data), tuple(data.values()))
+
+    def __reduce__(self) -> tuple[type[Self], tuple[tuple[str, ...], tuple[str, ...]]]:
+        """Pickle the record so that its layout is shared again when loaded."""
+        return type(self), (tuple(self._layout.positions), self._values)
+
+    def __getitem__(self, tag: str) -> str:
+        """Get the value of a tag."""
+        return self._values[self._layout.positions[tag]]
+
+    def __iter__(self) -> Iterator[str]:
+        """Iterate over the tag names."""
+        return iter(self._layout.positions)
+
+    def __len__(self) -> int:
+        """Count the tags."""
+        return len(self._values)
+
+    def __contains__(self, tag: object) -> bool:
+        """Check whether a tag is present."""
+        return tag in self._layout.positions
+
+    def __repr__(self) -> str:
+        """Represent the record as its tags."""
+        return f"{type(self).__name__}({dict(self)!r})"
+
+    @overload
+    def get(self, tag: str, /) -> str | None: ...
+
+    @overload
+    def get(self, tag: str, default: str, /) -> str: ...
+
+    @overload
+    def get(self, tag: str, default: T, /) -> str | T: ...
+
+    def get(self, tag: str, default: object = None, /) -> object:
+        """Get the value of a tag, or ``default`` if missing."""
+        index = self._layout.positions.get(tag)
+        return default if index is None else self._values[index]
+
+    def number(self, tag: str) -> float | None:
+        """Get the value of a tag as a number, or None if missing or not numeric.
+
+        Numbers of numeric tags are parsed when the record is built, others on
+        each call.
+        """
+        index = self._layout.numeric.get(tag)
+        if index is not None:
+            return self._numbers[index]
+        return parse_number(self.get(tag))
+
+
+def parse_number(value: str | float | None) -> float | None:
+    """Parse a number printed by exiftool, e.g. ``+1/3`` or ``18.0 mm``.
+
+    Returns None for missing or non-numeric values.
+    """
+    if value is None:
+        return None
+    if isinstance(value, int | float):
+        return float(value)
+
+    numerator, _, denominator = value.split(" ", 1)[0].partition("/")
+    try:
+        number = float(numerator)
+        if denominator:
+            number /= float(denominator)
+    except (ValueError, ZeroDivisionError):
+        return None
+    return number
@@ -0,0 +1,509 @@
+"""Native EXIF and Nikon maker notes reader.
+
+Reads the handful of tags used by the fixes straight from the TIFF structure
+of JPEG and TIFF based raw files, without starting exiftool. Files are mapped
+into memory and parsed in place. Values are formatted the same way exiftool
+prints them, so that they can be used interchangeably.
+"""
+
+from __future__ import annotations
+
+import math
+import mmap
+import os
+import re
+import struct
+from fractions import Fraction
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable
+    from pathlib import Path
+
+JPEG_SOI = b"\xff\xd8"
+EXIF_HEADER = b"Exif\x00\x00"
+NIKON_HEADER = b"Nikon\x00\x02"
+
+# JPEG markers
+APP1 = 0xE1
+SOS = 0xDA
+EOI = 0xD9
+
+# ASCII TIFF field type
+ASCII = 2
+
+# TIFF tag IDs
+EXIF_IFD = 0x8769
+MAKER_NOTE = 0x927C
+
+# byte size of the TIFF field types
+TYPE_SIZES = {
+    1: 1,
+    2: 1,
+    3: 2,
+    4: 4,
+    5: 8,
+    6: 1,
+    7: 1,
+    8: 2,
+    9: 4,
+    10: 8,
+    11: 4,
+    12: 8,
+    13: 4,
+}
+
+# struct formats of the numeric TIFF field types
+TYPE_FORMATS = {
+    1: "B",
+    3: "H",
+    4: "I",
+    5: "II",
+    6: "b",
+    8: "h",
+    9: "i",
+    10: "ii",
+    11: "f",
+    12: "d",
+    13: "I",
+}
+
+LENS_TYPE_BITS = ("MF", "D", "G", "VR", "1", "FT-1", "E", "AF-P")
+
+# exiftool prints at most 10 significant digits of rational values
+RATIONAL_DIGITS = 10
+
+# largest denominator of rational values written in place
+MAX_DENOMINATOR = 1_000_000
+
+
+class NativeReadError(ValueError):
+    """Metadata cannot be decoded natively."""
+
+
+class Entry:
+    """IFD entry pointing into a mapped file."""
+
+    def __init__(
+        self,
+        data: memoryview,
+        byte_order: str,
+        field_type: int,
+        count: int,
+        offset: int,
+    ) -> None:
+        """Initialize the entry."""
+        self.data = data
+        self.byte_order = byte_order
+        self.field_type = field_type
+        self.count = count
+        self.offset = offset
+
+    @property
+    def size(self) -> int:
+        """Byte size of the value."""
+        return TYPE_SIZES[self.field_type] * self.count
+
+    def string(self) -> str:
+        """ASCII value, up to the first null character."""
+        value = bytes(self.data[self.offset : self.offset + self.size])
+        return value.split(b"\x00", 1)[0].decode("utf-8", errors="replace")
+
+    def numbers(self) -> list[float]:
+        """Numeric values, with rationals divided out."""
+        fmt = TYPE_FORMATS.get(self.field_type)
+        if fmt is None:
+            error = f"Unsupported field type: {self.field_type}"
+            raise NativeReadError(error)
+
+        values = struct.unpack_from(
+            f"{self.byte_order}{fmt * self.count}",
+            self.data,
+            self.offset,
+        )
+        if len(fmt) == 1:
+            return list(values)
+
+        numbers: list[float] = []
+        for numerator, denominator in zip(values[::2], values[1::2], strict=True):
+            if denominator:
+                numbers.append(numerator / denominator)
+            else:
+                numbers.append(float("inf") if numerator else float("nan"))
+        return numbers
+
+    def number(self) -> float:
+        """First numeric value."""
+        return self.numbers()[0]
+
+
+class Directory:
+    """TIFF image file directory."""
+
+    def __init__(self, data: memoryview, base: int, byte_order: str) -> None:
+        """Initialize the directory, with offsets relative to ``base``."""
+        self.data = data
+        self.base = base
+        self.byte_order = byte_order
+
+    def read(self, offset: int) -> dict[int, Entry]:
+        """Read the entries of the IFD at the given offset."""
+        start = self.base + offset
+        if start + 2 > len(self.data):
+            error = f"IFD offset out of range: {offset}"
+            raise NativeReadError(error)
+
+        (count,) = struct.unpack_from(f"{self.byte_order}H", self.data, start)
+        if start + 2 + 12 * count > len(self.data):
+            error = f"IFD at {offset} is truncated"
+            raise NativeReadError(error)
+
+        entries: dict[int, Entry] = {}
+        for index in range(count):
+            position = start + 2 + 12 * index
+            tag, field_type, value_count = struct.unpack_from(
+                f"{self.byte_order}HHI",
+                self.data,
+                position,
+            )
+            if field_type not in TYPE_SIZES:
+                continue
+            value_offset = position + 8
+            if TYPE_SIZES[field_type] * value_count > 4:  # ruff: ignore[magic-value-comparison]
+                (pointer,) = struct.unpack_from(
+                    f"{self.byte_order}I",
+                    self.data,
+                    value_offset,
+                )
+                value_offset = self.base + pointer
+            entry = Entry(
+                self.data,
+                self.byte_order,
+                field_type,
+                value_count,
+                value_offset,
+            )
+            if value_offset + entry.size > len(self.data):
+                continue
+            entries.setdefault(tag, entry)
+        return entries
+
+
+def tiff_directory(data: memoryview, base: int) -> tuple[Directory, int]:
+    """Parse a TIFF header, returning the directory and first IFD offset."""
+    header = bytes(data[base : base + 4])
+    if header == b"II*\x00":
+        byte_order = "<"
+    elif header == b"MM\x00*":
+        byte_order = ">"
+    else:
+        error = "Invalid TIFF header"
+        raise NativeReadError(error)
+
+    (offset,) = struct.unpack_from(f"{byte_order}I", data, base + 4)
+    return Directory(data, base, byte_order), offset
+
+
+def find_tiff(data: memoryview) -> int:
+    """Find the start of the TIFF structure of a JPEG or TIFF file."""
+    if bytes(data[:2]) != JPEG_SOI:
+        return 0
+
+    position = 2
+    while position + 4 <= len(data):
+        if data[position] != 0xFF:  # ruff: ignore[magic-value-comparison]
+            break
+        marker = data[position + 1]
+        if marker == 0xFF:  # ruff: ignore[magic-value-comparison]
+            # fill byte
+            position += 1
+            continue
+        if marker in {SOS, EOI}:
+            break
+        (length,) = struct.unpack_from(">H", data, position + 2)
+        segment = position + 4
+        if marker == APP1 and bytes(data[segment : segment + 6]) == EXIF_HEADER:
+            return segment + 6
+        position += 2 + length
+
+    error = "No EXIF segment found"
+    raise NativeReadError(error)
+
+
+def print_fraction(value: float) -> str:
+    """Format a value as a fraction, as exiftool prints exposure values."""
+    value *= 1.00001
+    if not value:
+        return "0"
+    for denominator in (1, 2, 3):
+        scaled = int(value * denominator)
+        if scaled / (value * denominator) > 0.999:  # ruff: ignore[magic-value-comparison]
+            return f"{scaled:+d}" if denominator == 1 else f"{scaled:+d}/{denominator}"
+    return f"{value:+.3g}"
+
+
+def print_number(value: float) -> str:
+    """Format a rational value the way exiftool does."""
+    if math.isnan(value):
+        return "undef"
+    if math.isinf(value):
+        return "inf"
+    return f"{value:.{RATIONAL_DIGITS}g}"
+
+
+def print_lens_info(values: list[float]) -> str:
+    """Format a lens specification, e.g. ``18-105mm f/3.5-5.6``."""
+    short, long, wide, tele = (
+        print_number(value) if math.isfinite(value) else "?" for value in values
+    )
+    text = short
+    if long not in {"0", short}:
+        text += f"-{long}"
+    text += f"mm f/{wide}"
+    if tele not in {"0", wide}:
+        text += f"-{tele}"
+    return text
+
+
+def print_lens_type(value: int) -> str:
+    """Format the Nikon lens type bit mask, e.g. ``G VR``."""
+    if not value:
+        return "AF"
+
+    text = " ".join(
+        name for bit, name in enumerate(LENS_TYPE_BITS) if value & (1 << bit)
+    )
+    text = re.sub(r"\bD G\b", "G", text, count=1)
+    text, found = re.subn(r" E\b", "", text, count=1)
+    if found:
+        text = re.sub(r"^(G )?", "E ", text, count=1)
+    text, found = re.subn(r" 1", "", text, count=1)
+    if found:
+        text = f"1 {text}"
+    for suffix in ("FT-1", "AF-P"):
+        text, found = re.subn(f"{suffix} ", "", text, count=1)
+        if found:
+            text += f" {suffix}"
+    return text
+
+
+def print_time_zone(minutes: int) -> str:
+    """Format a time zone offset in minutes, e.g. ``+01:00``."""
+    sign = "-" if minutes < 0 else "+"
+    hours, minutes = divmod(abs(minutes), 60)
+    return f"{sign}{hours:02d}:{minutes:02d}"
+
+
+def read_exif(entries: dict[int, Entry], metadata: dict[str, str]) -> None:
+    """Decode the supported tags of IFD0 or the EXIF IFD."""
+    for tag, (name, convert) in EXIF_TAGS.items():
+        entry = entries.get(tag)
+        if entry is not None:
+            metadata[name] = convert(entry)
+
+
+def read_maker_notes(
+    data: memoryview,
+    entry: Entry,
+    metadata: dict[str, str],
+) -> None:
+    """Decode the supported tags of Nikon type 3 maker notes."""
+    if bytes(data[entry.offset : entry.offset + 7]) != NIKON_HEADER:
+        error = "Unsupported maker notes"
+        raise NativeReadError(error)
+
+    directory, offset = tiff_directory(data, entry.offset + 10)
+    entries = directory.read(offset)
+
+    world_time = entries.get(0x0024)
+    if world_time is not None and world_time.size >= 3:  # ruff: ignore[magic-value-comparison]
+        (time_zone, daylight_savings) = struct.unpack_from(
+            f"{directory.byte_order}hB",
+            data,
+            world_time.offset,
+        )
+        metadata["MakerNotes:TimeZone"] = print_time_zone(time_zone)
+        metadata["MakerNotes:DaylightSavings"] = "Yes" if daylight_savings else "No"
+
+    lens_type = entries.get(0x0083)
+    if lens_type is not None:
+        metadata["MakerNotes:LensType"] = print_lens_type(int(lens_type.number()))
+
+    lens = entries.get(0x0084)
+    if lens is not None and lens.count == 4:  # ruff: ignore[magic-value-comparison]
+        metadata["MakerNotes:Lens"] = print_lens_info(lens.numbers())
+
+
+EXIF_TAGS: dict[int, tuple[str, Callable[[Entry], str]]] = {
+    0x010F: ("EXIF:Make", Entry.string),
+    0x0110: ("EXIF:Model", Entry.string),
+    0x9010: ("EXIF:OffsetTime", Entry.string),
+    0x9204: (
+        "EXIF:ExposureCompensation",
+        lambda entry: print_fraction(entry.number()),
+    ),
+    0x920A: ("EXIF:FocalLength", lambda entry: f"{entry.number():.1f} mm"),
+    0xA405: (
+        "EXIF:FocalLengthIn35mmFormat",
+        lambda entry: f"{int(entry.number())} mm",
+    ),
+    0xA433: ("EXIF:LensMake", Entry.string),
+    0xA434: ("EXIF:LensModel", Entry.string),
+}
+
+MAKER_NOTES_TAGS = (
+    "MakerNotes:TimeZone",
+    "MakerNotes:DaylightSavings",
+    "MakerNotes:LensType",
+    "MakerNotes:Lens",
+)
+
+# tags that can be written in place, by tag ID
+WRITABLE_TAGS = {name: tag for tag, (name, _) in EXIF_TAGS.items()}
+
+# tags that can be decoded natively
+NATIVE_TAGS = frozenset(
+    [name for name, _ in EXIF_TAGS.values()] + list(MAKER_NOTES_TAGS),
+)
+
+
+def exif_directories(data: memoryview) -> list[dict[int, Entry]]:
+    """Read the entries of IFD0 and, if present, the EXIF IFD."""
+    directory, offset = tiff_directory(data, find_tiff(data))
+    entries = directory.read(offset)
+    exif_pointer = entries.get(EXIF_IFD)
+    if exif_pointer is None:
+        return [entries]
+    return [entries, directory.read(int(exif_pointer.number()))]
+
+
+def decode(data: memoryview, *, maker_notes: bool = True) -> dict[str, str]:
+    """Decode the supported tags of a mapped JPEG or TIFF file."""
+    metadata: dict[str, str] = {}
+    directories = exif_directories(data)
+    for entries in directories:
+        read_exif(entries, metadata)
+
+    maker_note = directories[-1].get(MAKER_NOTE) if len(directories) > 1 else None
+    if maker_notes and maker_note is not None:
+        read_maker_notes(data, maker_note, metadata)
+    return metadata
+
+
+def read_metadata(photo: Path, tags: Iterable[str]) -> dict[str, str]:
+    """Read the given natively supported tags of a photo.
+
+    Raises ``NativeReadError`` if the file cannot be decoded, in which case
+    exiftool should be used instead.
+    """
+    tags = set(tags)
+    maker_notes = not tags.isdisjoint(MAKER_NOTES_TAGS)
+    error: str | None = None
+    try:
+        with (
+            photo.open("rb") as f,
+            mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m,
+            memoryview(m) as data,
+        ):
+            try:
+                metadata = decode(data, maker_notes=maker_notes)
+            except (NativeReadError, struct.error, IndexError) as e:
+                # the traceback refers to the mapping, which must not outlive it
+                error = str(e)
+    except (OSError, ValueError) as e:
+        raise NativeReadError(str(e)) from e
+
+    if error is not None:
+        raise NativeReadError(error)
+    return {key: value for key, value in metadata.items() if key in tags}
+
+
+def encode_number(entry: Entry, value: str) -> tuple[float, ...] | None:
+    """Parse a numeric value into the struct fields of an entry."""
+    try:
+        number = Fraction(value)
+    except (ValueError, ZeroDivisionError):
+        return None
+
+    fmt = TYPE_FORMATS[entry.field_type]
+    if len(fmt) == 2:  # ruff: ignore[magic-value-comparison]
+        number = number.limit_denominator(MAX_DENOMINATOR)
+        return (number.numerator, number.denominator)
+    if fmt in {"f", "d"}:
+        return (float(number),)
+    if number.denominator == 1:
+        return (int(number),)
+    return None
+
+
+def encode(entry: Entry, value: str) -> bytes | None:
+    """Encode a value into the slot of an entry, or None if it does not fit."""
+    if entry.field_type == ASCII:
+        encoded = value.encode()
+        if len(encoded) >= entry.count:
+            return None
+        return encoded.ljust(entry.count, b"\x00")
+
+    if entry.field_type not in TYPE_FORMATS or entry.count != 1:
+        return None
+    parts = encode_number(entry, value)
+    if parts is None:
+        return None
+    try:
+        return struct.pack(
+            f"{entry.byte_order}{TYPE_FORMATS[entry.field_type]}",
+            *parts,
+        )
+    except struct.error:
+        return None
+
+
+def plan_patches(data: memoryview, tags: dict[str, str]) -> list[tuple[int, bytes]]:
+    """Locate and encode in-place patches, none at all if any tag does not fit."""
+    try:
+        directories = exif_directories(data)
+    except (NativeReadError, struct.error, IndexError):
+        return []
+
+    patches: list[tuple[int, bytes]] = []
+    for key, value in tags.items():
+        tag = WRITABLE_TAGS.get(key)
+        entry = next(
+            (entries[tag] for entries in directories if tag in entries),
+            None,
+        )
+        encoded = None if entry is None else encode(entry, value)
+        if entry is None or encoded is None:
+            return []
+        patches.append((entry.offset, encoded))
+    return patches
+
+
+def patch_metadata(photo: Path, tags: dict[str, str]) -> bool:
+    """Write tags in place, if they all exist and their new values fit.
+
+    The file is left untouched and False is returned if any tag would need a
+    structural change, in which case exiftool should be used instead. The
+    modification time of the file is preserved.
+    """
+    if not tags or not set(tags) <= WRITABLE_TAGS.keys():
+        return False
+
+    try:
+        stat = photo.stat()
+        with (
+            photo.open("r+b") as f,
+            mmap.mmap(f.fileno(), 0) as m,
+            memoryview(m) as data,
+        ):
+            patches = plan_patches(data, tags)
+            for offset, encoded in patches:
+                data[offset : offset + len(encoded)] = encoded
+            m.flush()
+    except (OSError, ValueError):
+        return False
+
+    if not patches:
+        return False
+    os.utime(photo, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    return True
@@ -0,0 +1,198 @@
+"""Parallel processing across worker processes."""
+
+from __future__ import annotations
+
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from logging import getLogger
+from logging.handlers import QueueHandler
+from multiprocessing.util import Finalize
+from queue import SimpleQueue
+from typing import TYPE_CHECKING, Any, Generic, Self, TypeVar
+
+from exif_maker_notes import profiling
+from exif_maker_notes.tool import (
+    ExifToolSession,
+    chunked,
+    iter_metadata,
+)
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable, Iterator, Sequence
+    from concurrent.futures import Future
+    from logging import LogRecord
+    from pathlib import Path
+    from types import TracebackType
+
+    from exif_maker_notes.cache import MetadataCache
+    from exif_maker_notes.cli.logger import Logger
+    from exif_maker_notes.metadata import Metadata
+
+C = TypeVar("C")
+R = TypeVar("R")
+# items processed by tasks, usually photos
+T = TypeVar("T")
+
+# number of photos sent to a worker at once
+JOB_CHUNK_SIZE = 50
+
+# number of chunks queued per worker, bounds the memory used for results
+PENDING_PER_JOB = 2
+
+# the worker of the current process, set by the pool initializer
+_workers: dict[str, Worker[Any]] = {}
+
+
+class Worker(Generic[C]):
+    """Worker process state.
+
+    Each worker owns a persistent exiftool session and a logger whose records
+    are collected and replayed in order by the parent process.
+    """
+
+    def __init__(self, level: int, context: C) -> None:
+        """Initialize the worker."""
+        self.context = context
+        self.session = ExifToolSession()
+        self.records: SimpleQueue[LogRecord] = SimpleQueue()
+        self.logger = getLogger(f"{__name__}.worker")
+        self.logger.propagate = False
+        self.logger.handlers = [QueueHandler(self.records)]
+        self.logger.setLevel(level)
+
+    def collect_records(self) -> list[LogRecord]:
+        """Collect the log records emitted so far."""
+        records: list[LogRecord] = []
+        while not self.records.empty():
+            records.append(self.records.get())
+        return records
+
+
+def _initialize(level: int, context: object, profile: bool) -> None:  # ruff: ignore[boolean-type-hint-positional-argument]
+    """Initialize a worker process."""
+    if profile:
+        profiling.enable()
+    worker = Worker(level, context)
+    # pool workers do not run atexit handlers, but they do run finalizers
+    Finalize(worker, worker.session.close, exitpriority=10)
+    _workers["current"] = worker
+
+
+def _run(
+    task: Callable[[Worker[C], list[T]], R],
+    photos: list[T],
+) -> tuple[list[LogRecord], R, dict[str, Any] | None]:
+    """Run a task in a worker process."""
+    worker = _workers["current"]
+    result = task(worker, photos)
+    profiler = profiling.active()
+    if profiler is None:
+        return worker.collect_records(), result, None
+
+    # report each chunk once by starting over
+    profiling.enable()
+    return worker.collect_records(), result, profiler.report()
+
+
+class WorkerPool(Generic[C]):
+    """Pool of worker processes, each with its own exiftool session."""
+
+    def __init__(self, jobs: int, logger: Logger, context: C) -> None:
+        """Initialize the pool."""
+        self.jobs = jobs
+        self.logger = logger
+        self._executor = ProcessPoolExecutor(
+            max_workers=jobs,
+            initializer=_initialize,
+            initargs=(
+                logger.getEffectiveLevel(),
+                context,
+                profiling.active() is not None,
+            ),
+        )
+
+    def __enter__(self) -> Self:
+        """Enter the pool context."""
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        """Exit the pool context."""
+        self._executor.shutdown(cancel_futures=exc_type is not None)
+
+    def map(
+        self,
+        task: Callable[[Worker[C], list[T]], R],
+        chunks: Iterable[list[T]],
+    ) -> Iterator[R]:
+        """Run a task on chunks of photos, yielding results in order.
+
+        Log records emitted by the workers are replayed in the same order.
+        """
+        pending: deque[Future[tuple[list[LogRecord], R, dict[str, Any] | None]]] = (
+            deque()
+        )
+        for chunk in chunks:
+            pending.append(self._executor.submit(_run, task, chunk))
+            if len(pending) >= self.jobs * PENDING_PER_JOB:
+                yield self._collect(pending.popleft())
+        while pending:
+            yield self._collect(pending.popleft())
+
+    def _collect(
+        self,
+        future: Future[tuple[list[LogRecord], R, dict[str, Any] | None]],
+    ) -> R:
+        """Wait for a task, replay its log records and merge its profile."""
+        records, result, report = future.result()
+        for record in records:
+            self.logger.handle(record)
+        profiler = profiling.active()
+        if profiler is not None and report is not None:
+            profiler.merge(report)
+        return result
+
+
+def metadata_chunk(
+    worker: Worker[tuple[MetadataCache | None, Sequence[str] | None]],
+    photos: list[Path],
+) -> list[tuple[Path, Metadata]]:
+    """Read metadata of a chunk of photos."""
+    cache, tags = worker.context
+    return list(iter_metadata(photos, tags=tags, session=worker.session, cache=cache))
+
+
+def iter_parallel_metadata(
+    photos: Iterable[Path],
+    logger: Logger,
+    cache: MetadataCache | None = None,
+    *,
+    tags: Sequence[str] | None = None,
+    jobs: int,
+    chunk_size: int = JOB_CHUNK_SIZE,
+) -> Iterator[tuple[Path, Metadata]]:
+    """Read metadata in a pool of workers, yielding it in order."""
+    with WorkerPool(jobs, logger, (cache, tags)) as pool:
+        for chunk in pool.map(metadata_chunk, chunked(photos, chunk_size)):
+            yield from chunk
+
+
+def run_parallel(
+    task: Callable[[Worker[C], list[T]], int],
+    photos: Iterable[T],
+    logger: Logger,
+    context: C,
+    *,
+    jobs: int,
+    chunk_size: int = JOB_CHUNK_SIZE,
+) -> int:
+    """Run a task on photos in a pool of workers.
+
+    Returns the sum of the task results, e.g. the number of failed photos.
+    """
+    with WorkerPool(jobs, logger, context) as pool:
+        return sum(pool.map(task, chunked(photos, chunk_size)))
@@ -0,0 +1,290 @@
+"""Fix plans, recording tag changes to write them later.
+
+A plan is a JSON lines file: a header with the plan version and write
+target, followed by one line per photo with its fingerprint, the tags to
+write and their original values. Plans are written and read as streams, so
+their size does not bound memory use.
+"""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import TYPE_CHECKING, NamedTuple, Self
+
+from exif_maker_notes.backup import BackupMode
+from exif_maker_notes.files import Fingerprint, fingerprint
+from exif_maker_notes.sidecar import SIDECAR_TAGS, WriteTarget
+from exif_maker_notes.tool import (
+    DEFAULT_BATCH_SIZE,
+    MetadataWriter,
+    WriteResult,
+    use_session,
+)
+from exif_maker_notes.utils import Counted
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator, Mapping
+    from types import TracebackType
+    from typing import TextIO
+
+    from exif_maker_notes.cache import MetadataCache
+    from exif_maker_notes.cli.logger import Logger
+    from exif_maker_notes.parallel import Worker
+    from exif_maker_notes.tool import ExifToolSession
+
+PLAN_VERSION = 1
+
+
+class PlanError(ValueError):
+    """Invalid or unsupported plan file."""
+
+
+class PlanEntry(NamedTuple):
+    """Planned write of a photo."""
+
+    photo: Path
+    fingerprint: Fingerprint
+    tags: dict[str, str]
+    original: dict[str, str]
+
+    def changed(self) -> bool:
+        """Check whether the photo changed since it was planned.
+
+        Inodes are ignored, as they differ between machines mounting the same
+        storage.
+        """
+        current = fingerprint(self.photo)
+        return current is None or (current.size, current.mtime_ns) != (
+            self.fingerprint.size,
+            self.fingerprint.mtime_ns,
+        )
+
+
+class PlanWriter:
+    """Record tag changes to a plan instead of writing them.
+
+    Used in place of a metadata writer by the fix pipeline. The plan is
+    written to a temporary file, which replaces ``path`` once complete.
+    """
+
+    def __init__(self, path: Path, target: WriteTarget = WriteTarget.PHOTO) -> None:
+        """Initialize the plan writer."""
+        self.path = path
+        self.target = target
+        self.count: int = 0
+        self._temporary = path.with_name(f".{path.name}.tmp")
+        self._stream: TextIO | None = None
+
+    def __enter__(self) -> Self:
+        """Start the plan."""
+        self._stream = self._temporary.open("w", encoding="utf-8")
+        self._write({"version": PLAN_VERSION, "target": self.target})
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        """Complete the plan, or discard it if an error occurred."""
+        if self._stream is not None:
+            self._stream.close()
+            self._stream = None
+        if exc_type is None:
+            self._temporary.replace(self.path)
+        else:
+            self._temporary.unlink(missing_ok=True)
+
+    def add(
+        self,
+        photo: Path,
+        tags: dict[str, str],
+        original: Mapping[str, str] | None = None,
+    ) -> list[WriteResult]:
+        """Record the tags to write to a photo."""
+        current = fingerprint(photo)
+        if current is None:
+            error = f"Photo not found: {photo}"
+            return [WriteResult(photo, tags, FileNotFoundError(error))]
+
+        original = original or {}
+        self._write(
+            {
+                # plans may be applied from another directory
+                "photo": str(photo.absolute()),
+                "fingerprint": current,
+                "tags": tags,
+                "original": {
+                    tag: original[tag]
+                    for tag in (*tags, *SIDECAR_TAGS)
+                    if tag in original
+                },
+            },
+        )
+        self.count += 1
+        return []
+
+    def flush(self) -> list[WriteResult]:
+        """Flush the recorded changes."""
+        if self._stream is not None:
+            self._stream.flush()
+        return []
+
+    def _write(self, record: Mapping[str, object]) -> None:
+        """Write a record as a compact JSON line."""
+        if self._stream is None:
+            error = "Plan writer is not started"
+            raise RuntimeError(error)
+        self._stream.write(json.dumps(record, separators=(",", ":")) + "\n")
+
+
+class PlanReader:
+    """Stream the entries of a plan."""
+
+    def __init__(self, path: Path) -> None:
+        """Initialize the reader, checking the plan header."""
+        self.path = path
+        with path.open(encoding="utf-8") as stream:
+            try:
+                header = json.loads(stream.readline())
+                version = header["version"]
+                self.target = WriteTarget(header["target"])
+            except (KeyError, TypeError, ValueError) as e:
+                error = f"Invalid plan: {path}"
+                raise PlanError(error) from e
+        if version != PLAN_VERSION:
+            error = f"Unsupported plan version {version}: {path}"
+            raise PlanError(error)
+
+    def __iter__(self) -> Iterator[PlanEntry]:
+        """Iterate over the planned writes."""
+        with self.path.open(encoding="utf-8") as stream:
+            next(stream)
+            for line in stream:
+                record = json.loads(line)
+                yield PlanEntry(
+                    Path(record["photo"]),
+                    Fingerprint(*record["fingerprint"]),
+                    record["tags"],
+                    record["original"],
+                )
+
+
+class PlanExecutor:
+    """Write the changes of a plan to photos that did not change since."""
+
+    def __init__(
+        self,
+        logger: Logger,
+        *,
+        target: WriteTarget = WriteTarget.PHOTO,
+        dry_run: bool = False,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        in_place: bool = False,
+        backup: BackupMode = BackupMode.ORIGINAL,
+        cache: MetadataCache | None = None,
+    ) -> None:
+        """Initialize the executor."""
+        self.logger = logger
+        self.target = target
+        self.dry_run = dry_run
+        self.batch_size = batch_size
+        self.in_place = in_place
+        self.backup = backup
+        self.cache = cache
+
+    def use_logger(self, logger: Logger) -> None:
+        """Log through a different logger."""
+        self.logger = logger
+
+    def run(self, entries: Iterable[PlanEntry], session: ExifToolSession) -> int:
+        """Write planned changes, returning the number of failed photos."""
+        writer = MetadataWriter(
+            session,
+            self.logger,
+            batch_size=self.batch_size,
+            dry_run=self.dry_run,
+            in_place=self.in_place,
+            backup=self.backup,
+            target=self.target,
+        )
+        failed = 0
+        for entry in entries:
+            if entry.changed():
+                self.logger.warning("Skipping %s, changed since planned", entry.photo)
+                continue
+            failed += self.report(writer.add(entry.photo, entry.tags, entry.original))
+        return failed + self.report(writer.flush())
+
+    def report(self, results: list[WriteResult]) -> int:
+        """Log failed writes, returning their number."""
+        if self.in_place and self.cache is not None and not self.dry_run:
+            # in-place writes keep the size, inode and modification time
+            self.cache.invalidate(
+                result.photo for result in results if result.error is None
+            )
+
+        failed = 0
+        for result in results:
+            if result.error is not None:
+                self.logger.error(
+                    "Failed to set metadata for %s: %s",
+                    result.photo,
+                    result.error,
+                )
+                failed += 1
+        return failed
+
+
+def apply_chunk(worker: Worker[PlanExecutor], entries: list[PlanEntry]) -> int:
+    """Write a chunk of planned changes in a worker process."""
+    worker.context.use_logger(worker.logger)
+    return worker.context.run(entries, worker.session)
+
+
+def apply_plan(
+    plan: PlanReader,
+    logger: Logger,
+    *,
+    dry_run: bool = False,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    jobs: int = 1,
+    in_place: bool = False,
+    backup: BackupMode = BackupMode.ORIGINAL,
+    cache: MetadataCache | None = None,
+    session: ExifToolSession | None = None,
+) -> int:
+    """Write the changes of a plan without reading metadata again.
+
+    Photos whose fingerprint changed since they were planned are skipped.
+    Changes are written to the target of the plan, grouped into batches of
+    photos receiving the same tags. Photos patched ``in_place`` are removed
+    from the metadata ``cache``. With more than one job, chunks of the
+    plan are written by a pool of worker processes. Returns the number of
+    photos that could not be written.
+    """
+    executor = PlanExecutor(
+        logger,
+        target=plan.target,
+        dry_run=dry_run,
+        batch_size=batch_size,
+        in_place=in_place,
+        backup=backup,
+        cache=cache,
+    )
+    entries = Counted(plan)
+    if jobs > 1:
+        # worker processes are only needed with more than one job
+        from exif_maker_notes.parallel import (  # ruff: ignore[import-outside-top-level]
+            run_parallel,
+        )
+
+        failed = run_parallel(apply_chunk, entries, logger, executor, jobs=jobs)
+    else:
+        with use_session(session) as et:
+            failed = executor.run(entries, et)
+
+    logger.info("Applied %d planned photo(s), %d failed", entries.count, failed)
+    return failed
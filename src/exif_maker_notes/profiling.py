@@ -0,0 +1,115 @@
+"""Lightweight run profiling.
+
+Profiling is disabled by default, in which case the helpers of this module
+do nothing. Once enabled, stages are timed and counters are accumulated in
+the current process. Stages may nest, e.g. starting exiftool happens during
+the first read. Stages timed in parallel workers are merged, so their sum
+can exceed the wall time of the run.
+"""
+
+from __future__ import annotations
+
+import time
+from contextlib import contextmanager, nullcontext
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from collections.abc import Generator, Iterable
+    from contextlib import AbstractContextManager
+    from pathlib import Path
+
+_profiler: Profiler | None = None
+
+
+class StageStatistics:
+    """Accumulated timing of a stage."""
+
+    def __init__(self) -> None:
+        """Initialize the statistics."""
+        self.calls: int = 0
+        self.seconds: float = 0.0
+
+
+class Profiler:
+    """Stage timings and counters of a run."""
+
+    def __init__(self) -> None:
+        """Initialize the profiler."""
+        self.started = time.perf_counter()
+        self.stages: dict[str, StageStatistics] = {}
+        self.counters: dict[str, int] = {}
+
+    @contextmanager
+    def stage(self, name: str) -> Generator[None]:
+        """Time a stage."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            statistics = self.stages.setdefault(name, StageStatistics())
+            statistics.calls += 1
+            statistics.seconds += time.perf_counter() - start
+
+    def count(self, name: str, value: int = 1) -> None:
+        """Increment a counter."""
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def merge(self, report: dict[str, Any]) -> None:
+        """Add the stages and counters of another report, e.g. of a worker."""
+        for name, stage in report["stages"].items():
+            statistics = self.stages.setdefault(name, StageStatistics())
+            statistics.calls += stage["calls"]
+            statistics.seconds += stage["seconds"]
+        for name, value in report["counters"].items():
+            self.count(name, value)
+
+    def report(self) -> dict[str, Any]:
+        """Summarize the run in a JSON serializable form."""
+        return {
+            "seconds": time.perf_counter() - self.started,
+            "stages": {
+                name: {"calls": statistics.calls, "seconds": statistics.seconds}
+                for name, statistics in sorted(self.stages.items())
+            },
+            "counters": dict(sorted(self.counters.items())),
+        }
+
+
+def enable() -> Profiler:
+    """Enable profiling in the current process."""
+    global _profiler  # ruff: ignore[global-statement]
+    _profiler = Profiler()
+    return _profiler
+
+
+def disable() -> None:
+    """Disable profiling in the current process."""
+    global _profiler  # ruff: ignore[global-statement]
+    _profiler = None
+
+
+def active() -> Profiler | None:
+    """Profiler of the current process, if profiling is enabled."""
+    return _profiler
+
+
+def stage(name: str) -> AbstractContextManager[None]:
+    """Time a stage if profiling is enabled."""
+    if _profiler is None:
+        return nullcontext()
+    return _profiler.stage(name)
+
+
+def count(name: str, value: int = 1) -> None:
+    """Increment a counter if profiling is enabled."""
+    if _profiler is not None:
+        _profiler.count(name, value)
+
+
+def count_bytes(name: str, photos: Iterable[Path]) -> None:
+    """Add the sizes of photos to a counter if profiling is enabled."""
+    if _profiler is not None:
+        _profiler.count(
+            name,
+            sum(photo.stat().st_size for photo in photos if photo.exists()),
+        )
@@ -0,0 +1,243 @@
+"""Local service keeping exiftool processes and fixes warm between requests.
+
+The service listens on a Unix domain socket for JSON line requests, see
+:mod:`exif_maker_notes.client`. Every request borrows one of a few
+workers, each owning a persistent exiftool session and its own copies of
+the fixes, so a request only costs its metadata I/O.
+"""
+
+from __future__ import annotations
+
+import copy
+import json
+import os
+import socket
+import stat
+from contextlib import contextmanager
+from itertools import starmap
+from pathlib import Path
+from queue import SimpleQueue
+from socketserver import StreamRequestHandler, ThreadingUnixStreamServer
+from typing import TYPE_CHECKING, Any
+
+from exiftool.exceptions import ExifToolException
+
+from exif_maker_notes.backup import BackupMode
+from exif_maker_notes.client import encode_message
+from exif_maker_notes.export import json_record
+from exif_maker_notes.files import PhotoDiscovery
+from exif_maker_notes.fixes.pipeline import FixPipeline
+from exif_maker_notes.tool import (
+    DEFAULT_BATCH_SIZE,
+    ExifToolSession,
+    iter_metadata,
+    restore_photos,
+)
+from exif_maker_notes.utils import Counted
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Generator
+
+    from exif_maker_notes.cli.logger import Logger
+    from exif_maker_notes.fixes.fix import Fix
+
+DEFAULT_WORKERS = 2
+
+
+def absolute_paths(photos: list[str]) -> list[Path]:
+    """Convert the photos of a request to paths, which must be absolute.
+
+    The working directory of the service is unrelated to the one of its
+    clients, so relative paths would point at other files.
+    """
+    paths = [Path(photo) for photo in photos]
+    for path in paths:
+        if not path.is_absolute():
+            error = f"Photo paths must be absolute: {path}"
+            raise ValueError(error)
+    return paths
+
+
+class ServiceWorker:
+    """Exiftool session and fixes used by one request at a time."""
+
+    def __init__(self, fixes: list[Fix]) -> None:
+        """Initialize the worker."""
+        # copies share their configuration, e.g. the exposure values, but
+        # memoise their own results
+        self.fixes = [copy.copy(fix) for fix in fixes]
+        self.session = ExifToolSession()
+
+
+class ExifService:
+    """Handle list, fix and restore requests."""
+
+    def __init__(
+        self,
+        fixes: list[Fix],
+        logger: Logger,
+        *,
+        workers: int = DEFAULT_WORKERS,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        in_place: bool = False,
+        backup: BackupMode = BackupMode.ORIGINAL,
+    ) -> None:
+        """Initialize the service and its workers."""
+        self.logger = logger
+        self.batch_size = batch_size
+        self.in_place = in_place
+        self.backup = backup
+        self._workers = [ServiceWorker(fixes) for _ in range(workers)]
+        self._idle: SimpleQueue[ServiceWorker] = SimpleQueue()
+        for worker in self._workers:
+            self._idle.put(worker)
+
+    def close(self) -> None:
+        """Terminate the exiftool processes of all workers."""
+        for worker in self._workers:
+            worker.session.close()
+
+    @contextmanager
+    def worker(self) -> Generator[ServiceWorker]:
+        """Borrow an idle worker, waiting for one if needed."""
+        worker = self._idle.get()
+        try:
+            yield worker
+        finally:
+            self._idle.put(worker)
+
+    def dispatch(self, request: dict[str, Any]) -> dict[str, Any]:
+        """Run the command of a request."""
+        command = request.pop("command")
+        handlers: dict[str, Callable[..., dict[str, Any]]] = {
+            "list": self.list_metadata,
+            "fix": self.fix,
+            "restore": self.restore,
+        }
+        if command not in handlers:
+            error = f"Unknown command: {command}"
+            raise ValueError(error)
+        return handlers[command](**request)
+
+    def respond(self, line: bytes) -> dict[str, Any]:
+        """Handle a request line, reporting errors in the response."""
+        try:
+            response = self.dispatch(json.loads(line))
+        except (
+            AttributeError,
+            ExifToolException,
+            KeyError,
+            OSError,
+            TypeError,
+            ValueError,
+        ) as e:
+            self.logger.warning("Request failed: %s", e)
+            return {"ok": False, "error": str(e)}
+        return {"ok": True, **response}
+
+    def list_metadata(
+        self,
+        photos: list[str],
+        tags: list[str] | None = None,
+    ) -> dict[str, Any]:
+        """List metadata of photos."""
+        discovery = PhotoDiscovery(absolute_paths(photos))
+        with self.worker() as worker:
+            records = list(
+                starmap(
+                    json_record,
+                    iter_metadata(
+                        discovery,
+                        self.logger,
+                        tags=tags,
+                        session=worker.session,
+                    ),
+                ),
+            )
+        return {"records": records}
+
+    def fix(self, photos: list[str], *, dry_run: bool = False) -> dict[str, Any]:
+        """Apply fixes to photos that have not been fixed yet."""
+        pending = Counted(PhotoDiscovery(absolute_paths(photos)).pending())
+        with self.worker() as worker:
+            pipeline = FixPipeline(
+                worker.fixes,
+                self.logger,
+                dry_run=dry_run,
+                batch_size=self.batch_size,
+                in_place=self.in_place,
+                backup=self.backup,
+            )
+            failed = pipeline.run(pending, worker.session)
+        return {"processed": pending.count, "failed": failed}
+
+    def restore(self, photos: list[str]) -> dict[str, Any]:
+        """Restore photos from their backups."""
+        backed_up = Counted(
+            PhotoDiscovery(absolute_paths(photos)).backed_up(),
+        )
+        with self.worker() as worker:
+            failed = restore_photos(backed_up, self.logger, session=worker.session)
+        return {"restored": backed_up.count - failed, "failed": failed}
+
+
+class ServiceHandler(StreamRequestHandler):
+    """Answer the requests of a connection, one JSON line each."""
+
+    server: ServiceServer
+
+    def handle(self) -> None:
+        """Handle requests until the client disconnects."""
+        for line in self.rfile:
+            if line.strip():
+                self.wfile.write(encode_message(self.server.service.respond(line)))
+                self.wfile.flush()
+
+
+class ServiceServer(ThreadingUnixStreamServer):
+    """Unix socket server handling every connection in its own thread."""
+
+    daemon_threads = True
+
+    def __init__(self, path: Path, service: ExifService) -> None:
+        """Listen on a socket only accessible to the current user."""
+        self.path = path
+        self.service = service
+        path.parent.mkdir(parents=True, exist_ok=True, mode=0o700)
+        remove_stale_socket(path)
+        super().__init__(str(path), ServiceHandler, bind_and_activate=False)
+        try:
+            self.server_bind()
+            path.chmod(0o600)
+            self.server_activate()
+        except OSError:
+            self.server_close()
+            raise
+
+    def server_close(self) -> None:
+        """Stop listening and remove the socket."""
+        super().server_close()
+        self.path.unlink(missing_ok=True)
+
+
+def remove_stale_socket(path: Path) -> None:
+    """Remove a socket left behind by a service that is no longer running.
+
+    Files other than sockets are never removed.
+    """
+    try:
+        mode = path.lstat().st_mode
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(mode):
+        error = f"Not a socket: {path}"
+        raise FileExistsError(error)
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+        try:
+            probe.connect(os.fspath(path))
+        except ConnectionRefusedError:
+            path.unlink()
+            return
+    error = f"Service already running on {path}"
+    raise FileExistsError(error)
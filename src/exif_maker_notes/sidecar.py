@@ -0,0 +1,166 @@
+"""XMP sidecars receiving fixed tags instead of the photos."""
+
+from __future__ import annotations
+
+from enum import StrEnum
+from typing import TYPE_CHECKING
+
+from exif_maker_notes.files import sidecar_path
+
+if TYPE_CHECKING:
+    from collections.abc import Mapping
+    from pathlib import Path
+    from xml.etree.ElementTree import Element
+
+RDF = "http://www.w3.org/1999/02/22-rdf-syntax-ns#"
+
+NAMESPACES = {
+    "x": "adobe:ns:meta/",
+    "rdf": RDF,
+    "xmp": "http://ns.adobe.com/xap/1.0/",
+    "tiff": "http://ns.adobe.com/tiff/1.0/",
+    "exif": "http://ns.adobe.com/exif/1.0/",
+    "exifEX": "http://cipa.jp/exif/1.0/",
+}
+
+# XMP properties of the tags written by fixes, as mapped by exiftool
+XMP_PROPERTIES = {
+    "EXIF:Make": ("tiff", "Make"),
+    "EXIF:Model": ("tiff", "Model"),
+    "EXIF:LensMake": ("exifEX", "LensMake"),
+    "EXIF:LensModel": ("exifEX", "LensModel"),
+    "EXIF:FocalLengthIn35mmFormat": ("exif", "FocalLengthIn35mmFilm"),
+    "EXIF:ExposureCompensation": ("exif", "ExposureBiasValue"),
+    # XMP dates hold their own offset
+    "EXIF:OffsetTime": ("xmp", "ModifyDate"),
+}
+
+# tags read in addition to the ones of the fixes, to convert written values
+SIDECAR_TAGS = ("EXIF:ModifyDate",)
+
+# largest denominator of written rationals
+RATIONAL_DENOMINATOR = 1000
+
+
+class WriteTarget(StrEnum):
+    """Where fixed tags are written."""
+
+    # the photo itself, through exiftool
+    PHOTO = "photo"
+    # an XMP sidecar next to the photo, which is left untouched
+    SIDECAR = "sidecar"
+
+
+def qualified_name(prefix: str, name: str) -> str:
+    """Qualified name of an XMP property, as used by ElementTree."""
+    return f"{{{NAMESPACES[prefix]}}}{name}"
+
+
+def xmp_value(tag: str, value: str, original: Mapping[str, str]) -> str:
+    """Convert the value of a tag to its XMP property."""
+    if tag == "EXIF:ExposureCompensation":
+        from fractions import Fraction  # ruff: ignore[import-outside-top-level]
+
+        bias = Fraction(value).limit_denominator(RATIONAL_DENOMINATOR)
+        return f"{bias.numerator}/{bias.denominator}"
+    if tag == "EXIF:OffsetTime":
+        modified = original.get("EXIF:ModifyDate")
+        if not modified:
+            error = f"{tag} requires EXIF:ModifyDate in XMP sidecars"
+            raise ValueError(error)
+        date, _, time = modified.partition(" ")
+        return f"{date.replace(':', '-')}T{time}{value}"
+    return value
+
+
+def xmp_values(tags: Mapping[str, str], original: Mapping[str, str]) -> dict[str, str]:
+    """Convert tags to XMP properties, keyed on their qualified names."""
+    values: dict[str, str] = {}
+    for tag, value in tags.items():
+        if tag not in XMP_PROPERTIES:
+            error = f"{tag} has no XMP equivalent"
+            raise ValueError(error)
+        values[qualified_name(*XMP_PROPERTIES[tag])] = xmp_value(tag, value, original)
+    return values
+
+
+def read_sidecar(path: Path) -> Element:
+    """Parse a sidecar, or create an empty one if it does not exist.
+
+    Prefixes of the namespaces of the sidecar are kept when writing it.
+    """
+    import xml.etree.ElementTree as ET  # ruff: ignore[import-outside-top-level, suspicious-xml-etree-import]
+
+    namespaces = dict(NAMESPACES)
+    root: Element | None = None
+    if path.exists():
+        for event, item in ET.iterparse(path, events=("start-ns", "start")):  # ruff: ignore[suspicious-xml-element-tree-usage]
+            if event == "start-ns":
+                prefix, uri = item
+                if prefix:
+                    namespaces[prefix] = uri
+            elif root is None:
+                root = item
+    else:
+        root = ET.Element(qualified_name("x", "xmpmeta"))
+        rdf = ET.SubElement(root, qualified_name("rdf", "RDF"))
+        ET.SubElement(
+            rdf,
+            qualified_name("rdf", "Description"),
+            {qualified_name("rdf", "about"): ""},
+        )
+    if root is None:
+        error = f"Empty XMP sidecar: {path}"
+        raise ValueError(error)
+
+    for prefix, uri in namespaces.items():
+        try:
+            ET.register_namespace(prefix, uri)
+        except ValueError:
+            # reserved prefixes are generated again
+            continue
+    return root
+
+
+def merge_properties(root: Element, values: Mapping[str, str]) -> None:
+    """Set properties, where they are already defined or as new attributes."""
+    descriptions = list(root.iter(qualified_name("rdf", "Description")))
+    if not descriptions:
+        error = "XMP sidecar without a description"
+        raise ValueError(error)
+
+    for name, value in values.items():
+        for description in descriptions:
+            if name in description.attrib:
+                description.set(name, value)
+                break
+            element = description.find(name)
+            if element is not None:
+                element.text = value
+                break
+        else:
+            descriptions[0].set(name, value)
+
+
+def write_sidecar(
+    photo: Path,
+    tags: Mapping[str, str],
+    original: Mapping[str, str],
+) -> Path:
+    """Write tags to the XMP sidecar of a photo, replacing it atomically.
+
+    Properties already in the sidecar, e.g. edits of a raw developer, are
+    kept. ``original`` holds the values read from the photo, used to convert
+    tags whose XMP property combines several tags. Returns the sidecar path.
+    """
+    import xml.etree.ElementTree as ET  # ruff: ignore[import-outside-top-level, suspicious-xml-etree-import]
+
+    values = xmp_values(tags, original)
+    path = sidecar_path(photo)
+    root = read_sidecar(path)
+    merge_properties(root, values)
+
+    temporary = path.with_name(f".{path.name}.tmp")
+    temporary.write_bytes(ET.tostring(root, encoding="utf-8"))
+    temporary.replace(path)
+    return path
@@ -2,34 +2,319 @@
 
 from __future__ import annotations
 
-from typing import TYPE_CHECKING
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, NamedTuple, Self, TypeVar
 
 import exiftool
+from exiftool.exceptions import (
+    ExifToolExecuteError,
+    ExifToolNotRunning,
+    ExifToolVersionError,
+)
+
+from exif_maker_notes import profiling
+from exif_maker_notes.backup import (
+    BackupMode,
+    discard_backup,
+    read_metadata_backup,
+    take_backup,
+)
+from exif_maker_notes.files import (
+    BACKUP_SUFFIX,
+    backup_path,
+    fingerprint,
+    metadata_backup_path,
+)
+from exif_maker_notes.logs import DETAIL, TagLines
+from exif_maker_notes.metadata import Metadata
+from exif_maker_notes.native import (
+    NATIVE_TAGS,
+    NativeReadError,
+    patch_metadata,
+    read_metadata,
+)
+from exif_maker_notes.sidecar import WriteTarget, write_sidecar
+from exif_maker_notes.utils import chunked
 
 if TYPE_CHECKING:
+    from collections.abc import (
+        Callable,
+        Generator,
+        Iterable,
+        Iterator,
+        Mapping,
+        Sequence,
+    )
     from pathlib import Path
+    from types import TracebackType
 
+    from exif_maker_notes.cache import MetadataCache
     from exif_maker_notes.cli.logger import Logger
 
+T = TypeVar("T")
 
-def list_metadata(
+# errors raised by pyexiftool when the underlying process has gone away
+SESSION_ERRORS = (BrokenPipeError, ExifToolNotRunning, ExifToolVersionError)
+
+DEFAULT_BATCH_SIZE = 100
+DEFAULT_CHUNK_SIZE = 500
+
+# number of photos restored natively before falling back to exiftool
+RESTORE_CHUNK_SIZE = 1000
+
+# -fast skips scanning for JPEG trailers, which the fixes never read;
+# -fast2 would also skip maker notes and is therefore not safe
+READ_PARAMS = ["-fast"]
+
+# values are written in numeric form, as with the pyexiftool defaults
+WRITE_PARAMS = ["-P", "-n"]
+
+# used when a backup was taken before writing, instead of exiftool's copy
+OVERWRITE_PARAMS = [*WRITE_PARAMS, "-overwrite_original"]
+
+# original values are recorded as read, i.e. print converted
+RESTORE_PARAMS = ["-P", "-overwrite_original"]
+
+
+class ExifToolSession:
+    """Persistent exiftool process shared between calls.
+
+    The process is started lazily in ``-stay_open`` mode and restarted
+    automatically if it dies. The number of spawned processes and executed
+    commands is tracked for diagnostics.
+    """
+
+    def __init__(self, common_args: list[str] | None = None) -> None:
+        """Initialize the session."""
+        self.common_args = ["-G"] if common_args is None else common_args
+        self.spawned: int = 0
+        self.restarts: int = 0
+        self.executions: int = 0
+        self._helper: exiftool.ExifToolHelper | None = None
+
+    def __enter__(self) -> Self:
+        """Enter the session context."""
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        """Exit the session context."""
+        self.close()
+
+    @property
+    def running(self) -> bool:
+        """Whether the exiftool process is running."""
+        if self._helper is None:
+            return False
+        with warnings.catch_warnings():
+            # pyexiftool warns when it detects a dead process
+            warnings.simplefilter("ignore")
+            return bool(self._helper.running)
+
+    @property
+    def helper(self) -> exiftool.ExifToolHelper:
+        """Exiftool helper, (re)started on demand."""
+        if self._helper is None or not self.running:
+            if self._helper is not None:
+                self.restarts += 1
+            self._helper = exiftool.ExifToolHelper(
+                common_args=self.common_args,
+                auto_start=False,
+            )
+            with profiling.stage("exiftool.start"):
+                self._helper.run()
+            self.spawned += 1
+            profiling.count("exiftool.spawned")
+        return self._helper
+
+    def run(self, operation: Callable[[exiftool.ExifToolHelper], T]) -> T:
+        """Run an operation, restarting the process once if it crashed."""
+        self.executions += 1
+        profiling.count("exiftool.invocations")
+        try:
+            return operation(self.helper)
+        except SESSION_ERRORS:
+            self._discard()
+            return operation(self.helper)
+
+    def close(self) -> None:
+        """Terminate the exiftool process."""
+        if self._helper is not None and self.running:
+            self._helper.terminate()
+        self._helper = None
+
+    def _discard(self) -> None:
+        """Drop a crashed process so that the next call restarts it."""
+        if self._helper is not None:
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore")
+                self._helper.terminate()
+
+
+@contextmanager
+def use_session(session: ExifToolSession | None) -> Generator[ExifToolSession]:
+    """Use the given session or a temporary one."""
+    if session is not None:
+        yield session
+        return
+
+    with ExifToolSession() as temporary_session:
+        yield temporary_session
+
+
+def read_exiftool_chunk(
+    session: ExifToolSession,
+    photos: list[Path],
+    tags: Sequence[str] | None = None,
+) -> list[tuple[Path, dict[str, str]]]:
+    """Read metadata of a chunk of photos with a single exiftool call."""
+    profiling.count_bytes("bytes.read", photos)
+    with profiling.stage("read.exiftool"):
+        if tags:
+            metadata = session.run(
+                lambda helper: helper.get_tags(photos, list(tags), params=READ_PARAMS),
+            )
+        else:
+            metadata = session.run(lambda helper: helper.get_metadata(photos))
+
+    return [
+        (photo, {key: value for key, value in data.items() if key != "SourceFile"})
+        for photo, data in zip(photos, metadata, strict=True)
+    ]
+
+
+def read_chunk(
+    session: ExifToolSession,
+    photos: list[Path],
+    tags: Sequence[str] | None = None,
+    *,
+    native: bool = True,
+) -> list[tuple[Path, dict[str, str]]]:
+    """Read metadata of a chunk of photos.
+
+    With ``native``, photos are decoded without exiftool, but only when every
+    requested tag can be decoded natively, i.e. for projections of native
+    tags such as ``list --tag``. The fixes request ``Composite:LensID``,
+    which only exiftool derives, so the fix pipeline always reads through
+    exiftool: exiftool parses every photo it is given regardless of the
+    number of tags, so also decoding the native tags would only add work.
+    Exiftool also reads photos that cannot be decoded natively.
+    """
+    if not tags or not native or not NATIVE_TAGS.issuperset(tags):
+        return read_exiftool_chunk(session, photos, tags)
+
+    metadata: dict[Path, dict[str, str]] = {}
+    fallback: list[Path] = []
+    with profiling.stage("read.native"):
+        for photo in photos:
+            try:
+                metadata[photo] = read_metadata(photo, tags)
+            except NativeReadError:
+                fallback.append(photo)
+
+    if fallback:
+        metadata.update(read_exiftool_chunk(session, fallback, tags))
+    return [(photo, metadata[photo]) for photo in photos]
+
+
+def read_cached_chunk(
+    session: ExifToolSession,
+    cache: MetadataCache,
     photos: list[Path],
+    tags: Sequence[str] | None = None,
+    *,
+    native: bool = True,
+) -> list[tuple[Path, dict[str, str]]]:
+    """Read metadata of a chunk of photos, reading only cache misses."""
+    with profiling.stage("cache"):
+        cached = cache.get_many(photos, tags)
+    missing = [photo for photo in photos if photo not in cached]
+    if missing:
+        # fingerprint before reading so that concurrent changes are not cached
+        fingerprints = [fingerprint(photo) for photo in missing]
+        read = read_chunk(session, missing, tags, native=native)
+        with profiling.stage("cache"):
+            cache.put_many(
+                (
+                    (photo, photo_fingerprint, metadata)
+                    for (photo, metadata), photo_fingerprint in zip(
+                        read,
+                        fingerprints,
+                        strict=True,
+                    )
+                    if photo_fingerprint is not None
+                ),
+                tags,
+            )
+        cached.update(read)
+    return [(photo, cached[photo]) for photo in photos]
+
+
+def log_metadata(logger: Logger, photo: Path, metadata: Mapping[str, str]) -> None:
+    """Log metadata of a photo."""
+    logger.log(DETAIL, "Metadata for %s:\n%s", photo, TagLines(metadata))
+
+
+def iter_metadata(
+    photos: Iterable[Path],
     logger: Logger | None = None,
-) -> dict[Path, dict[str, str]]:
-    """List EXIF metadata for a list of photos."""
-    metadata_output: dict[Path, dict[str, str]] = {}
-    with exiftool.ExifToolHelper(common_args=["-G"]) as et:
-        metadata = et.get_metadata(photos)
-        for photo, data in zip(photos, metadata, strict=True):
-            if logger:
-                logger.info("Metadata for %s:", data["SourceFile"])
-            metadata_output[photo] = {}
-            for key, value in data.items():
-                if key != "SourceFile":
-                    if logger:
-                        logger.info("  %s: %s", key, value)
-                    metadata_output[photo][key] = value
-    return metadata_output
+    *,
+    tags: Sequence[str] | None = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    session: ExifToolSession | None = None,
+    cache: MetadataCache | None = None,
+    native: bool = True,
+) -> Iterator[tuple[Path, Metadata]]:
+    """Iterate over EXIF metadata of photos, reading them in chunks.
+
+    Only one chunk is kept in memory at a time. If ``tags`` are given, only
+    those are read, otherwise all tags are listed. With a ``cache``, exiftool
+    is only used for photos that are not cached or have changed. With
+    ``native``, supported tags are decoded without exiftool when possible.
+    Metadata is yielded as compact records sharing their tag names.
+    """
+    with use_session(session) as et:
+        for chunk in chunked(photos, chunk_size):
+            if cache is None:
+                metadata = read_chunk(et, chunk, tags, native=native)
+            else:
+                metadata = read_cached_chunk(et, cache, chunk, tags, native=native)
+            for photo, photo_metadata in metadata:
+                record = Metadata.from_dict(photo_metadata)
+                if logger:
+                    log_metadata(logger, photo, record)
+                yield photo, record
+
+
+def list_metadata(
+    photos: Iterable[Path],
+    logger: Logger | None = None,
+    *,
+    tags: Sequence[str] | None = None,
+    session: ExifToolSession | None = None,
+    cache: MetadataCache | None = None,
+    native: bool = True,
+) -> dict[Path, Metadata]:
+    """List EXIF metadata for a list of photos.
+
+    If ``tags`` are given, only those are read, otherwise all tags are listed.
+    """
+    return dict(
+        iter_metadata(
+            photos,
+            logger,
+            tags=tags,
+            session=session,
+            cache=cache,
+            native=native,
+        ),
+    )
 
 
 def set_metadata(
@@ -38,22 +323,293 @@ def set_metadata(
     logger: Logger | None = None,
     *,
     dry_run: bool = False,
+    session: ExifToolSession | None = None,
+    overwrite: bool = False,
 ) -> None:
-    """Set EXIF metadata for a photo."""
+    """Set EXIF metadata for a photo.
+
+    With ``overwrite``, exiftool does not keep an ``_original`` copy.
+    """
     if logger:
-        logger.info("Setting metadata for %s:", photo)
-        for key, value in tags.items():
-            logger.info("  %s: %s", key, value)
+        logger.log(DETAIL, "Setting metadata for %s:\n%s", photo, TagLines(tags))
 
     if not dry_run:
-        with exiftool.ExifToolHelper() as et:
-            et.set_tags(photo, tags=tags, params=["-P"])
+        params = OVERWRITE_PARAMS if overwrite else WRITE_PARAMS
+        with use_session(session) as et, profiling.stage("write.exiftool"):
+            et.run(lambda helper: helper.set_tags(photo, tags=tags, params=params))
+        profiling.count_bytes("bytes.written", [photo])
+
+
+class WriteResult(NamedTuple):
+    """Result of a metadata write for a single photo."""
+
+    photo: Path
+    tags: dict[str, str]
+    error: Exception | None = None
+
+
+class MetadataWriter:
+    """Batched metadata writer.
+
+    Photos receiving an identical set of tags are grouped and written with a
+    single exiftool command. Pending writes are flushed once ``batch_size``
+    photos are queued. If a grouped write fails, the photos that were not
+    written are retried one by one so that errors are reported per photo.
+
+    With a ``backup`` mode other than ``ORIGINAL``, a backup is taken before
+    writing and exiftool overwrites the photo without keeping its own copy.
+    Photos that cannot be cloned are copied instead. Backups taken for failed
+    writes are removed.
+
+    With ``in_place``, photos whose tags all exist and whose new values fit
+    are patched in place without exiftool. Unless a backup mode other than
+    ``ORIGINAL`` is used, no backup is kept for them.
+
+    With the ``SIDECAR`` target, tags are written natively to XMP sidecars
+    right away and photos are neither written nor backed up.
+    """
+
+    def __init__(
+        self,
+        session: ExifToolSession,
+        logger: Logger | None = None,
+        *,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        dry_run: bool = False,
+        in_place: bool = False,
+        backup: BackupMode = BackupMode.ORIGINAL,
+        target: WriteTarget = WriteTarget.PHOTO,
+    ) -> None:
+        """Initialize the writer."""
+        self.session = session
+        self.logger = logger
+        self.batch_size = max(batch_size, 1)
+        self.dry_run = dry_run
+        self.in_place = in_place
+        self.backup = backup
+        self.target = target
+        # pending photos keyed on their tags and whether to overwrite them
+        self._pending: dict[tuple[tuple[tuple[str, str], ...], bool], list[Path]] = {}
+        self._pending_count: int = 0
+        # photos whose backup was taken by this writer
+        self._taken: set[Path] = set()
+
+    def add(
+        self,
+        photo: Path,
+        tags: dict[str, str],
+        original: Mapping[str, str] | None = None,
+    ) -> list[WriteResult]:
+        """Queue a write and flush if the batch is full.
+
+        ``original`` holds the current values of the tags, which are required
+        for metadata-only backups.
+        """
+        if self.logger:
+            self.logger.log(
+                DETAIL,
+                "Setting metadata for %s:\n%s",
+                photo,
+                TagLines(tags),
+            )
+
+        if self.target is WriteTarget.SIDECAR:
+            return [self._write_sidecar(photo, tags, original or {})]
+
+        overwrite = False
+        if not self.dry_run:
+            if original is None and self.backup is BackupMode.METADATA:
+                error = "Original values are required for metadata-only backups"
+                raise ValueError(error)
+            try:
+                with profiling.stage("backup"):
+                    taken = take_backup(photo, tags, original or {}, self.backup)
+            except OSError as e:
+                return [WriteResult(photo, tags, e)]
+            if taken:
+                self._taken.add(photo)
+            overwrite = taken or self.backup is BackupMode.METADATA
+
+        if self.in_place and not self.dry_run:
+            with profiling.stage("write.in_place"):
+                patched = patch_metadata(photo, tags)
+            if patched:
+                self._taken.discard(photo)
+                return [WriteResult(photo, tags)]
+
+        key = (tuple(sorted(tags.items())), overwrite)
+        self._pending.setdefault(key, []).append(photo)
+        self._pending_count += 1
+        if self._pending_count >= self.batch_size:
+            return self.flush()
+        return []
+
+    def flush(self) -> list[WriteResult]:
+        """Write all pending photos."""
+        results: list[WriteResult] = []
+        for (tags, overwrite), photos in self._pending.items():
+            results.extend(self._write_group(photos, dict(tags), overwrite=overwrite))
+        self._pending.clear()
+        self._pending_count = 0
+        return results
+
+    def _write_group(
+        self,
+        photos: list[Path],
+        tags: dict[str, str],
+        *,
+        overwrite: bool,
+    ) -> list[WriteResult]:
+        """Write the same tags to a group of photos."""
+        if self.dry_run:
+            return [WriteResult(photo, tags) for photo in photos]
+
+        params = OVERWRITE_PARAMS if overwrite else WRITE_PARAMS
+        try:
+            with profiling.stage("write.exiftool"):
+                self.session.run(
+                    lambda helper: helper.set_tags(photos, tags=tags, params=params),
+                )
+        except ExifToolExecuteError as e:
+            if len(photos) == 1:
+                return self._settle([WriteResult(photos[0], tags, e)])
+        else:
+            profiling.count_bytes("bytes.written", photos)
+            return self._settle([WriteResult(photo, tags) for photo in photos])
+
+        results: list[WriteResult] = []
+        for photo in photos:
+            # exiftool keeps a backup of every photo it managed to write,
+            # overwritten photos are written again as that is harmless
+            if not overwrite and backup_path(photo).exists():
+                results.append(WriteResult(photo, tags))
+                continue
+            try:
+                set_metadata(photo, tags, session=self.session, overwrite=overwrite)
+            except ExifToolExecuteError as e:
+                results.append(WriteResult(photo, tags, e))
+            else:
+                results.append(WriteResult(photo, tags))
+        return self._settle(results)
 
+    def _write_sidecar(
+        self,
+        photo: Path,
+        tags: dict[str, str],
+        original: Mapping[str, str],
+    ) -> WriteResult:
+        """Write tags to the XMP sidecar of a photo."""
+        if self.dry_run:
+            return WriteResult(photo, tags)
+        try:
+            with profiling.stage("write.sidecar"):
+                path = write_sidecar(photo, tags, original)
+        except (OSError, SyntaxError, ValueError) as e:
+            # malformed sidecars raise a ParseError, a SyntaxError
+            return WriteResult(photo, tags, e)
+        profiling.count_bytes("bytes.written", [path])
+        return WriteResult(photo, tags)
 
-def restore(photo: Path, logger: Logger | None = None) -> None:
+    def _settle(self, results: list[WriteResult]) -> list[WriteResult]:
+        """Remove the backups taken for failed writes."""
+        for result in results:
+            if result.photo in self._taken:
+                self._taken.discard(result.photo)
+                if result.error is not None:
+                    discard_backup(result.photo, self.backup)
+        return results
+
+
+def restore(
+    photo: Path,
+    logger: Logger | None = None,
+    *,
+    session: ExifToolSession | None = None,
+) -> None:
     """Restore EXIF metadata from a backup photo."""
     if logger:
-        logger.info("Restoring metadata for %s", photo)
+        logger.log(DETAIL, "Restoring metadata for %s", photo)
+
+    with use_session(session) as et, profiling.stage("restore"):
+        et.run(lambda helper: helper.execute("-P", "-restore_original", photo))
+    profiling.count_bytes("bytes.written", [photo])
+
+
+def restore_metadata(
+    photo: Path,
+    logger: Logger | None = None,
+    *,
+    session: ExifToolSession | None = None,
+) -> None:
+    """Write back the original values recorded in a metadata-only backup."""
+    if logger:
+        logger.log(DETAIL, "Restoring metadata for %s", photo)
+
+    tags = read_metadata_backup(photo)
+    with use_session(session) as et, profiling.stage("restore"):
+        et.run(lambda helper: helper.set_tags(photo, tags=tags, params=RESTORE_PARAMS))
+    metadata_backup_path(photo).unlink()
+    profiling.count_bytes("bytes.written", [photo])
+
+
+def restore_native(photo: Path) -> OSError | None:
+    """Move the backup of a photo back over it, as ``-restore_original`` does.
+
+    Returns the error if the backup could not be moved.
+    """
+    try:
+        backup_path(photo).replace(photo)
+    except OSError as e:
+        return e
+    return None
+
+
+def restore_photos(
+    photos: Iterable[Path],
+    logger: Logger,
+    *,
+    session: ExifToolSession | None = None,
+    native: bool = True,
+    jobs: int = 1,
+) -> int:
+    """Restore a list of photos from their backups.
+
+    Backups are moved back natively, in chunks renamed by ``jobs`` threads.
+    Photos whose backup cannot be moved, e.g. for lack of permissions, are
+    restored with exiftool, which is only started if needed. Without
+    ``native``, every photo is restored with exiftool. Photos with only a
+    metadata-only backup get their original values written back. Returns
+    the number of photos that could not be restored.
+    """
+    failed = 0
+    photos = (photo for photo in photos if not photo.name.endswith(BACKUP_SUFFIX))
+    with use_session(session) as et, ThreadPoolExecutor(jobs) as executor:
+        for chunk in chunked(photos, RESTORE_CHUNK_SIZE):
+            fallback = chunk
+            if native:
+                with profiling.stage("restore.native"):
+                    errors = list(executor.map(restore_native, chunk))
+                fallback = []
+                for photo, error in zip(chunk, errors, strict=True):
+                    if error is None:
+                        logger.log(DETAIL, "Restored metadata for %s", photo)
+                    elif isinstance(error, FileNotFoundError) and not (
+                        metadata_backup_path(photo).exists()
+                    ):
+                        logger.error("Failed to restore %s: %s", photo, error)
+                        failed += 1
+                    else:
+                        fallback.append(photo)
 
-    with exiftool.ExifToolHelper() as et:
-        et.execute("-P", "-restore_original", photo)
+            for photo in fallback:
+                try:
+                    if not backup_path(photo).exists() and (
+                        metadata_backup_path(photo).exists()
+                    ):
+                        restore_metadata(photo, logger, session=et)
+                    else:
+                        restore(photo, logger, session=et)
+                except (ExifToolExecuteError, OSError, ValueError):
+                    logger.exception("Failed to restore %s", photo)
+                    failed += 1
+    return failed
@@ -0,0 +1,49 @@
+"""Common utilities."""
+
+from __future__ import annotations
+
+from itertools import islice
+from typing import TYPE_CHECKING, Generic, TypeVar
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator
+
+T = TypeVar("T")
+
+
+def strtobool(val: str) -> bool:
+    """Convert a string representation of truth to True or False.
+
+    True values are 'y', 'yes', 't', 'true', 'on', and '1'; false values
+    are 'n', 'no', 'f', 'false', 'off', and '0'.  Raises ValueError if
+    'val' is anything else.
+    """
+    val = val.lower()
+    if val in {"y", "yes", "t", "true", "on", "1"}:
+        return True
+    if val in {"n", "no", "f", "false", "off", "0"}:
+        return False
+    error = f"invalid truth value {val!r}"
+    raise ValueError(error)
+
+
+class Counted(Generic[T]):
+    """Iterable counting the items consumed from it."""
+
+    def __init__(self, items: Iterable[T]) -> None:
+        """Initialize the iterable."""
+        self.items = items
+        self.count: int = 0
+
+    def __iter__(self) -> Iterator[T]:
+        """Iterate over the items."""
+        for item in self.items:
+            self.count += 1
+            yield item
+
+
+def chunked(items: Iterable[T], size: int) -> Iterator[list[T]]:
+    """Split an iterable into lists of at most ``size`` items."""
+    iterator = iter(items)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
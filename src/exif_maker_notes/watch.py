@@ -0,0 +1,302 @@
+"""Watch a folder for new photos.
+
+Completed files are reported with inotify on Linux, from ``IN_CLOSE_WRITE``
+and ``IN_MOVED_TO`` events, or otherwise by polling the folder until a
+file's size and modification time stop changing. Reported files are
+debounced and grouped into small batches.
+"""
+
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+from abc import ABC, abstractmethod
+from typing import TYPE_CHECKING
+
+from exif_maker_notes.files import Fingerprint
+from exif_maker_notes.utils import chunked
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterator
+    from pathlib import Path
+    from threading import Event
+    from types import TracebackType
+    from typing import Self
+
+# inotify event masks, see inotify(7)
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE_SELF = 0x00000400
+IN_ISDIR = 0x40000000
+IN_IGNORED = 0x00008000
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE_SELF
+
+EVENT_HEADER = struct.Struct("iIII")
+EVENT_BUFFER_SIZE = 64 * 1024
+
+DEFAULT_DEBOUNCE = 0.5
+DEFAULT_POLL_INTERVAL = 1.0
+DEFAULT_BATCH_SIZE = 20
+
+# longest wait for events, so that stop requests are noticed
+IDLE_TIMEOUT = 1.0
+
+
+class Watcher(ABC):
+    """Source of completed files below a folder."""
+
+    def __init__(
+        self,
+        root: Path,
+        matches: Callable[[str], bool],
+        *,
+        recursive: bool = True,
+    ) -> None:
+        """Initialize the watcher."""
+        self.root = root
+        self.matches = matches
+        self.recursive = recursive
+
+    def __enter__(self) -> Self:
+        """Enter the watcher context."""
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        """Exit the watcher context."""
+        self.close()
+
+    @abstractmethod
+    def poll(self, timeout: float) -> list[Path]:
+        """Wait up to ``timeout`` seconds for completed files."""
+
+    def close(self) -> None:  # ruff: ignore[empty-method-without-abstract-decorator]
+        """Release the resources of the watcher."""
+
+    def scan(self, directory: Path) -> Iterator[tuple[Path, bool]]:
+        """List matching files and subdirectories, flagging directories."""
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if self.recursive:
+                        yield directory / entry.name, True
+                elif self.matches(entry.name):
+                    yield directory / entry.name, False
+
+
+class InotifyWatcher(Watcher):
+    """Watcher using Linux inotify through ctypes."""
+
+    def __init__(
+        self,
+        root: Path,
+        matches: Callable[[str], bool],
+        *,
+        recursive: bool = True,
+    ) -> None:
+        """Initialize the watcher, watching all existing directories."""
+        super().__init__(root, matches, recursive=recursive)
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self._fd: int = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+        self._directories: dict[int, Path] = {}
+        self._found: list[Path] = []
+        self._add_tree(root, report=False)
+
+    @classmethod
+    def available(cls) -> bool:
+        """Check whether inotify can be used."""
+        if not sys.platform.startswith("linux"):
+            return False
+        library = ctypes.util.find_library("c")
+        return library is not None and hasattr(ctypes.CDLL(library), "inotify_init1")
+
+    def close(self) -> None:
+        """Close the inotify instance."""
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+    def poll(self, timeout: float) -> list[Path]:
+        """Wait up to ``timeout`` seconds for completed files."""
+        found, self._found = self._found, []
+        if found:
+            timeout = 0
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return found
+
+        data = os.read(self._fd, EVENT_BUFFER_SIZE)
+        offset = 0
+        while offset < len(data):
+            wd, mask, _cookie, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = os.fsdecode(data[offset : offset + length].rstrip(b"\0"))
+            offset += length
+            self._handle(wd, mask, name, found)
+        return found
+
+    def _handle(self, wd: int, mask: int, name: str, found: list[Path]) -> None:
+        """Handle a single event."""
+        directory = self._directories.get(wd)
+        if directory is None:
+            return
+        if mask & (IN_IGNORED | IN_DELETE_SELF):
+            del self._directories[wd]
+            return
+
+        path = directory / name
+        if mask & IN_ISDIR:
+            if self.recursive and mask & (IN_CREATE | IN_MOVED_TO):
+                # files may have landed before the watch was added
+                self._add_tree(path, report=True)
+        elif mask & (IN_CLOSE_WRITE | IN_MOVED_TO) and self.matches(name):
+            found.append(path)
+
+    def _add_tree(self, root: Path, *, report: bool) -> None:
+        """Watch a directory tree, optionally reporting the files it holds."""
+        directories = [root]
+        while directories:
+            directory = directories.pop()
+            wd = self._libc.inotify_add_watch(
+                self._fd,
+                os.fsencode(directory),
+                WATCH_MASK,
+            )
+            if wd < 0:
+                # the directory may have been removed in the meantime
+                continue
+            self._directories[wd] = directory
+            try:
+                entries = list(self.scan(directory))
+            except OSError:
+                continue
+            for path, is_directory in entries:
+                if is_directory:
+                    directories.append(path)
+                elif report:
+                    self._found.append(path)
+
+
+class PollingWatcher(Watcher):
+    """Watcher listing the folder at a fixed interval.
+
+    A file is reported once its fingerprint is unchanged between two polls.
+    Files present at start are not reported.
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        matches: Callable[[str], bool],
+        *,
+        recursive: bool = True,
+        interval: float = DEFAULT_POLL_INTERVAL,
+    ) -> None:
+        """Initialize the watcher."""
+        super().__init__(root, matches, recursive=recursive)
+        self.interval = interval
+        self._reported = self._snapshot()
+        self._changing: dict[Path, Fingerprint] = {}
+        self._next = time.monotonic() + interval
+
+    def poll(self, timeout: float) -> list[Path]:
+        """Wait up to ``timeout`` seconds for completed files."""
+        delay = self._next - time.monotonic()
+        if delay > timeout:
+            time.sleep(timeout)
+            return []
+        time.sleep(max(delay, 0))
+        self._next = time.monotonic() + self.interval
+
+        found: list[Path] = []
+        snapshot = self._snapshot()
+        for path, fingerprint in snapshot.items():
+            if self._reported.get(path) == fingerprint:
+                continue
+            if self._changing.get(path) == fingerprint:
+                found.append(path)
+                self._reported[path] = fingerprint
+                del self._changing[path]
+            else:
+                self._changing[path] = fingerprint
+        # forget removed files
+        self._reported = {
+            path: fingerprint
+            for path, fingerprint in self._reported.items()
+            if path in snapshot
+        }
+        return found
+
+    def _snapshot(self) -> dict[Path, Fingerprint]:
+        """Fingerprint all matching files."""
+        snapshot: dict[Path, Fingerprint] = {}
+        directories = [self.root]
+        while directories:
+            directory = directories.pop()
+            try:
+                entries = list(self.scan(directory))
+            except OSError:
+                continue
+            for path, is_directory in entries:
+                if is_directory:
+                    directories.append(path)
+                    continue
+                try:
+                    snapshot[path] = Fingerprint.from_stat(path.stat())
+                except FileNotFoundError:
+                    continue
+        return snapshot
+
+
+def create_watcher(
+    root: Path,
+    matches: Callable[[str], bool],
+    *,
+    recursive: bool = True,
+    poll: bool = False,
+) -> Watcher:
+    """Create an inotify watcher, or a polling one if requested or needed."""
+    if not poll and InotifyWatcher.available():
+        return InotifyWatcher(root, matches, recursive=recursive)
+    return PollingWatcher(root, matches, recursive=recursive)
+
+
+def watch_batches(
+    watcher: Watcher,
+    *,
+    debounce: float = DEFAULT_DEBOUNCE,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    stop: Event | None = None,
+) -> Iterator[list[Path]]:
+    """Yield batches of completed files.
+
+    A file is only yielded once no event was reported for it during
+    ``debounce`` seconds. Files removed in the meantime are dropped.
+    """
+    pending: dict[Path, float] = {}
+    while stop is None or not stop.is_set():
+        now = time.monotonic()
+        timeout = (
+            max(min(pending.values()) + debounce - now, 0) if pending else IDLE_TIMEOUT
+        )
+        for path in watcher.poll(min(timeout, IDLE_TIMEOUT)):
+            pending[path] = time.monotonic()
+
+        now = time.monotonic()
+        ready = [path for path, seen in pending.items() if now - seen >= debounce]
+        for path in ready:
+            del pending[path]
+        yield from chunked((path for path in ready if path.exists()), batch_size)
@@ -0,0 +1,71 @@
+"""Asynchronous exiftool integration tests."""
+
+import asyncio
+import sys
+from pathlib import Path
+
+from exif_maker_notes.async_tool import (
+    READ_BLOCK_SIZE,
+    AsyncExifTool,
+    AsyncExifToolPool,
+    list_metadata,
+)
+from exif_maker_notes.metadata import Metadata
+
+photo = Path("tests/data/NikonD5200.jpg")
+
+# exiftool stand-in filling standard error before answering on standard output
+NOISY_EXIFTOOL = """
+import sys
+
+for line in sys.stdin:
+    if line.startswith("-execute"):
+        sequence = line.strip().removeprefix("-execute")
+        sys.stderr.write("warning\\n" * 100_000)
+        sys.stderr.flush()
+        print("x" * 1_000_000 + "{ready" + sequence + "}", flush=True)
+        sys.stderr.write("=0=post" + sequence + "\\n")
+        sys.stderr.flush()
+    elif line.strip() == "False":
+        break
+"""
+
+
+def test_list_metadata() -> None:
+    """Test concurrent reads sharing a pool."""
+
+    async def run() -> list[dict[Path, Metadata]]:
+        async with AsyncExifToolPool(size=2) as pool:
+            results = await asyncio.gather(
+                *(
+                    list_metadata([photo], pool=pool, tags=["EXIF:Make"])
+                    for _ in range(4)
+                ),
+            )
+            assert pool.spawned <= 2  # ruff: ignore[magic-value-comparison]
+            return results
+
+    for metadata in asyncio.run(run()):
+        assert set(metadata[photo]) <= {"EXIF:Make"}
+
+
+def test_execute_full_pipes(tmp_path: Path) -> None:
+    """Test that large outputs on both streams are read without blocking."""
+    executable = tmp_path / "exiftool"
+    executable.write_text(f"#!{sys.executable}\n{NOISY_EXIFTOOL}", encoding="utf-8")
+    executable.chmod(0o755)
+
+    async def run() -> str:
+        exiftool = AsyncExifTool(executable=str(executable))
+        await exiftool.start()
+        try:
+            output = await asyncio.wait_for(exiftool.execute("-ver"), timeout=30)
+        except TimeoutError:
+            exiftool.kill()
+            raise
+        await exiftool.close()
+        return output
+
+    output = asyncio.run(run())
+    assert len(output) == 1_000_000  # ruff: ignore[magic-value-comparison]
+    assert len(output) > READ_BLOCK_SIZE
@@ -0,0 +1,88 @@
+"""Backup tests."""
+
+import json
+import shutil
+from pathlib import Path
+
+import pytest
+
+from exif_maker_notes import backup
+from exif_maker_notes.backup import (
+    BackupMode,
+    read_metadata_backup,
+    reflink,
+    take_backup,
+)
+from exif_maker_notes.files import PhotoDiscovery, backup_path, metadata_backup_path
+from exif_maker_notes.tool import ExifToolSession, MetadataWriter
+
+photo = Path("tests/data/NikonD5200.jpg")
+
+
+def test_metadata_backup(tmp_path: Path) -> None:
+    """Test that only the original values of written tags are recorded."""
+    path = tmp_path / photo.name
+    path.write_bytes(b"photo")
+    original = {"EXIF:Make": "NIKON CORPORATION", "EXIF:Model": "NIKON D5200"}
+    assert take_backup(
+        path,
+        ["EXIF:Make", "EXIF:LensModel"],
+        original,
+        BackupMode.METADATA,
+    )
+    assert json.loads(metadata_backup_path(path).read_text(encoding="utf-8")) == {
+        "tags": {"EXIF:Make": "NIKON CORPORATION", "EXIF:LensModel": None},
+    }
+    assert read_metadata_backup(path) == {
+        "EXIF:Make": "NIKON CORPORATION",
+        "EXIF:LensModel": "",
+    }
+
+    # the values before the first write are kept
+    assert not take_backup(path, ["EXIF:Make"], {}, BackupMode.METADATA)
+    assert read_metadata_backup(path)["EXIF:Make"] == "NIKON CORPORATION"
+    assert list(PhotoDiscovery([tmp_path]).backed_up()) == [path]
+
+
+def test_reflink(tmp_path: Path) -> None:
+    """Test that a failed clone leaves no target behind."""
+    source = tmp_path / "a.jpg"
+    source.write_bytes(b"photo")
+    target = tmp_path / "a.jpg_original"
+    if reflink(source, target):
+        assert target.read_bytes() == b"photo"
+    else:
+        assert not target.exists()
+
+
+def test_writer_in_place_backup(tmp_path: Path) -> None:
+    """Test that in-place writes keep a metadata-only backup."""
+    path = tmp_path / photo.name
+    shutil.copy(photo, path)
+    with ExifToolSession() as session:
+        writer = MetadataWriter(session, in_place=True, backup=BackupMode.METADATA)
+        results = writer.add(
+            path,
+            {"EXIF:FocalLengthIn35mmFormat": "48"},
+            {"EXIF:FocalLengthIn35mmFormat": "32 mm"},
+        )
+        assert [result.error for result in results] == [None]
+        assert session.spawned == 0
+    assert read_metadata_backup(path) == {"EXIF:FocalLengthIn35mmFormat": "32 mm"}
+
+
+def test_writer_in_place_reflink_fallback(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Test that in-place writes are backed up by a copy when cloning fails."""
+    monkeypatch.setattr(backup, "reflink", lambda _source, _target: False)
+    path = tmp_path / photo.name
+    shutil.copy(photo, path)
+    with ExifToolSession() as session:
+        writer = MetadataWriter(session, in_place=True, backup=BackupMode.REFLINK)
+        results = writer.add(path, {"EXIF:FocalLengthIn35mmFormat": "48"})
+        assert [result.error for result in results] == [None]
+        assert session.spawned == 0
+    assert backup_path(path).read_bytes() == photo.read_bytes()
+    assert path.read_bytes() != photo.read_bytes()
@@ -0,0 +1,21 @@
+"""Benchmark corpus tests."""
+
+from pathlib import Path
+
+import pytest
+
+from benchmarks.corpus import DEFAULT_SPECS, generate_corpus
+from exif_maker_notes.native import NATIVE_TAGS, read_metadata
+
+
+@pytest.mark.parametrize("file_format", ["jpeg", "tiff"])
+def test_generate_corpus(tmp_path: Path, file_format: str) -> None:
+    """Test that synthetic photos decode to their specs."""
+    photos = generate_corpus(tmp_path, 4, file_format=file_format, size=4096)
+    assert len(photos) == 4  # ruff: ignore[magic-value-comparison]
+    assert all(photo.stat().st_size >= 4096 for photo in photos)  # ruff: ignore[magic-value-comparison]
+
+    metadata = read_metadata(photos[0], NATIVE_TAGS)
+    assert metadata["EXIF:Model"] == DEFAULT_SPECS[0].model
+    assert metadata["MakerNotes:Lens"] == "18-105mm f/3.5-5.6"
+    assert read_metadata(photos[2], NATIVE_TAGS)["EXIF:OffsetTime"] == "+02:00"
@@ -0,0 +1,75 @@
+"""Metadata cache tests."""
+
+import logging
+import shutil
+from pathlib import Path
+
+from typer.testing import CliRunner
+
+from exif_maker_notes.cache import MetadataCache
+from exif_maker_notes.cli import application
+from exif_maker_notes.files import Fingerprint
+from exif_maker_notes.parallel import iter_parallel_metadata
+
+runner = CliRunner()
+
+
+def test_cache(tmp_path: Path) -> None:
+    """Test cache hits, misses and eviction."""
+    photos = [tmp_path / f"{i}.jpg" for i in range(3)]
+    for photo in photos:
+        photo.write_bytes(b"photo")
+
+    with MetadataCache(tmp_path / "cache.sqlite", max_entries=2) as cache:
+        cache.put_many(
+            (
+                (photo, Fingerprint.from_stat(photo.stat()), {"EXIF:Make": "Nikon"})
+                for photo in photos
+            ),
+            ["EXIF:Make"],
+        )
+        assert set(cache.get_many(photos, ["EXIF:Make"])) == set(photos)
+        assert not cache.get_many(photos, ["EXIF:Model"])
+
+        photos[0].write_bytes(b"changed photo")
+        assert set(cache.get_many(photos, ["EXIF:Make"])) == set(photos[1:])
+
+        assert cache.invalidate([photos[1]]) == 1
+        assert cache.evict() == 0
+
+    with MetadataCache(tmp_path / "cache.sqlite", max_entries=1) as cache:
+        assert cache.evict() == 1
+        assert cache.size() == 1
+
+
+def test_cache_parallel(tmp_path: Path) -> None:
+    """Test that entries added by worker processes are evicted."""
+    photos = [tmp_path / f"{i}.jpg" for i in range(5)]
+    for photo in photos:
+        shutil.copy("tests/data/NikonD5200.jpg", photo)
+
+    with MetadataCache(tmp_path / "cache.sqlite", max_entries=2) as cache:
+        records = iter_parallel_metadata(
+            photos,
+            logging.getLogger("test_cache"),
+            cache,
+            tags=["EXIF:Make"],
+            jobs=2,
+            chunk_size=1,
+        )
+        assert [photo for photo, _ in records] == photos
+    with MetadataCache(tmp_path / "cache.sqlite") as cache:
+        assert cache.size() == 2  # ruff: ignore[magic-value-comparison]
+
+
+def test_cache_cli() -> None:
+    """Test cache commands."""
+    result = runner.invoke(application, ["cache", "info"], catch_exceptions=False)
+    assert result.exit_code == 0
+
+    result = runner.invoke(
+        application,
+        ["cache", "invalidate", "tests/data/NikonD5200.jpg"],
+        catch_exceptions=False,
+    )
+    assert result.exit_code == 0
@@ -0,0 +1,79 @@
+"""Metadata export tests."""
+
+import json
+from io import StringIO
+from pathlib import Path
+
+import pytest
+from typer.testing import CliRunner
+
+from exif_maker_notes.cli import application
+from exif_maker_notes.export import ExportFormat, export_metadata
+
+runner = CliRunner()
+
+RECORDS = [
+    (Path("a.jpg"), {"EXIF:Make": "Nikon", "EXIF:Model": "D5200"}),
+    (Path("b.jpg"), {"EXIF:Make": "Nikon"}),
+]
+
+
+def test_export_jsonl() -> None:
+    """Test that JSON lines hold one record per photo."""
+    stream = StringIO()
+    written = export_metadata(
+        RECORDS,
+        stream,
+        ExportFormat.JSONL,
+        ["EXIF:Model"],
+        chunk_size=1,
+    )
+    assert written == len(RECORDS)
+    assert [json.loads(line) for line in stream.getvalue().splitlines()] == [
+        {"SourceFile": "a.jpg", "EXIF:Model": "D5200"},
+        {"SourceFile": "b.jpg"},
+    ]
+
+
+def test_export_csv() -> None:
+    """Test that CSV columns follow the tags."""
+    stream = StringIO()
+    export_metadata(
+        RECORDS,
+        stream,
+        ExportFormat.CSV,
+        ["EXIF:Model", "EXIF:Make"],
+        chunk_size=10,
+    )
+    assert stream.getvalue().splitlines() == [
+        "SourceFile,EXIF:Model,EXIF:Make",
+        "a.jpg,D5200,Nikon",
+        "b.jpg,,Nikon",
+    ]
+    with pytest.raises(ValueError, match="Tags are required"):
+        export_metadata(RECORDS, StringIO(), ExportFormat.CSV, chunk_size=10)
+
+
+def test_list_csv(tmp_path: Path) -> None:
+    """Test listing natively decoded tags to a CSV file."""
+    output = tmp_path / "metadata.csv"
+    result = runner.invoke(
+        application,
+        [
+            "list",
+            "tests/data/NikonD5200.jpg",
+            "--no-cache",
+            "--format",
+            "csv",
+            "--tags",
+            "EXIF:Make,EXIF:Model",
+            "--output",
+            str(output),
+        ],
+        catch_exceptions=False,
+    )
+    assert result.exit_code == 0
+    assert output.read_text(encoding="utf-8").splitlines() == [
+        "SourceFile,EXIF:Make,EXIF:Model",
+        "tests/data/NikonD5200.jpg,NIKON CORPORATION,NIKON D5200",
+    ]
@@ -0,0 +1,27 @@
+"""File discovery tests."""
+
+from pathlib import Path
+
+from exif_maker_notes.files import PhotoDiscovery
+
+
+def test_discovery(tmp_path: Path) -> None:
+    """Test recursive discovery and backup pairing."""
+    (tmp_path / "day").mkdir()
+    for name in ["a.jpg", "b.NEF", "b.NEF_original", "notes.txt", "day/c.jpg"]:
+        (tmp_path / name).write_bytes(b"photo")
+
+    discovery = PhotoDiscovery([tmp_path])
+    assert list(discovery) == [
+        tmp_path / "a.jpg",
+        tmp_path / "b.NEF",
+        tmp_path / "day" / "c.jpg",
+    ]
+    assert list(discovery.pending()) == [tmp_path / "a.jpg", tmp_path / "day" / "c.jpg"]
+    assert list(discovery.backed_up()) == [tmp_path / "b.NEF"]
+
+    discovery = PhotoDiscovery([tmp_path], ["*.nef"], recursive=False)
+    assert list(discovery) == [tmp_path / "b.NEF"]
+
+    discovery = PhotoDiscovery([tmp_path / "b.NEF", tmp_path / "b.NEF_original"])
+    assert list(discovery.backed_up()) == [tmp_path / "b.NEF"]
@@ -0,0 +1,108 @@
+"""Fix unit tests."""
+
+import pickle  # ruff: ignore[suspicious-pickle-import]
+from pathlib import Path
+
+import pytest
+
+from exif_maker_notes.fixes.exposure import ExposureCompensationFix
+from exif_maker_notes.fixes.exposure_store import (
+    ExposureConfigurationError,
+    build_exposure_index,
+)
+from exif_maker_notes.fixes.hardware import (
+    BodyNormalizeNameFix,
+    Lens35mmEquivalentFix,
+)
+from exif_maker_notes.metadata import Metadata
+
+EMPTY = Metadata((), ())
+
+
+class CountingFix(BodyNormalizeNameFix):
+    """Body normalize name fix counting its evaluations."""
+
+    calls = 0
+
+    def apply(self, photo: Path, metadata: Metadata) -> dict[str, str]:
+        """Count and apply the fix."""
+        self.calls += 1
+        return super().apply(photo, metadata)
+
+
+def test_apply_batch_memoized() -> None:
+    """Test that photos with identical tags reuse results."""
+    fix = CountingFix(None)
+    photos = [Path("a.jpg"), Path("b.jpg"), Path("c.jpg")]
+    records = [
+        Metadata.from_dict({"EXIF:Make": "NIKON CORPORATION", "EXIF:Model": model})
+        for model in ("NIKON D5200", "NIKON D5200")
+    ]
+    records.append(Metadata.from_dict({"EXIF:Make": "Nikon"}))
+    assert fix.apply_batch(photos, records) == [
+        {"EXIF:Make": "Nikon", "EXIF:Model": "D5200"},
+        {"EXIF:Make": "Nikon", "EXIF:Model": "D5200"},
+        {},
+    ]
+    assert fix.calls == 2  # ruff: ignore[magic-value-comparison]
+
+
+def test_apply_batch_per_photo() -> None:
+    """Test that fixes depending on the photo are not memoized."""
+    fix = ExposureCompensationFix(None, Path("tests/data/exposure.csv"))
+    photos = [Path("NikonD5200.jpg"), Path("other.jpg")]
+    records = [Metadata.from_dict({"EXIF:ExposureCompensation": "0"})] * 2
+    assert fix.apply_batch(photos, records) == [
+        {"EXIF:ExposureCompensation": "0.33333"},
+        {},
+    ]
+
+
+def test_printed_numbers() -> None:
+    """Test that values printed as fractions or with units are compared."""
+    fix = ExposureCompensationFix(None, Path("tests/data/exposure.csv"))
+    metadata = Metadata.from_dict({"EXIF:ExposureCompensation": "+1/3"})
+    assert fix.apply(Path("NikonD5200.jpg"), metadata) == {}
+
+    lens = Lens35mmEquivalentFix(None)
+    values = {"Composite:LensID": "AF-S DX 18-55mm", "EXIF:FocalLength": "32.0 mm"}
+    assert lens.apply(Path("a.jpg"), Metadata.from_dict(values)) == {
+        "EXIF:FocalLengthIn35mmFormat": "48",
+    }
+    values["EXIF:FocalLengthIn35mmFormat"] = "48 mm"
+    assert lens.apply(Path("a.jpg"), Metadata.from_dict(values)) == {}
+
+
+def test_exposure_index(tmp_path: Path) -> None:
+    """Test that an indexed configuration gives the same results."""
+    index = tmp_path / "exposure.sqlite"
+    assert build_exposure_index(Path("tests/data/exposure.csv"), index) == 1
+    fix = ExposureCompensationFix(None, index)
+    assert fix.lookup([Path("NikonD5200.jpg"), Path("other.jpg")]) == {
+        "NikonD5200.jpg": 0.33333,
+    }
+    assert fix.apply(Path("NikonD5200.jpg"), EMPTY) == {
+        "EXIF:ExposureCompensation": "0.33333",
+    }
+    worker_fix = pickle.loads(pickle.dumps(fix))  # ruff: ignore[suspicious-pickle-usage]
+    assert worker_fix.apply(Path("other.jpg"), EMPTY) == {}
+
+
+def test_exposure_invalid_row(tmp_path: Path) -> None:
+    """Test that malformed rows are reported with their line."""
+    config = tmp_path / "exposure.csv"
+    config.write_text(
+        "name,exposure\na.jpg,0.3\n\nb.jpg,bright\n",
+        encoding="utf-8",
+    )
+    with pytest.raises(ExposureConfigurationError, match=r"exposure\.csv:4: b\.jpg"):
+        build_exposure_index(config, tmp_path / "exposure.sqlite")
+    assert not list(tmp_path.glob("*.sqlite*"))
+
+
+def test_exposure_strict_validation() -> None:
+    """Test that strict validation reports all missing photos at once."""
+    fix = ExposureCompensationFix(None, Path("tests/data/exposure.csv"), strict=True)
+    fix.validate([Path("NikonD5200.jpg")])
+    with pytest.raises(ExposureConfigurationError, match="2 photo"):
+        fix.validate([Path("NikonD5200.jpg"), Path("a.jpg"), Path("b.jpg")])
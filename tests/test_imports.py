@@ -0,0 +1,55 @@
+"""Import time tests."""
+
+import subprocess  # ruff: ignore[suspicious-subprocess-import]
+import sys
+
+import pytest
+
+# modules that are only needed once a command runs
+LAZY_MODULES = (
+    "exiftool",
+    "importlib.metadata",
+    "multiprocessing",
+    "platformdirs",
+    "rich",
+    "sqlite3",
+    "tomli_w",
+)
+
+# budget for the import time of the package's own modules, in microseconds
+IMPORT_BUDGET = 50_000
+
+
+def import_times(module: str) -> dict[str, int]:
+    """Self import times of all modules loaded by importing a module."""
+    result = subprocess.run(  # ruff: ignore[subprocess-without-shell-equals-true]
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+    times: dict[str, int] = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_time, _cumulative, name = line.removeprefix("import time:").split("|")
+        times[name.strip()] = int(self_time)
+    return times
+
+
+@pytest.mark.parametrize("module", ["exif_maker_notes.cli", "exif_maker_notes.fixes"])
+def test_lazy_imports(module: str) -> None:
+    """Test that heavy modules are not loaded on import."""
+    times = import_times(module)
+    loaded = {
+        name
+        for name in times
+        for lazy in LAZY_MODULES
+        if name == lazy or name.startswith(f"{lazy}.")
+    }
+    assert not loaded
+
+    own = sum(
+        time for name, time in times.items() if name.startswith("exif_maker_notes")
+    )
+    assert own < IMPORT_BUDGET
@@ -0,0 +1,26 @@
+"""Fix run journal tests."""
+
+from pathlib import Path
+
+from exif_maker_notes.journal import Journal, Outcome
+
+
+def test_journal(tmp_path: Path) -> None:
+    """Test that completed and unchanged photos are skipped."""
+    photos = [tmp_path / f"{i}.jpg" for i in range(3)]
+    for photo in photos:
+        photo.write_bytes(b"photo")
+
+    location = tmp_path / "journal.sqlite"
+    with Journal(location, "context") as journal:
+        journal.record(photos[0], Outcome.APPLIED)
+        journal.record(photos[1], Outcome.NOOP)
+        journal.record(photos[2], Outcome.ERROR)
+
+    with Journal(location, "context") as journal:
+        assert list(journal.incomplete(photos)) == [photos[2]]
+        photos[1].write_bytes(b"changed photo")
+        assert list(journal.incomplete(photos)) == photos[1:]
+
+    with Journal(location, "other context") as journal:
+        assert list(journal.incomplete(photos)) == photos
@@ -0,0 +1,49 @@
+"""Logging unit tests."""
+
+from collections.abc import Generator
+from logging import WARNING, getLogger
+
+import pytest
+
+from exif_maker_notes.cli.logger import DeferredQueueHandler, setup_logger
+from exif_maker_notes.cli.state import TyperState
+from exif_maker_notes.logs import DETAIL, TagLines
+
+
+@pytest.fixture
+def state() -> Generator[TyperState]:
+    """Provide a CLI state, removing its logging setup afterwards."""
+    state = TyperState()
+    level = getLogger().level
+    yield state
+    state.close()
+    logger = getLogger()
+    for handler in logger.handlers[:]:
+        if isinstance(handler, DeferredQueueHandler):
+            logger.removeHandler(handler)
+    logger.setLevel(level)
+
+
+def test_tag_lines() -> None:
+    """Test that tags are formatted one per line."""
+    lines = TagLines({"EXIF:Make": "Nikon", "EXIF:Model": "D5200"})
+    assert str(lines) == "  EXIF:Make: Nikon\n  EXIF:Model: D5200"
+
+
+def test_summary(state: TyperState, capsys: pytest.CaptureFixture[str]) -> None:
+    """Test that summary mode drops per-photo details."""
+    state.summary = True
+    logger = setup_logger(state)
+    logger.log(DETAIL, "Metadata for %s:\n%s", "a.jpg", TagLines({"Make": "X"}))
+    logger.info("Listed %d photo(s)", 1)
+    state.close()
+
+    output = capsys.readouterr().out
+    assert "Listed 1 photo(s)" in output
+    assert "a.jpg" not in output
+
+
+def test_quiet(state: TyperState) -> None:
+    """Test that quiet mode only logs warnings and errors."""
+    state.quiet = True
+    assert setup_logger(state).level == WARNING
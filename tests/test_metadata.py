@@ -0,0 +1,55 @@
+"""Metadata record tests."""
+
+import pickle  # ruff: ignore[suspicious-pickle-import]
+
+import pytest
+
+from exif_maker_notes.metadata import Metadata, parse_number
+
+
+def test_metadata_record() -> None:
+    """Test that records behave as read-only mappings sharing tag names."""
+    first = Metadata.from_dict({"EXIF:Make": "NIKON", "EXIF:Model": "D5200"})
+    second = Metadata.from_dict({"EXIF:Make": "Nikon", "EXIF:Model": "D7000"})
+    assert first == {"EXIF:Make": "NIKON", "EXIF:Model": "D5200"}
+    assert list(second) == ["EXIF:Make", "EXIF:Model"]
+    assert first.get("EXIF:LensModel") is None
+    default = "Unknown"
+    assert first.get("EXIF:LensModel", default) is default
+    assert "EXIF:Model" in first
+    with pytest.raises(KeyError):
+        first["EXIF:LensModel"]
+
+    assert first.number("EXIF:Make") is None
+
+    loaded = pickle.loads(pickle.dumps(first))  # ruff: ignore[suspicious-pickle-usage]
+    assert loaded == first
+    assert next(iter(loaded)) is next(iter(second))
+
+
+def test_metadata_numbers() -> None:
+    """Test that numeric tags are parsed when the record is built."""
+    metadata = Metadata.from_dict(
+        {"EXIF:FocalLength": "18.0 mm", "EXIF:ExposureCompensation": "+1/3"},
+    )
+    assert metadata.number("EXIF:FocalLength") == pytest.approx(18.0)
+    assert metadata.number("EXIF:ExposureCompensation") == pytest.approx(1 / 3)
+    assert metadata.number("EXIF:FocalLengthIn35mmFormat") is None
+    assert metadata["EXIF:FocalLength"] == "18.0 mm"
+
+
+@pytest.mark.parametrize(
+    ("value", "number"),
+    [
+        ("+1/3", 1 / 3),
+        ("-0.7", -0.7),
+        ("0", 0.0),
+        ("18.0 mm", 18.0),
+        (48, 48.0),
+        ("undef", None),
+        (None, None),
+    ],
+)
+def test_parse_number(value: str | float | None, number: float | None) -> None:
+    """Test that numbers printed by exiftool are parsed."""
+    assert parse_number(value) == pytest.approx(number)
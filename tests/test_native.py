@@ -0,0 +1,117 @@
+"""Native metadata reader tests."""
+
+import shutil
+from pathlib import Path
+
+import pytest
+
+from exif_maker_notes.native import (
+    NATIVE_TAGS,
+    NativeReadError,
+    patch_metadata,
+    print_fraction,
+    print_lens_type,
+    read_metadata,
+)
+from exif_maker_notes.tool import ExifToolSession, MetadataWriter, list_metadata
+
+photo = Path("tests/data/NikonD5200.jpg")
+
+
+def test_read_metadata() -> None:
+    """Test decoding EXIF and Nikon maker notes tags."""
+    metadata = read_metadata(photo, NATIVE_TAGS)
+    assert metadata == {
+        "EXIF:Make": "NIKON CORPORATION",
+        "EXIF:Model": "NIKON D5200",
+        "EXIF:ExposureCompensation": "0",
+        "EXIF:FocalLength": "32.0 mm",
+        "EXIF:FocalLengthIn35mmFormat": "32 mm",
+        "MakerNotes:TimeZone": "+01:00",
+        "MakerNotes:DaylightSavings": "Yes",
+        "MakerNotes:LensType": "G VR",
+        "MakerNotes:Lens": "18-105mm f/3.5-5.6",
+    }
+
+
+def test_read_metadata_invalid(tmp_path: Path) -> None:
+    """Test that files without EXIF data are rejected."""
+    path = tmp_path / "empty.jpg"
+    path.write_bytes(b"\xff\xd8\xff\xd9")
+    with pytest.raises(NativeReadError):
+        read_metadata(path, NATIVE_TAGS)
+
+
+def test_list_metadata_native() -> None:
+    """Test that natively supported tags are read without exiftool."""
+    with ExifToolSession() as session:
+        metadata = list_metadata(
+            [photo],
+            tags=["EXIF:Make", "MakerNotes:TimeZone"],
+            session=session,
+        )
+        assert session.spawned == 0
+    assert metadata[photo] == {
+        "EXIF:Make": "NIKON CORPORATION",
+        "MakerNotes:TimeZone": "+01:00",
+    }
+
+
+@pytest.mark.parametrize(
+    ("value", "expected"),
+    [(0, "0"), (1, "+1"), (-0.5, "-1/2"), (1 / 3, "+1/3"), (-2 / 3, "-2/3")],
+)
+def test_print_fraction(value: float, expected: str) -> None:
+    """Test exposure value formatting."""
+    assert print_fraction(value) == expected
+
+
+@pytest.mark.parametrize(
+    ("value", "expected"),
+    [(0, "AF"), (0x0E, "G VR"), (0x4E, "E VR"), (0x86, "G AF-P"), (0x10, "1")],
+)
+def test_print_lens_type(value: int, expected: str) -> None:
+    """Test Nikon lens type formatting."""
+    assert print_lens_type(value) == expected
+
+
+def test_patch_metadata(tmp_path: Path) -> None:
+    """Test patching existing tags in place."""
+    path = tmp_path / photo.name
+    shutil.copy(photo, path)
+    mtime_ns = path.stat().st_mtime_ns
+    tags = {
+        "EXIF:Make": "Nikon",
+        "EXIF:ExposureCompensation": "-0.7",
+        "EXIF:FocalLengthIn35mmFormat": "48",
+    }
+    assert patch_metadata(path, tags)
+    assert path.stat().st_mtime_ns == mtime_ns
+    assert read_metadata(path, tags) == {
+        "EXIF:Make": "Nikon",
+        "EXIF:ExposureCompensation": "-0.7",
+        "EXIF:FocalLengthIn35mmFormat": "48 mm",
+    }
+
+
+def test_patch_metadata_structural(tmp_path: Path) -> None:
+    """Test that structural changes leave the file untouched."""
+    path = tmp_path / photo.name
+    shutil.copy(photo, path)
+    assert not patch_metadata(
+        path,
+        {"EXIF:ExposureCompensation": "1", "EXIF:OffsetTime": "+01:00"},
+    )
+    assert not patch_metadata(path, {"EXIF:Model": "A much longer model name"})
+    assert path.read_bytes() == photo.read_bytes()
+
+
+def test_writer_in_place(tmp_path: Path) -> None:
+    """Test that in-place writes do not use exiftool."""
+    path = tmp_path / photo.name
+    shutil.copy(photo, path)
+    with ExifToolSession() as session:
+        writer = MetadataWriter(session, in_place=True)
+        results = writer.add(path, {"EXIF:FocalLengthIn35mmFormat": "48"})
+        assert [result.error for result in results] == [None]
+        assert session.spawned == 0
@@ -0,0 +1,32 @@
+"""Parallel processing tests."""
+
+import logging
+from pathlib import Path
+
+import pytest
+
+from exif_maker_notes.parallel import Worker, run_parallel
+
+
+def count_chunk(worker: Worker[str], photos: list[Path]) -> int:
+    """Log the photos of a chunk and count them."""
+    for photo in photos:
+        worker.logger.info("%s %s", worker.context, photo.name)
+    return len(photos)
+
+
+def test_run_parallel(caplog: pytest.LogCaptureFixture) -> None:
+    """Test that results are aggregated and logs replayed in order."""
+    logger = logging.getLogger("test_parallel")
+    photos = [Path(f"{i:03d}.jpg") for i in range(20)]
+    with caplog.at_level(logging.INFO):
+        result = run_parallel(
+            count_chunk,
+            photos,
+            logger,
+            "photo",
+            jobs=3,
+            chunk_size=3,
+        )
+    assert result == len(photos)
+    assert caplog.messages == [f"photo {photo.name}" for photo in photos]
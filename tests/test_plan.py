@@ -0,0 +1,95 @@
+"""Fix plan tests."""
+
+import logging
+import shutil
+from pathlib import Path
+
+import pytest
+
+from exif_maker_notes.cache import MetadataCache
+from exif_maker_notes.files import Fingerprint, sidecar_path
+from exif_maker_notes.plan import PlanError, PlanReader, PlanWriter, apply_plan
+from exif_maker_notes.sidecar import WriteTarget
+
+
+def test_plan_round_trip(tmp_path: Path) -> None:
+    """Test that planned changes are streamed back with their fingerprint."""
+    photo = tmp_path / "a.jpg"
+    photo.write_bytes(b"photo")
+    path = tmp_path / "fixes.plan"
+    with PlanWriter(path, WriteTarget.SIDECAR) as plan:
+        assert plan.add(photo, {"EXIF:Make": "Nikon"}, {"EXIF:Make": "NIKON"}) == []
+        [missing] = plan.add(tmp_path / "missing.jpg", {"EXIF:Make": "Nikon"})
+        assert isinstance(missing.error, FileNotFoundError)
+    assert plan.count == 1
+
+    reader = PlanReader(path)
+    assert reader.target is WriteTarget.SIDECAR
+    [entry] = list(reader)
+    assert entry.photo == photo
+    assert entry.tags == {"EXIF:Make": "Nikon"}
+    assert entry.original == {"EXIF:Make": "NIKON"}
+    assert not entry.changed()
+
+
+def test_plan_absolute(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that photos are recorded independently of the working directory."""
+    monkeypatch.chdir(tmp_path)
+    Path("a.jpg").write_bytes(b"photo")
+    path = tmp_path / "fixes.plan"
+    with PlanWriter(path) as plan:
+        plan.add(Path("a.jpg"), {"EXIF:Make": "Nikon"})
+    assert [entry.photo for entry in PlanReader(path)] == [tmp_path / "a.jpg"]
+
+
+def test_plan_discarded(tmp_path: Path) -> None:
+    """Test that an interrupted plan does not replace a previous one."""
+    path = tmp_path / "fixes.plan"
+    path.write_text("previous", encoding="utf-8")
+    with pytest.raises(KeyboardInterrupt), PlanWriter(path):
+        raise KeyboardInterrupt
+    assert path.read_text(encoding="utf-8") == "previous"
+    assert list(tmp_path.iterdir()) == [path]
+
+    with pytest.raises(PlanError, match="Invalid plan"):
+        PlanReader(path)
+
+
+def test_apply_plan(tmp_path: Path) -> None:
+    """Test that photos changed since planned are skipped."""
+    photos = [tmp_path / "a.jpg", tmp_path / "b.jpg"]
+    path = tmp_path / "fixes.plan"
+    with PlanWriter(path, WriteTarget.SIDECAR) as plan:
+        for photo in photos:
+            photo.write_bytes(b"photo")
+            plan.add(photo, {"EXIF:FocalLengthIn35mmFormat": "48"})
+    photos[1].write_bytes(b"edited")
+
+    failed = apply_plan(PlanReader(path), logging.getLogger("test_plan"))
+    assert failed == 0
+    assert sidecar_path(photos[0]).exists()
+    assert not sidecar_path(photos[1]).exists()
+
+
+def test_apply_plan_in_place(tmp_path: Path) -> None:
+    """Test that photos patched in place are removed from the cache."""
+    photo = tmp_path / "NikonD5200.jpg"
+    shutil.copy("tests/data/NikonD5200.jpg", photo)
+    path = tmp_path / "fixes.plan"
+    with PlanWriter(path) as plan:
+        plan.add(photo, {"EXIF:FocalLengthIn35mmFormat": "48"})
+
+    tags = ["EXIF:FocalLengthIn35mmFormat"]
+    with MetadataCache(tmp_path / "cache.sqlite") as cache:
+        cache.put_many(
+            [(photo, Fingerprint.from_stat(photo.stat()), {tags[0]: "32 mm"})],
+            tags,
+        )
+        failed = apply_plan(
+            PlanReader(path),
+            logging.getLogger("test_plan"),
+            in_place=True,
+            cache=cache,
+        )
+        assert failed == 0
+        assert not cache.get_many([photo], tags)
@@ -0,0 +1,55 @@
+"""Profiling tests."""
+
+import json
+from collections.abc import Generator
+from pathlib import Path
+
+import pytest
+from typer.testing import CliRunner
+
+from exif_maker_notes import profiling
+from exif_maker_notes.cli import application
+from exif_maker_notes.files import PhotoDiscovery
+from exif_maker_notes.fixes.hardware import BodyNormalizeNameFix
+from exif_maker_notes.metadata import Metadata
+
+runner = CliRunner()
+
+
+@pytest.fixture(autouse=True)
+def reset_profiling() -> Generator[None]:
+    """Leave profiling disabled after each test."""
+    yield
+    profiling.disable()
+
+
+def test_profile_stages(tmp_path: Path) -> None:
+    """Test that stages and counters are recorded once enabled."""
+    (tmp_path / "a.jpg").write_bytes(b"photo")
+    list(PhotoDiscovery([tmp_path]))
+    assert profiling.active() is None
+
+    profiler = profiling.enable()
+    list(PhotoDiscovery([tmp_path]))
+    BodyNormalizeNameFix(None).apply_batch(
+        [Path("a.jpg"), Path("b.jpg")],
+        [Metadata.from_dict({"EXIF:Make": "Nikon", "EXIF:Model": "D5200"})] * 2,
+    )
+
+    report = profiler.report()
+    assert report["stages"]["discover"]["calls"] == 1
+    assert report["stages"]["fix.BodyNormalizeNameFix"]["calls"] == 1
+    assert report["counters"] == {"fix.memo_hits": 1}
+
+
+def test_profile_option(tmp_path: Path) -> None:
+    """Test the profile summary and JSON report."""
+    output = tmp_path / "profile.json"
+    result = runner.invoke(
+        application,
+        ["--profile-output", str(output), "cache", "info"],
+        catch_exceptions=False,
+    )
+    assert result.exit_code == 0
+    assert "Profile" in result.output
+    assert set(json.loads(output.read_text())) == {"seconds", "stages", "counters"}
@@ -0,0 +1,103 @@
+"""Local service tests."""
+
+import json
+import logging
+import shutil
+from collections.abc import Iterator
+from pathlib import Path
+from threading import Thread
+from unittest.mock import ANY
+
+import pytest
+from exiftool.exceptions import ExifToolExecuteError
+
+from exif_maker_notes.client import ServiceClient, ServiceError
+from exif_maker_notes.files import backup_path
+from exif_maker_notes.fixes.hardware import LensModelFix
+from exif_maker_notes.service import ExifService, ServiceServer
+
+photo = Path("tests/data/NikonD5200.jpg")
+
+
+@pytest.fixture
+def socket_path(tmp_path: Path) -> Iterator[Path]:
+    """Run a service in a background thread."""
+    path = tmp_path / "service.sock"
+    service = ExifService([], logging.getLogger("test_service"), workers=1)
+    with ServiceServer(path, service) as server:
+        thread = Thread(target=server.serve_forever)
+        thread.start()
+        yield path
+        server.shutdown()
+        thread.join()
+    service.close()
+    assert not path.exists()
+
+
+def test_list(socket_path: Path) -> None:
+    """Test that records are listed over a reused connection."""
+    with ServiceClient(socket_path) as client:
+        for _ in range(2):
+            assert client.list_metadata([photo], ["EXIF:Make"]) == [
+                {"SourceFile": str(photo.absolute()), "EXIF:Make": "NIKON CORPORATION"},
+            ]
+        with pytest.raises(ServiceError, match="Unknown command"):
+            client.request("rename")
+        with pytest.raises(ServiceError, match="must be absolute"):
+            client.request("list", photos=[str(photo)])
+
+
+def test_fix_dry_run(tmp_path: Path) -> None:
+    """Test that fixes loaded once are run without writing."""
+    logger = logging.getLogger("test_service")
+    service = ExifService([LensModelFix(logger)], logger, workers=1)
+    path = tmp_path / photo.name
+    shutil.copy(photo, path)
+    request = {"command": "fix", "photos": [str(path)], "dry_run": True}
+    for _ in range(2):
+        response = service.respond(json.dumps(request).encode())
+        assert response == {"ok": True, "processed": 1, "failed": 0}
+    service.close()
+    assert path.read_bytes() == photo.read_bytes()
+
+
+def test_exiftool_error(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that exiftool errors are reported in the response."""
+    service = ExifService([], logging.getLogger("test_service"), workers=1)
+
+    def fail(**_arguments: object) -> dict[str, object]:
+        raise ExifToolExecuteError(1, "-j", "", "Error: File format error")
+
+    monkeypatch.setattr(service, "restore", fail)
+    request = {"command": "restore", "photos": [str(photo.absolute())]}
+    response = service.respond(json.dumps(request).encode())
+    service.close()
+    assert response == {"ok": False, "error": ANY}
+
+
+def test_restore(socket_path: Path, tmp_path: Path) -> None:
+    """Test that backups are restored."""
+    path = tmp_path / photo.name
+    shutil.copy(photo, backup_path(path))
+    path.write_bytes(b"fixed")
+    with ServiceClient(socket_path) as client:
+        assert client.restore([path]) == {"restored": 1, "failed": 0}
+    assert path.read_bytes() == photo.read_bytes()
+
+
+def test_running(socket_path: Path) -> None:
+    """Test that a running service is not replaced."""
+    service = ExifService([], logging.getLogger("test_service"), workers=1)
+    with pytest.raises(FileExistsError, match="already running"):
+        ServiceServer(socket_path, service)
+
+
+def test_not_a_socket(tmp_path: Path) -> None:
+    """Test that a file at the socket location is kept."""
+    path = tmp_path / "service.jpg"
+    path.write_bytes(b"photo")
+    service = ExifService([], logging.getLogger("test_service"), workers=1)
+    with pytest.raises(FileExistsError, match="Not a socket"):
+        ServiceServer(path, service)
+    service.close()
+    assert path.read_bytes() == b"photo"
@@ -0,0 +1,106 @@
+"""XMP sidecar tests."""
+
+import logging
+import shutil
+from pathlib import Path
+
+import pytest
+
+from exif_maker_notes.files import sidecar_path
+from exif_maker_notes.fixes import context_key, create_fixes
+from exif_maker_notes.fixes.pipeline import apply_fixes
+from exif_maker_notes.journal import Journal, Outcome
+from exif_maker_notes.sidecar import WriteTarget, write_sidecar
+from exif_maker_notes.tool import ExifToolSession, MetadataWriter
+
+photo = Path("tests/data/NikonD5200.jpg")
+
+DARKTABLE_SIDECAR = """<x:xmpmeta xmlns:x="adobe:ns:meta/">
+ <rdf:RDF xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#">
+  <rdf:Description rdf:about=""
+    xmlns:darktable="http://darktable.sf.net/"
+    darktable:xmp_version="5">
+   <exif:ExposureBiasValue xmlns:exif="http://ns.adobe.com/exif/1.0/"
+    >0/1</exif:ExposureBiasValue>
+  </rdf:Description>
+ </rdf:RDF>
+</x:xmpmeta>
+"""
+
+
+def test_write_sidecar(tmp_path: Path) -> None:
+    """Test that tags are converted to XMP properties."""
+    path = tmp_path / "DSC_0001.NEF"
+    written = write_sidecar(
+        path,
+        {"EXIF:LensModel": "AF-S DX 18-55mm", "EXIF:OffsetTime": "+02:00"},
+        {"EXIF:ModifyDate": "2024:06:01 12:30:00"},
+    )
+    assert written == tmp_path / "DSC_0001.NEF.xmp"
+    content = written.read_text(encoding="utf-8")
+    assert 'exifEX:LensModel="AF-S DX 18-55mm"' in content
+    assert 'xmp:ModifyDate="2024-06-01T12:30:00+02:00"' in content
+    assert not list(tmp_path.glob(".*.tmp"))
+
+    with pytest.raises(ValueError, match="no XMP equivalent"):
+        write_sidecar(path, {"MakerNotes:Lens": "18-55mm"}, {})
+
+
+def test_sidecar_pairs(tmp_path: Path) -> None:
+    """Test that RAW and JPEG pairs get their own sidecars."""
+    raw = write_sidecar(tmp_path / "DSC_0001.NEF", {"EXIF:Make": "Nikon"}, {})
+    jpeg = write_sidecar(tmp_path / "DSC_0001.JPG", {"EXIF:Model": "D5200"}, {})
+    assert raw != jpeg
+    assert "Make" in raw.read_text(encoding="utf-8")
+    assert "Make" not in jpeg.read_text(encoding="utf-8")
+
+
+def test_merge_sidecar(tmp_path: Path) -> None:
+    """Test that existing properties and prefixes are kept."""
+    path = tmp_path / "DSC_0001.NEF"
+    sidecar_path(path).write_text(DARKTABLE_SIDECAR, encoding="utf-8")
+    write_sidecar(path, {"EXIF:ExposureCompensation": "-0.33"}, {})
+    content = sidecar_path(path).read_text(encoding="utf-8")
+    assert 'darktable:xmp_version="5"' in content
+    assert "<exif:ExposureBiasValue>-33/100</exif:ExposureBiasValue>" in content
+    assert content.count("ExposureBiasValue") == 2  # ruff: ignore[magic-value-comparison]
+
+
+def test_writer_sidecar(tmp_path: Path) -> None:
+    """Test that the photo is left untouched without starting exiftool."""
+    path = tmp_path / photo.name
+    shutil.copy(photo, path)
+    with ExifToolSession() as session:
+        writer = MetadataWriter(session, target=WriteTarget.SIDECAR)
+        results = writer.add(path, {"EXIF:FocalLengthIn35mmFormat": "48"})
+        assert [result.error for result in results] == [None]
+        assert writer.flush() == []
+        assert session.spawned == 0
+    assert path.read_bytes() == photo.read_bytes()
+    assert 'exif:FocalLengthIn35mmFilm="48"' in sidecar_path(path).read_text(
+        encoding="utf-8",
+    )
+
+
+def test_sidecar_journal(tmp_path: Path) -> None:
+    """Test that photos completed in sidecars are skipped without resuming."""
+    path = tmp_path / photo.name
+    shutil.copy(photo, path)
+    exposure = Path("tests/data/exposure.csv")
+    journal = tmp_path / "journal.sqlite"
+    context = f"{context_key(create_fixes(None, exposure_config=exposure))};sidecar"
+    with Journal(journal, context) as completed:
+        completed.record(path, Outcome.APPLIED)
+
+    with ExifToolSession() as session:
+        failed = apply_fixes(
+            [path],
+            logging.getLogger("test_sidecar"),
+            exposure_config=exposure,
+            journal_path=journal,
+            target=WriteTarget.SIDECAR,
+            session=session,
+        )
+        assert session.spawned == 0
+    assert failed == 0
+    assert not sidecar_path(path).exists()
@@ -0,0 +1,78 @@
+"""Exiftool integration tests."""
+
+from logging import getLogger
+from pathlib import Path
+
+from exif_maker_notes.files import backup_path
+from exif_maker_notes.tool import (
+    ExifToolSession,
+    MetadataWriter,
+    chunked,
+    list_metadata,
+    restore_photos,
+)
+
+photo = Path("tests/data/NikonD5200.jpg")
+
+
+def test_session_reuse() -> None:
+    """Test that a session reuses a single exiftool process."""
+    with ExifToolSession() as session:
+        list_metadata([photo], session=session)
+        list_metadata([photo], session=session)
+        assert session.spawned == 1
+        assert session.executions == 2  # ruff: ignore[magic-value-comparison]
+
+
+def test_session_restart() -> None:
+    """Test that a session restarts a terminated exiftool process."""
+    with ExifToolSession() as session:
+        list_metadata([photo], session=session)
+        session.helper.terminate()
+        metadata = list_metadata([photo], session=session)
+        assert metadata[photo]
+        assert session.spawned == 2  # ruff: ignore[magic-value-comparison]
+        assert session.restarts == 1
+
+
+def test_list_tags() -> None:
+    """Test that only the requested tags are read."""
+    metadata = list_metadata([photo], tags=["EXIF:Make", "EXIF:Model"])
+    assert set(metadata[photo]) <= {"EXIF:Make", "EXIF:Model"}
+
+
+def test_writer_batching() -> None:
+    """Test that the writer flushes full batches."""
+    writer = MetadataWriter(ExifToolSession(), batch_size=3, dry_run=True)
+    assert not writer.add(Path("a.jpg"), {"EXIF:Make": "Nikon"})
+    assert not writer.add(Path("b.jpg"), {"EXIF:Model": "D5200"})
+    results = writer.add(Path("c.jpg"), {"EXIF:Make": "Nikon"})
+    assert [result.photo.name for result in results] == ["a.jpg", "c.jpg", "b.jpg"]
+    assert all(result.error is None for result in results)
+    assert not writer.flush()
+
+
+def test_chunked() -> None:
+    """Test splitting photos into chunks."""
+    assert list(chunked(range(5), 2)) == [[0, 1], [2, 3], [4]]
+    assert not list(chunked([], 2))
+
+
+def test_restore_native(tmp_path: Path) -> None:
+    """Test that backups are moved back without starting exiftool."""
+    photos = [tmp_path / f"{name}.jpg" for name in "abc"]
+    for photo in photos:
+        photo.write_bytes(b"fixed")
+        backup_path(photo).write_bytes(b"original")
+    backup_path(photos[-1]).unlink()
+
+    with ExifToolSession() as session:
+        failed = restore_photos(photos, getLogger(), session=session, jobs=2)
+    assert failed == 1
+    assert session.spawned == 0
+    assert [photo.read_bytes() for photo in photos] == [
+        b"original",
+        b"original",
+        b"fixed",
+    ]
+    assert not any(backup_path(photo).exists() for photo in photos)
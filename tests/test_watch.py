@@ -0,0 +1,67 @@
+"""Folder watch tests."""
+
+from pathlib import Path
+from threading import Event
+
+import pytest
+from typer.testing import CliRunner
+
+from exif_maker_notes.cli import application
+from exif_maker_notes.watch import (
+    InotifyWatcher,
+    PollingWatcher,
+    Watcher,
+    watch_batches,
+)
+
+runner = CliRunner()
+
+
+def is_photo(name: str) -> bool:
+    """Match JPEG file names."""
+    return name.endswith(".jpg")
+
+
+def first_batch(watcher: Watcher) -> list[Path]:
+    """Wait for the first batch of completed files."""
+    stop = Event()
+    for batch in watch_batches(watcher, debounce=0.05, stop=stop):
+        stop.set()
+        return batch
+    return []
+
+
+def test_polling_watcher(tmp_path: Path) -> None:
+    """Test that files are reported once their size stops changing."""
+    (tmp_path / "old.jpg").write_bytes(b"photo")
+    with PollingWatcher(tmp_path, is_photo, interval=0.01) as watcher:
+        (tmp_path / "nested").mkdir()
+        (tmp_path / "nested" / "new.jpg").write_bytes(b"photo")
+        (tmp_path / "notes.txt").write_bytes(b"text")
+        assert first_batch(watcher) == [tmp_path / "nested" / "new.jpg"]
+        assert watcher.poll(0.05) == []
+
+
+@pytest.mark.skipif(not InotifyWatcher.available(), reason="inotify not available")
+def test_inotify_watcher(tmp_path: Path) -> None:
+    """Test that closed and moved files are reported, also in new directories."""
+    with InotifyWatcher(tmp_path, is_photo) as watcher:
+        (tmp_path / "a.jpg").write_bytes(b"photo")
+        (tmp_path / "b.tmp").write_bytes(b"photo")
+        (tmp_path / "b.tmp").rename(tmp_path / "b.jpg")
+        # removed before the debounce delay ended
+        (tmp_path / "c.jpg").write_bytes(b"photo")
+        (tmp_path / "c.jpg").unlink()
+        assert sorted(first_batch(watcher)) == [tmp_path / "a.jpg", tmp_path / "b.jpg"]
+
+        nested = tmp_path / "nested"
+        nested.mkdir()
+        (nested / "d.jpg").write_bytes(b"photo")
+        assert first_batch(watcher) == [nested / "d.jpg"]
+
+
+def test_watch_in_place_backup(tmp_path: Path) -> None:
+    """Test that watched photos are not patched in place without a backup."""
+    result = runner.invoke(application, ["watch", str(tmp_path), "--in-place"])
+    assert result.exit_code != 0
+    assert "--backup" in result.output